@@ -0,0 +1,118 @@
+"""
+每个控制周期的 PyBullet 调用次数：逐关节接口（旧写法） vs dofbot 类现在的批量接口
+
+一个控制周期 = 下发 5 个臂关节 + 6 个夹爪关节的位置指令，再读回关节角和末端位姿（即状态机每一拍
+dofbot_control + get_dofbot_jointPoses + get_dofbot_pose 的开销）。
+统计时把机器人的 self._p 临时换成 CountingBulletClient，stepSimulation 走另一个客户端，不计入。
+另外对比 env.reset 两种方式的耗时：逐个复位物块 / 机械臂 vs restoreState 快照恢复。
+
+用法（在 Dofbot_2025 目录下）：python bench_bullet_io.py
+"""
+import time
+
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+from dofbot import DofbotEnv, BulletClient, CountingBulletClient, dofbot
+
+
+# --------------------- 1. 旧的逐关节写法（仅作对照） ---------------------
+def per_joint_cycle(robot, jointPoses, gripperAngle):
+    for i in range(robot.numJoints):
+        robot._p.setJointMotorControl2(bodyUniqueId=robot.dofbotUid, jointIndex=i, controlMode=robot._p.POSITION_CONTROL,
+                                       targetPosition=jointPoses[i], targetVelocity=0, force=200,
+                                       maxVelocity=1.0, positionGain=0.3, velocityGain=1)
+    forces = [robot.fingerAForce, robot.fingerBForce] * 3
+    for jointIndex, force in zip(robot.gripper_joints, forces):
+        robot._p.setJointMotorControl2(robot.dofbotUid, jointIndex, robot._p.POSITION_CONTROL,
+                                       targetPosition=gripperAngle, force=force)
+    return per_joint_read(robot)
+
+
+def per_joint_read(robot):
+    jointPoses = [robot._p.getJointState(robot.dofbotUid, i)[0] for i in range(robot.numJoints + 1)]
+    link_states = [robot._p.getLinkState(robot.dofbotUid, idx) for idx in robot.ee_links]
+    # 位姿求均值与 dofbot.get_pose 相同，只有取数方式不同
+    pos = np.mean([state[0] for state in link_states], axis=0)
+    orn = R.from_quat([state[1] for state in link_states]).mean().as_quat()
+    euler = robot._p.getEulerFromQuaternion(orn)
+    return jointPoses[:robot.numJoints], (pos, orn, euler)
+
+
+def per_joint_reset(robot):
+    for jointIndex in range(robot.numJoints):
+        robot._p.resetJointState(robot.dofbotUid, jointIndex, robot.jointStartPositions[jointIndex])
+    for jointIndex in robot.gripper_joints:
+        robot._p.resetJointState(robot.dofbotUid, jointIndex, 0.0)
+    return per_joint_read(robot)
+
+
+# --------------------- 2. 现在的批量接口 ---------------------
+def bulk_cycle(robot, jointPoses, gripperAngle):
+    robot.joint_control(jointPoses)
+    robot.gripper_control(gripperAngle)
+    return robot.get_jointPoses(), robot.get_pose()
+
+
+# --------------------- 3. 计数 + 计时 ---------------------
+def measure(robot, cycle, steps=1000):
+    """
+    参数
+    ----
+    robot : dofbot 实例
+    cycle : cycle(robot, jointPoses, gripperAngle)
+    steps : 控制周期数
+    返回
+    ----
+    calls_per_step : 每周期 pybullet 调用次数
+    us_per_step : 每周期耗时（μs，不含 stepSimulation，含计数包装本身的开销）
+    calls : 按函数名的总调用次数
+    """
+    counter = CountingBulletClient(robot.physicsClient)
+    world = BulletClient(robot.physicsClient)
+    saved, robot._p = robot._p, counter
+    q0 = np.array(robot.jointStartPositions)
+    elapsed = 0.0
+    try:
+        for k in range(steps):
+            jointPoses = q0 + 0.2 * np.sin(0.01 * k)
+            start = time.perf_counter()
+            cycle(robot, jointPoses, 0.3 * np.sin(0.02 * k))
+            elapsed += time.perf_counter() - start
+            world.stepSimulation()
+            robot.invalidate_pose()
+    finally:
+        robot._p = saved
+    return sum(counter.calls.values()) / steps, elapsed / steps * 1e6, dict(counter.calls)
+
+
+def measure_reset(env, episodes=200):
+    """
+    返回
+    ----
+    full_us : 逐个复位物块和机械臂并步进一次的平均耗时（μs）
+    snapshot_us : env.reset（restoreState 快照）的平均耗时（μs）
+    """
+    env.reset()  # 第一次调用生成快照
+    start = time.perf_counter()
+    for _ in range(episodes):
+        env._reset_full()
+    full_us = (time.perf_counter() - start) / episodes * 1e6
+    start = time.perf_counter()
+    for _ in range(episodes):
+        env.reset()
+    snapshot_us = (time.perf_counter() - start) / episodes * 1e6
+    return full_us, snapshot_us
+
+
+if __name__ == "__main__":
+    env = DofbotEnv(headless=True)
+    robot = env._dofbot
+    for name, cycle, reset in (("逐关节", per_joint_cycle, per_joint_reset), ("批量", bulk_cycle, dofbot.reset)):
+        env.reset()
+        calls, us, detail = measure(robot, cycle)
+        reset_calls, _, _ = measure(robot, lambda r, q, g: reset(r), steps=1)
+        print(f"{name}：每周期 {calls:.0f} 次调用，{us:.1f} μs；复位 {reset_calls:.0f} 次调用；{detail}")
+    full_us, snapshot_us = measure_reset(env)
+    print(f"env.reset：逐个复位 {full_us:.1f} μs，快照恢复 {snapshot_us:.1f} μs")
+    env.close()
@@ -0,0 +1,78 @@
+"""
+自碰撞 / 物体间碰撞检查：原写法（整机 getClosestPoints 再在 Python 里过滤、有序物体对各查一次）
+vs collision_query（连杆对白名单 + AABB 预筛 + 逐对精查、早退；物体间每个无序对只查一次）
+
+随机采 N 组关节角，逐组比较两种写法的结果是否一致和单次耗时，再测批量 check_configurations。
+
+用法（在 Dofbot_2025 目录下）：python bench_collision.py
+"""
+import time
+
+import numpy as np
+import pybullet as p
+
+from dofbot import DofbotEnv, any_self_collision, check_pairwise_collisions
+
+
+# --------------------- 1. 原写法（仅作对照） ---------------------
+def legacy_any_self_collision(robot_uid, safety_margin=0.0, physicsClientId=0):
+    pts = p.getClosestPoints(bodyA=robot_uid, bodyB=robot_uid, distance=safety_margin,
+                             physicsClientId=physicsClientId)
+    for pt in pts:
+        if pt[3] == pt[4] or abs(pt[3] - pt[4]) == 1 or pt[3] >= 5 or pt[4] >= 5:
+            continue
+        return True
+    return False
+
+
+def legacy_check_pairwise_collisions(bodies, physicsClientId=0):
+    for body1 in bodies:
+        for body2 in bodies:
+            if body1 != body2 and \
+                    len(p.getClosestPoints(bodyA=body1, bodyB=body2, distance=0., physicsClientId=physicsClientId)) != 0:
+                return True
+    return False
+
+
+# --------------------- 2. 计时 ---------------------
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    env = DofbotEnv(headless=True)
+    env.reset()
+    robot, client = env._dofbot.dofbotUid, env.physicsClient
+    checker = env._dofbot.self_collision_checker()
+    print(f"白名单连杆对 {len(checker.pairs)} 个：{checker.pairs.tolist()}")
+
+    rng = np.random.default_rng(0)
+    qs = rng.uniform(env._dofbot.ll, env._dofbot.ul, size=(2000, 5))
+    for margin in (0.0, 0.005):
+        old, new = [], []
+        old_s = new_s = 0.0
+        for q in qs:
+            env._dofbot.forwardKinematic(q)
+            result, dt = timed(legacy_any_self_collision, robot, margin, client)
+            old.append(result)
+            old_s += dt
+            result, dt = timed(any_self_collision, robot, margin, client, checker)
+            new.append(result)
+            new_s += dt
+        old, new = np.array(old), np.array(new)
+        batch, batch_s = timed(checker.check_configurations, qs, None, margin)
+        print(f"safety_margin={margin}：碰撞 {old.mean():.2%}，一致 {np.mean(old == new):.2%} / 批量一致 "
+              f"{np.mean(old == batch):.2%}；原写法 {old_s / len(qs) * 1e6:.1f} μs，"
+              f"白名单 {new_s / len(qs) * 1e6:.1f} μs，批量 {batch_s / len(qs) * 1e6:.1f} μs / 组")
+
+    env.reset()
+    bodies = [env._object1.id, env._object2.id, robot]
+    for name, fn in (("原写法", legacy_check_pairwise_collisions), ("无序对 + 早退", check_pairwise_collisions)):
+        n = 500
+        start = time.perf_counter()
+        for _ in range(n):
+            result = fn(bodies, client)
+        print(f"物体间碰撞（{name}）：{result}，{(time.perf_counter() - start) / n * 1e6:.1f} μs / 次")
+    env.close()
@@ -0,0 +1,73 @@
+"""
+回合录制 / 回放：录一遍抓取放置（TaskExecutor），看文件大小和录制开销；
+在新建的无界面 env 里回放并逐位比较；再录一遍物块挪动 1 mm 的回合，用 diff_episodes 找出分歧点
+
+用法（在 Dofbot_2025 目录下）：python bench_episode.py
+"""
+import os
+import time
+
+import numpy as np
+
+from dofbot import DofbotEnv
+from episode_log import EpisodeLog, EpisodeRecorder, diff_episodes, format_diff, replay_episode
+from task_executor import Phase, TaskExecutor, Waypoint
+
+GRIPPER_OPEN = 20.0 / 180.0 * 3.1415
+GRIPPER_CLOSE = -20.0 / 180.0 * 3.1415
+
+
+def make_phases(env):
+    block_pos = np.asarray(env.get_block_pose()[0])
+    target_pos = np.asarray(env.get_target_pose())
+    return [
+        Phase("pre_grasp", [Waypoint(block_pos + [-0.015, -0.015, 0.045], GRIPPER_OPEN, 1800)]),
+        Phase("grasp", [Waypoint(block_pos + [0, 0, 0.025], GRIPPER_CLOSE, 1200)]),
+        Phase("move", [Waypoint(block_pos + [0, 0, 0.145], GRIPPER_CLOSE, 1000),
+                       Waypoint(target_pos + [0, 0, 0.145], GRIPPER_CLOSE, 1000)]),
+        Phase("set", [Waypoint(target_pos + [0, 0, 0.036], GRIPPER_CLOSE, 500),
+                      Waypoint(target_pos + [0, 0, 0.025], GRIPPER_OPEN, 500)]),
+    ]
+
+
+def record(env, path, object_poses=None, seed=None):
+    '''
+    :return: (录制时的墙钟, 不录制时的墙钟)
+    '''
+    elapsed = []
+    for path_or_none in (path, None):
+        env.reset(object_poses=object_poses)
+        recorder = EpisodeRecorder.attach(env, path_or_none, seed=seed) if path_or_none else None
+        start = time.perf_counter()
+        report = TaskExecutor(env, stop_on_success=False).run(make_phases(env))
+        elapsed.append(time.perf_counter() - start)
+        if recorder is not None:
+            recorder.close(success=report["success"])
+    return elapsed
+
+
+if __name__ == "__main__":
+    env = DofbotEnv(headless=True)
+    env.reset()
+    base, moved = "results/episodes/base.ep", "results/episodes/moved.ep"
+
+    recorded_s, plain_s = record(env, base, seed=0)
+    log = EpisodeLog(base)
+    raw = sum(column.nbytes for column in log.columns.values())
+    print(f"录制 {len(log)} 步：{recorded_s * 1e3:.0f} ms（不录制 {plain_s * 1e3:.0f} ms），"
+          f"文件 {os.path.getsize(base) / 1024:.1f} KB（未压缩 {raw / 1024:.1f} KB）")
+
+    result = replay_episode(base)
+    print(f"新 env 回放：{result['wall_s'] * 1e3:.0f} ms，{'逐位一致' if result['exact'] else '不一致'}")
+    print(format_diff(result["diff"]))
+
+    # 同一 env 再录一遍（恢复快照后），应与第一遍完全相同
+    record(env, "results/episodes/again.ep", seed=0)
+    print("再录一遍 vs 第一遍：")
+    print(format_diff(diff_episodes(base, "results/episodes/again.ep")))
+
+    poses = [(np.add(pos, [0.001, 0, 0]), orn) for pos, orn in log.meta["object_poses"]]
+    record(env, moved, object_poses=poses, seed=1)
+    print("物块挪动 1 mm：")
+    print(format_diff(diff_episodes(base, moved)))
+    env.close()
@@ -0,0 +1,70 @@
+"""
+分段计时：跑一遍抓取放置的路点（TaskExecutor），打印各阶段耗时表并写出 Chrome trace；
+同时对比不插桩 / 插桩 / 插桩后 detach 三种情况下的墙钟时间，确认关掉时没有额外开销
+
+用法（在 Dofbot_2025 目录下）：python bench_profile.py
+"""
+import time
+
+import numpy as np
+
+from dofbot import DofbotEnv
+from profiler import Profiler
+from task_executor import Phase, TaskExecutor, Waypoint
+
+GRIPPER_OPEN = 20.0 / 180.0 * 3.1415
+GRIPPER_CLOSE = -20.0 / 180.0 * 3.1415
+
+
+def make_phases(env):
+    block_pos = np.asarray(env.get_block_pose()[0])
+    target_pos = np.asarray(env.get_target_pose())
+    return [
+        Phase("pre_grasp", [Waypoint(block_pos + [-0.015, -0.015, 0.045], GRIPPER_OPEN, 1800)]),
+        Phase("grasp", [Waypoint(block_pos + [0, 0, 0.025], GRIPPER_CLOSE, 1200)]),
+        Phase("move", [Waypoint(block_pos + [0, 0, 0.145], GRIPPER_CLOSE, 1000),
+                       Waypoint(target_pos + [0, 0, 0.145], GRIPPER_CLOSE, 1000)]),
+        Phase("set", [Waypoint(target_pos + [0, 0, 0.036], GRIPPER_CLOSE, 500),
+                      Waypoint(target_pos + [0, 0, 0.025], GRIPPER_OPEN, 500)]),
+    ]
+
+
+def per_call_ns(env, n=200000):
+    '''
+    :return: 一次轻量 pybullet 调用（getBasePositionAndOrientation）的平均耗时 ns
+    '''
+    query, body = env._p.getBasePositionAndOrientation, env._object1.id
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        query(body)
+    return (time.perf_counter_ns() - start) / n
+
+
+def run(env, check_every):
+    env.reset()
+    start = time.perf_counter()
+    TaskExecutor(env, check_every=check_every, stop_on_success=False).run(make_phases(env))
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    env = DofbotEnv(headless=True)
+    # 每 10 步判定一次，让位姿查询 / 逆解之外的调用也出现在表里
+    check_every = 10
+    run(env, check_every)
+
+    plain, plain_ns = run(env, check_every), per_call_ns(env)
+
+    profiler = env.enable_profiler(Profiler())
+    profiled = run(env, check_every)
+    print(profiler.summary())
+    path = profiler.write_chrome_trace("results/profile/trace.json")
+    print(f"Chrome trace：{path}（{len(profiler.events)} 个事件，丢弃 {profiler.dropped_events}）")
+    profiled_ns = per_call_ns(env)
+
+    profiler.detach()
+    detached, detached_ns = run(env, check_every), per_call_ns(env)
+    print(f"墙钟：不插桩 {plain * 1e3:.1f} ms，插桩 {profiled * 1e3:.1f} ms，detach 后 {detached * 1e3:.1f} ms"
+          f"（主要是仿真步本身的波动）")
+    print(f"单次轻量 pybullet 调用：不插桩 {plain_ns:.0f} ns，插桩 {profiled_ns:.0f} ns，detach 后 {detached_ns:.0f} ns")
+    env.close()
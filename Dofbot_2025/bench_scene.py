@@ -0,0 +1,66 @@
+"""
+DofbotEnv 构造耗时：同时 spawn N 个 worker（与 utils_collect_visual 相同的启动方式），
+每个 worker 连一个 DIRECT 客户端、构造一个环境并 reset 一次，统计各自的 env.build_time。
+
+对比的场景模板：
+    原始 URDF        : 每个进程都对 STL 碰撞网格重新求凸包
+    凸包缓存          : 碰撞网格换成预先算好的凸包 OBJ
+    凸包缓存 + 无视觉  : 再去掉视觉网格（采集 worker 用的配置）
+    + .bullet 快照    : 再从快照恢复第一次复位后的状态
+
+用法（在 Dofbot_2025 目录下）：python bench_scene.py [worker 数，默认 12]
+"""
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pybullet as p
+
+from scene_cache import SceneTemplate
+
+
+def build_env(scene):
+    from dofbot import DofbotEnv
+
+    conn = p.connect(p.DIRECT)
+    env = DofbotEnv(physicsClientId=conn, scene=scene)
+    env.reset()
+    build_time = env.build_time
+    p.disconnect(conn)
+    return build_time
+
+
+def measure(scene, num_workers):
+    '''
+    返回
+    ----
+    build_ms : 每个 worker 的构造耗时（ms）
+    wall_s : 从启动进程池到全部 worker 构造完的墙钟时间（s，含进程启动和 import）
+    '''
+    start = time.perf_counter()
+    with mp.get_context("spawn").Pool(num_workers) as pool:
+        build_ms = np.array(pool.map(build_env, [scene] * num_workers)) * 1e3
+    return build_ms, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    num_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    snapshot = os.path.join(tempfile.mkdtemp(), "dofbot_scene.bullet")
+    templates = [
+        ("原始 URDF", SceneTemplate(hull_cache=False)),
+        ("凸包缓存", SceneTemplate()),
+        ("凸包缓存 + 无视觉", SceneTemplate(visual=False)),
+        ("+ .bullet 快照", SceneTemplate(snapshot_path=snapshot, visual=False)),
+    ]
+    for _, scene in templates:
+        scene.prepare()
+    build_env(templates[-1][1])  # 先存好快照
+
+    print(f"{num_workers} 个 worker 同时构造 DofbotEnv：")
+    for name, scene in templates:
+        build_ms, wall_s = measure(scene, num_workers)
+        print(f"  {name:<14s} 构造 平均 {build_ms.mean():6.1f} ms，最慢 {build_ms.max():6.1f} ms；"
+              f"全部就绪 {wall_s:.2f} s")
@@ -0,0 +1,123 @@
+"""
+碰撞查询：连杆对白名单一次算好，AABB 预筛后只对剩下的连杆对求最近点，发现碰撞即返回
+
+any_self_collision 原来对整台机器人调一次 getClosestPoints(bodyA=robot, bodyB=robot)，
+拿回所有连杆对的最近点后再在 Python 里过滤相邻连杆和夹爪；check_pairwise_collisions
+遍历有序物体对，同一对要查两次。这里的做法是：
+    1. 白名单：按 URDF 的父子关系去掉相邻连杆对，只保留关心的连杆（构造时算一次）
+    2. 预筛：逐个 getAABB，向外扩 safety_margin，numpy 一次判断所有候选对是否重叠
+    3. 精查：只对 AABB 重叠的连杆对调 getClosestPoints(linkIndexA, linkIndexB)，
+       按 AABB 重叠深度从大到小查，查到一对碰撞即返回
+    4. check_configurations：一次检查 N 组关节角（采集数据 / 规划时批量筛构型），查完恢复原状态
+    5. 物体之间：每个无序物体对只查一次，早退
+
+AABB 用 getAABB 现算（复位关节后立即有效）；getOverlappingObjects 读的是 broadphase 里
+上一次碰撞检测时的包围盒，复位关节后不会更新，所以这里不用它。
+"""
+import itertools
+
+import numpy as np
+import pybullet as p
+
+
+def _aabb_overlap(lo_a, hi_a, lo_b, hi_b):
+    """
+    (…,3) 包围盒两两是否重叠，返回 (overlap, depth)，depth 为三个轴上重叠长度的最小值
+    """
+    depth = np.minimum(hi_a, hi_b) - np.maximum(lo_a, lo_b)
+    depth = depth.min(axis=-1)
+    return depth >= 0.0, depth
+
+
+class SelfCollisionChecker:
+    def __init__(self, body, links=None, physicsClientId=0):
+        '''
+        :param body: 机器人 bodyUniqueId
+        :param links: 参与检查的连杆下标（-1 为基座）；None 时取全部连杆
+        :param physicsClientId: 机器人所在的仿真客户端
+        '''
+        self.body = body
+        self.physicsClient = physicsClientId
+        num_joints = p.getNumJoints(body, physicsClientId=physicsClientId)
+        self.links = list(range(-1, num_joints)) if links is None else list(links)
+        self.joints = [j for j in range(num_joints)
+                       if p.getJointInfo(body, j, physicsClientId=physicsClientId)[2] != p.JOINT_FIXED]
+
+        # 父子连杆（URDF 里由一个关节直接相连）不检查
+        parent = {j: p.getJointInfo(body, j, physicsClientId=physicsClientId)[16] for j in range(num_joints)}
+        index = {link: i for i, link in enumerate(self.links)}
+        pairs = [(a, b) for a, b in itertools.combinations(self.links, 2)
+                 if parent.get(a) != b and parent.get(b) != a]
+        self.pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        # 连杆对 → self.links 中的位置，预筛时直接按下标取包围盒
+        self._pair_index = np.array([[index[a], index[b]] for a, b in pairs], dtype=np.int64).reshape(-1, 2)
+
+    def link_aabbs(self):
+        '''
+        :return: lo, hi 均为 (len(links),3)
+        '''
+        boxes = np.array([p.getAABB(self.body, link, physicsClientId=self.physicsClient) for link in self.links])
+        return boxes[:, 0], boxes[:, 1]
+
+    def candidate_pairs(self, safety_margin=0.0):
+        '''
+        :return: (K,2) AABB（外扩 safety_margin）重叠的连杆对，按重叠深度从大到小
+        '''
+        lo, hi = self.link_aabbs()
+        pad = max(safety_margin, 0.0) / 2
+        i, j = self._pair_index[:, 0], self._pair_index[:, 1]
+        overlap, depth = _aabb_overlap(lo[i] - pad, hi[i] + pad, lo[j] - pad, hi[j] + pad)
+        order = np.argsort(-depth[overlap], kind="stable")
+        return self.pairs[overlap][order]
+
+    def in_collision(self, safety_margin=0.0):
+        '''
+        :param safety_margin: 允许的最小距离，<0 表示允许轻微穿透
+        :return: 白名单里是否有一对连杆距离小于 safety_margin
+        '''
+        for a, b in self.candidate_pairs(safety_margin):
+            if p.getClosestPoints(self.body, self.body, safety_margin, int(a), int(b),
+                                  physicsClientId=self.physicsClient):
+                return True
+        return False
+
+    def colliding_pairs(self, safety_margin=0.0):
+        '''
+        与 in_collision 相同，但查完全部候选对，返回所有碰撞的连杆对（调试用）
+        '''
+        return [(int(a), int(b)) for a, b in self.candidate_pairs(safety_margin)
+                if p.getClosestPoints(self.body, self.body, safety_margin, int(a), int(b),
+                                      physicsClientId=self.physicsClient)]
+
+    def check_configurations(self, qs, joints=None, safety_margin=0.0):
+        '''
+        依次把关节复位到 qs 的每一行并检查自碰撞，查完恢复调用前的仿真状态
+        :param qs: (N, len(joints)) 关节角
+        :param joints: qs 各列对应的关节下标；None 时取全部非固定关节的前 qs.shape[1] 个
+        :return: (N,) bool，True 表示该组关节角自碰撞
+        '''
+        qs = np.atleast_2d(np.asarray(qs, dtype=np.float64))
+        joints = self.joints[:qs.shape[1]] if joints is None else list(joints)
+        state = p.saveState(physicsClientId=self.physicsClient)
+        try:
+            result = np.zeros(len(qs), dtype=bool)
+            for n, q in enumerate(qs):
+                p.resetJointStatesMultiDof(self.body, joints, [[x] for x in q], physicsClientId=self.physicsClient)
+                result[n] = self.in_collision(safety_margin)
+        finally:
+            p.restoreState(state, physicsClientId=self.physicsClient)
+            p.removeState(state, physicsClientId=self.physicsClient)
+        return result
+
+
+def any_pairwise_collision(bodies, distance=0.0, physicsClientId=0):
+    '''
+    物体之间是否有碰撞：每个无序物体对只查一次，发现碰撞即返回
+    这里不做 AABB 预筛：多连杆物体要逐个连杆 getAABB 才能拼出包围盒，
+    调用次数比省下的 getClosestPoints 还多（getClosestPoints 内部本身先比包围盒）
+    :param distance: 距离小于该值即视为碰撞
+    '''
+    for body_a, body_b in itertools.combinations(bodies, 2):
+        if p.getClosestPoints(bodyA=body_a, bodyB=body_b, distance=distance, physicsClientId=physicsClientId):
+            return True
+    return False
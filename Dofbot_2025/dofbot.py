@@ -1,9 +1,59 @@
+import collections
+import functools
+import inspect
 import time
 
 import pybullet as p
 import numpy as np
 from scipy.spatial.transform import Rotation as R
 
+from utils_kine.utils_ik_cache import IKCache
+from utils_kine.utils_ik_multi import ik_nearest
+from utils_kine.utils_pose import mean_link_pose
+from utils_kine.utils_sim_model import SIM_MODEL, sim_tool
+from scene_cache import SceneTemplate
+from collision_query import SelfCollisionChecker, any_pairwise_collision
+
+class BulletClient:
+    '''
+    把 physicsClientId 自动绑定到每个 pybullet 函数上，用法同 pybullet_utils.bullet_client：
+        self._p = BulletClient(client_id); self._p.stepSimulation()
+    只包装已有连接，不负责连接 / 断开（采集 worker 等外部代码自行管理连接）
+    '''
+
+    def __init__(self, physicsClientId=0):
+        self._client = physicsClientId
+
+    def __getattr__(self, name):
+        attribute = getattr(p, name)
+        if inspect.isbuiltin(attribute):
+            attribute = functools.partial(attribute, physicsClientId=self._client)
+        setattr(self, name, attribute)  # 之后直接命中实例属性，不再经过 __getattr__
+        return attribute
+
+
+class CountingBulletClient(BulletClient):
+    '''
+    统计经由本客户端发出的 pybullet 调用次数（self.calls 按函数名计数），用于对比接口开销
+    '''
+
+    def __init__(self, physicsClientId=0):
+        super().__init__(physicsClientId)
+        self.calls = collections.Counter()
+
+    def __getattr__(self, name):
+        attribute = super().__getattr__(name)
+        if callable(attribute):
+            function = attribute
+
+            def attribute(*args, **kwargs):
+                self.calls[name] += 1
+                return function(*args, **kwargs)
+
+            setattr(self, name, attribute)
+        return attribute
+
+
 class Observation:
     def __init__(self, pos=None, orn = None, euler=None):
         self.pos = pos
@@ -12,7 +62,9 @@ class Observation:
 
 
 class dofbot:
-    def __init__(self, urdfPath):
+    def __init__(self, urdfPath, physicsClientId=0, flags=0):
+        self.physicsClient = physicsClientId
+        self._p = BulletClient(physicsClientId)
         # # upper limits for null space
         self.ll = [-np.pi, 0, 0, 0, 0]
         # upper limits for null space
@@ -22,24 +74,34 @@ class dofbot:
         self.jr = [np.pi * 2.0, np.pi, np.pi, np.pi, np.pi]
         # rest poses for null space
         self.rp = [np.pi / 2.0, np.pi / 2.0, np.pi / 2.0, np.pi / 2.0, np.pi / 2.0]
+        # 同一目标位姿只求一次逆解；修改 ll/ul/jr/rp 后需调用 self.ik_cache.invalidate()
+        self.ik_cache = IKCache(self._calculateInverseKine)
+        # "pybullet": 原有的三次 calculateInverseKinematics；
+        # "model": 仿真 MDH 模型上求全部候选解，取离当前构型最近的一组（失败时回退到 pybullet）；
+        #          最近构型只在缓存未命中时挑选
+        self.ik_method = "pybullet"
 
         self.maxForce = 200.
         self.fingerAForce = 2.5
         self.fingerBForce = 2.5
         self.fingerTipForce = 2
 
-        self.dofbotUid = p.loadURDF(urdfPath,baseOrientation =p.getQuaternionFromEuler([0, 0, 0]), useFixedBase=True)
+        self.dofbotUid = self._p.loadURDF(urdfPath,baseOrientation =self._p.getQuaternionFromEuler([0, 0, 0]), useFixedBase=True,
+                                          flags=flags)
         # self.numJoints = p.getNumJoints(self.dofbotUid)
         self.numJoints = 5
         self.gripper_joints = [5, 6, 7, 8, 9, 10]
+        self.arm_joints = list(range(self.numJoints))
+        # 两个指尖 link，末端位姿取二者均值
+        self.ee_links = [6, 8]
 
         self.jointStartPositions = [1.57, 1.57, 1.57, 1.57, 1.57]
         self.gripperAngle = 0.0
 
         self.motorIndices = []
         for jointIndex in range(self.numJoints):
-            p.resetJointState(self.dofbotUid, jointIndex, self.jointStartPositions[jointIndex])
-            qIndex = p.getJointInfo(self.dofbotUid, jointIndex)[3]
+            self._p.resetJointState(self.dofbotUid, jointIndex, self.jointStartPositions[jointIndex])
+            qIndex = self._p.getJointInfo(self.dofbotUid, jointIndex)[3]
             if qIndex > -1:
                 self.motorIndices.append(jointIndex)
 
@@ -47,42 +109,51 @@ class dofbot:
 
         self.gripperStartAngle = 0.0
         for i, jointIndex in enumerate(self.gripper_joints):
-            p.resetJointState(self.dofbotUid, jointIndex, self.gripperStartAngle)
+            self._p.resetJointState(self.dofbotUid, jointIndex, self.gripperStartAngle)
 
         # 允许 self-collision
-        for i in range(p.getNumJoints(self.dofbotUid)):
-            p.setCollisionFilterGroupMask(self.dofbotUid, i,
+        for i in range(self._p.getNumJoints(self.dofbotUid)):
+            self._p.setCollisionFilterGroupMask(self.dofbotUid, i,
                                           collisionFilterGroup=1,
                                           collisionFilterMask=1)
         # 让相邻连杆之间也产生碰撞（可选，视 URDF 具体关节类型而定）
-        p.setCollisionFilterPair(self.dofbotUid, self.dofbotUid,
+        self._p.setCollisionFilterPair(self.dofbotUid, self.dofbotUid,
                                  linkIndexA=-1, linkIndexB=0, enableCollision=1)
+        # 自碰撞检查器（连杆对白名单）随本实例存活，第一次用到时再建
+        self._self_checker = None
 
-
+        # get_pose 的单步缓存：stepSimulation / 复位关节后须调用 invalidate_pose
+        self._pose = None
         self.endEffectorPos = []
         self.endEffectorOrn = []
         self.endEffectorEuler = []
         self.endEffectorPos, self.endEffectorOrn, self.endEffectorEuler = self.get_pose()
 
-    def reset(self):
+    def reset(self, reset_joints=True):
+        '''
+        :param reset_joints: False 时只同步 Python 侧状态（env 已用 restoreState 整体恢复了关节）
+        '''
         self.gripperAngle = 0.0
-        for jointIndex in range(self.numJoints):
-            p.resetJointState(self.dofbotUid, jointIndex, self.jointStartPositions[jointIndex])
-        for i, jointIndex in enumerate(self.gripper_joints):
-            p.resetJointState(self.dofbotUid, jointIndex, self.gripperAngle)
+        if reset_joints:
+            # 臂 + 夹爪共 11 个关节一次复位（速度同时清零）
+            targetValues = [[q] for q in self.jointStartPositions] + [[self.gripperAngle]] * len(self.gripper_joints)
+            self._p.resetJointStatesMultiDof(self.dofbotUid, self.arm_joints + self.gripper_joints, targetValues)
+        self.invalidate_pose()
         self.jointPositions = self.get_jointPoses()
         self.endEffectorPos, self.endEffectorOrn, self.endEffectorEuler = self.get_pose()
 
     def forwardKinematic(self,jointPoses):
-        for i in range(self.numJoints):
-            p.resetJointState(self.dofbotUid,
-                              jointIndex=i,targetValue=jointPoses[i],targetVelocity=0)
+        self._p.resetJointStatesMultiDof(self.dofbotUid, self.arm_joints,
+                                         [[q] for q in jointPoses[:self.numJoints]])
+        self.invalidate_pose()
         return self.get_pose()
 
 
     def joint_control(self,jointPoses):
-        for i in range(self.numJoints):
-            p.setJointMotorControl2(bodyUniqueId=self.dofbotUid, jointIndex=i, controlMode=p.POSITION_CONTROL,
+        # 臂关节逐个下发：只有 setJointMotorControl2 的 maxVelocity 真正生效，
+        # Array / MultiDofArray 版本都会忽略速度上限
+        for i in self.arm_joints:
+            self._p.setJointMotorControl2(bodyUniqueId=self.dofbotUid, jointIndex=i, controlMode=self._p.POSITION_CONTROL,
                                     targetPosition=jointPoses[i], targetVelocity=0, force=200,
                                     maxVelocity=1.0, positionGain=0.3, velocityGain=1)
         # self.jointPositions, self.gripperAngle = self.get_jointPoses()
@@ -90,58 +161,83 @@ class dofbot:
         # return self.endEffectorPos, self.endEffectorOrn, self.endEffectorEuler
 
     def setInverseKine(self, pos, orn):
-        if orn == None:
-            jointPoses1 = p.calculateInverseKinematics(self.dofbotUid, 6, pos,
+        # 两种逆解都依赖夹爪角度（指尖连杆 6 / 8 的位置、sim_tool 的工具偏置），夹爪角度并入缓存键
+        return list(self.ik_cache(pos, orn, context=self.gripperAngle)), self.gripperAngle
+
+    def _calculateInverseKine(self, pos, orn):
+        if self.ik_method == "model":
+            jointPoses, ok = self._modelInverseKine(pos, orn)
+            if ok:
+                return list(jointPoses)
+
+        if orn is None:
+            jointPoses1 = self._p.calculateInverseKinematics(self.dofbotUid, 6, pos,
                                                       self.ll, self.ul, self.jr, self.rp)
-            jointPoses2 = p.calculateInverseKinematics(self.dofbotUid, 8, pos,
+            jointPoses2 = self._p.calculateInverseKinematics(self.dofbotUid, 8, pos,
                                                       self.ll, self.ul, self.jr, self.rp)
             jointPoses = [(x + y) / 2 for x, y in zip(jointPoses1, jointPoses2)]
-            jointPoses3 = p.calculateInverseKinematics(self.dofbotUid, 4, pos,
+            jointPoses3 = self._p.calculateInverseKinematics(self.dofbotUid, 4, pos,
                                                       self.ll, self.ul, self.jr, self.rp)
             jointPoses[self.numJoints - 1] = jointPoses3[self.numJoints - 1]
         else:
-            jointPoses1 = p.calculateInverseKinematics(self.dofbotUid, 6, pos, orn,
+            jointPoses1 = self._p.calculateInverseKinematics(self.dofbotUid, 6, pos, orn,
                                                       self.ll, self.ul, self.jr, self.rp)
-            jointPoses2 = p.calculateInverseKinematics(self.dofbotUid, 8, pos, orn,
+            jointPoses2 = self._p.calculateInverseKinematics(self.dofbotUid, 8, pos, orn,
                                                       self.ll, self.ul, self.jr, self.rp)
             jointPoses = [(x + y) / 2 for x, y in zip(jointPoses1, jointPoses2)]
-            jointPoses3 = p.calculateInverseKinematics(self.dofbotUid, 4, pos,
+            jointPoses3 = self._p.calculateInverseKinematics(self.dofbotUid, 4, pos,
                                                        self.ll, self.ul, self.jr, self.rp)
             jointPoses[self.numJoints - 1] = jointPoses3[self.numJoints - 1]
 
-        return jointPoses[:self.numJoints], self.gripperAngle
+        return jointPoses[:self.numJoints]
+
+    def _modelInverseKine(self, pos, orn):
+        '''
+        在仿真 MDH 模型上一次求出全部候选解，按离当前关节角最近、远离限位选一组
+        orn 为 None 时只约束位置
+        经 ik_cache 调用时只有未命中才会走到这里：命中时返回第一次求解时离当时构型最近的解，
+        不会按调用时的关节角重新挑选
+        '''
+        T = np.eye(4)
+        T[:3, 3] = pos
+        if orn is not None:
+            T[:3, :3] = R.from_quat(orn).as_matrix()
+        mask = [1, 1, 1, 0, 0, 0] if orn is None else None
+        kine = dict(SIM_MODEL, tool=sim_tool(self.gripperAngle), ll=np.array(self.ll), ul=np.array(self.ul))
+        return ik_nearest(T, self.get_jointPoses()[0], mask=mask, **kine)
 
     def get_jointPoses(self):
-        jointPoses= []
-        for i in range(self.numJoints+1):
-            state = p.getJointState(self.dofbotUid, i)
-            jointPoses.append(state[0])
-        return jointPoses[:self.numJoints], self.gripperAngle
+        '''
+        :return: (5,) np.ndarray 关节角，夹爪角度
+        '''
+        states = self._p.getJointStates(self.dofbotUid, self.arm_joints)
+        return np.array([state[0] for state in states]), self.gripperAngle
+
+    def get_qvel(self):
+        '''
+        :return: (5,) np.ndarray 关节速度
+        '''
+        states = self._p.getJointStates(self.dofbotUid, self.arm_joints)
+        return np.array([state[1] for state in states])
 
     def get_pose(self):
-        # 1. 收集 6 个 link 的位姿
-        indices = [6, 8]
-        positions = []
-        quaternions = []
-
-        for idx in indices:
-            link_state = p.getLinkState(self.dofbotUid, idx)
-            positions.append(np.array(link_state[0]))
-            quaternions.append(np.array(link_state[1]))
-
-        # 2. 平均位置
-        avg_pos = np.mean(positions, axis=0)
-
-        # 3. 平均朝向（四元数）
-        rotations = R.from_quat(quaternions)  # scipy 自动归一化
-        avg_rot = rotations.mean()
-        avg_orn = avg_rot.as_quat()  # [x,y,z,w] 格式
-
-        # 现在 avg_pos 和 avg_orn 就是“夹爪”整体的均值位姿
-        pos = avg_pos
-        orn = avg_orn
-        euler = p.getEulerFromQuaternion(orn)
-        return pos, orn, euler
+        '''
+        两个指尖 link 的均值位姿，即“夹爪”整体位姿；同一仿真步内重复调用直接返回缓存
+        :return: pos (3,)，orn (4,) [x,y,z,w]，euler；pos / orn 为只读数组，每步一份新缓冲
+        '''
+        if self._pose is None:
+            (pos_a, orn_a, *_), (pos_b, orn_b, *_) = self._p.getLinkStates(self.dofbotUid, self.ee_links)
+            # 缓冲不跨步复用：调用方可能持有上一步的 pos（如采集脚本比较前后两步）
+            buf = mean_link_pose(pos_a, orn_a, pos_b, orn_b, np.empty(7))
+            buf.flags.writeable = False
+            self._pose = buf[:3], buf[3:], self._p.getEulerFromQuaternion(buf[3:])
+        return self._pose
+
+    def invalidate_pose(self):
+        '''
+        仿真步进或直接改写关节状态后调用，下一次 get_pose 重新读取
+        '''
+        self._pose = None
 
         # state = p.getLinkState(self.dofbotUid, 4)
         # pos = state[0]
@@ -154,45 +250,31 @@ class dofbot:
         pos, orn, euler = self.get_pose()
         return Observation(pos, orn, euler)
 
-    def gripper_control(self, gripperAngle):
+    def self_collision_checker(self):
+        '''
+        :return: 本机器人的 SelfCollisionChecker，只建一次
+        '''
+        if self._self_checker is None:
+            self._self_checker = self_collision_checker(self.dofbotUid, self.physicsClient)
+        return self._self_checker
 
-        p.setJointMotorControl2(self.dofbotUid,
-                                5,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerAForce)
-        p.setJointMotorControl2(self.dofbotUid,
-                                6,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerBForce)
-        p.setJointMotorControl2(self.dofbotUid,
-                                7,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerAForce)
-        p.setJointMotorControl2(self.dofbotUid,
-                                8,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerBForce)
-        p.setJointMotorControl2(self.dofbotUid,
-                                9,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerAForce)
-        p.setJointMotorControl2(self.dofbotUid,
-                                10,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerBForce)
+    def gripper_control(self, gripperAngle):
+        # 关节 5~10 依次为 A、B、A、B、A、B 指，一次下发
+        self._p.setJointMotorControlArray(self.dofbotUid,
+                                          self.gripper_joints,
+                                          self._p.POSITION_CONTROL,
+                                          targetPositions=[gripperAngle] * len(self.gripper_joints),
+                                          forces=[self.fingerAForce, self.fingerBForce] * 3)
 
         self.gripperAngle = gripperAngle
 
 
 class Object:
-    def __init__(self, urdfPath, block, num):
-        self.id = p.loadURDF(urdfPath)
+    def __init__(self, urdfPath, block, num, physicsClientId=0, flags=0):
+        self.physicsClient = physicsClientId
+        self._p = BulletClient(physicsClientId)
+        self.urdfPath = urdfPath
+        self.id = self._p.loadURDF(urdfPath, flags=flags)
         self.half_height = 0.015 if block else 0.0745
         self.num = num
         self.size = self._get_size()  # 自己实现的函数，返回 [x, y, z] 半尺寸
@@ -200,19 +282,19 @@ class Object:
     def reset(self):
 
         if self.num==1:
-            p.resetBasePositionAndOrientation(self.id,
+            self._p.resetBasePositionAndOrientation(self.id,
                                          np.array([ 0.20, 0.1,
                                                    self.half_height]),
-                                        p.getQuaternionFromEuler([0, 0,np.pi/6]))
+                                        self._p.getQuaternionFromEuler([0, 0,np.pi/6]))
         else:
-            p.resetBasePositionAndOrientation(self.id,
+            self._p.resetBasePositionAndOrientation(self.id,
                                          np.array([ 0.2, -0.1,
                                                    0.005]),
-                                        p.getQuaternionFromEuler([0, 0,0]))
+                                        self._p.getQuaternionFromEuler([0, 0,0]))
 
     def getObservation(self):
-        pos, orn = p.getBasePositionAndOrientation(self.id)
-        euler = p.getEulerFromQuaternion(orn)
+        pos, orn = self._p.getBasePositionAndOrientation(self.id)
+        euler = self._p.getEulerFromQuaternion(orn)
         return Observation(pos, orn, euler)
 
     def _get_size(self):
@@ -221,15 +303,15 @@ class Object:
         如果视觉和碰撞都有 box，优先用碰撞。
         """
         # 1. 先拿碰撞形状
-        n_col = p.getCollisionShapeData(self.id, -1)  # base link
-        if n_col and n_col[0][2] == p.GEOM_BOX:  # [0][2] == shapeType
+        n_col = self._p.getCollisionShapeData(self.id, -1)  # base link
+        if n_col and n_col[0][2] == self._p.GEOM_BOX:  # [0][2] == shapeType
             return list(n_col[0][3])  # [0][3] == halfExtents
 
         # 2. 没有就遍历所有 link 的碰撞形状
-        for link_id in range(-1, p.getNumJoints(self.id)):  # -1 代表 base
-            col_info = p.getCollisionShapeData(self.id, link_id)
+        for link_id in range(-1, self._p.getNumJoints(self.id)):  # -1 代表 base
+            col_info = self._p.getCollisionShapeData(self.id, link_id)
             for info in col_info:
-                if info[2] == p.GEOM_BOX:
+                if info[2] == self._p.GEOM_BOX:
                     return list(info[3])  # halfExtents
 
         # 3. 碰撞没有就找视觉形状（视觉形状没有 halfExtents 接口，只能解析 URDF）
@@ -237,63 +319,97 @@ class Object:
         raise RuntimeError("未找到任何 box 几何体，无法自动获取 size")
 
     def pos_and_orn(self):
-        pos, orn = p.getBasePositionAndOrientation(self.id)
-        euler = p.getEulerFromQuaternion(orn)
+        pos, orn = self._p.getBasePositionAndOrientation(self.id)
+        euler = self._p.getEulerFromQuaternion(orn)
         return pos, orn, euler
 
 
-def any_self_collision(robot_uid, safety_margin=0.0):
+def self_collision_checker(robot_uid, physicsClientId=0):
+    """
+    新建连杆对白名单：基座 + 5 个臂连杆中不相邻的连杆对，夹爪连杆（下标 >= 5）不查
+    不做全局缓存（pybullet 会复用 body / client 编号）；需要反复检查时用 dofbot.self_collision_checker()
+    """
+    return SelfCollisionChecker(robot_uid, links=range(-1, 5), physicsClientId=physicsClientId)
+
+
+def any_self_collision(robot_uid, safety_margin=0.0, physicsClientId=0, checker=None):
     """
     返回 True  ->  机器人内部至少有一对连杆发生碰撞
     safety_margin：允许的最小距离，<0 表示允许轻微穿透
+    physicsClientId：机器人所在的仿真客户端
+    checker：已建好的 SelfCollisionChecker（如 env._dofbot.self_collision_checker()），None 时临时新建
     """
-    pts = p.getClosestPoints(bodyA=robot_uid, bodyB=robot_uid,
-                             distance=safety_margin,
-                             physicsClientId=0)
-    # 过滤掉“连杆自己跟自己”或“固定关节父-子”产生的无效点对
-    for pt in pts:
-        # pt[3] 是 linkIndexA，pt[4] 是 linkIndexB
-        if pt[3] == pt[4]:
-            continue          # 同一个几何体
-        if abs(pt[3] - pt[4]) == 1:
-            continue          # base->link0 是固定关节，通常不视为碰撞
-        if pt[3] >= 5 or pt[4] >= 5:
-            continue
-        # 如果有其他“相邻连杆”也不需要检测，在这里继续过滤
-        return True
-    return False
-
-
-def check_pairwise_collisions(bodies):
-    for body1 in bodies:
-        for body2 in bodies:
-            if body1 != body2 and \
-                    len(p.getClosestPoints(bodyA=body1, bodyB=body2, distance=0., physicsClientId=0)) != 0:
-                return True
-    return False
+    if checker is None:
+        checker = self_collision_checker(robot_uid, physicsClientId)
+    return checker.in_collision(safety_margin)
+
+
+def check_pairwise_collisions(bodies, physicsClientId=0):
+    return any_pairwise_collision(bodies, physicsClientId=physicsClientId)
 
 
 class DofbotEnv:
-    def __init__(self, physicsClientId=None):
+    def __init__(self, physicsClientId=None, headless=None, realtime_factor=None, scene=None):
+        '''
+        :param physicsClientId: 外部已连接的客户端；None 时自行连接（headless 为 DIRECT，否则 GUI）
+        :param headless: True 时跳过相机、滑动条、调试文字等所有 GUI 调用；
+                         None 时按连接方式自动判断（未传客户端视为 GUI）
+        :param realtime_factor: 仿真节奏，1.0 = 实时，N = N 倍实时，0 = 不等待、尽快运行；
+                                None 时 GUI 下取 1.0、无界面取 0
+        :param scene: scene_cache.SceneTemplate，决定 URDF 怎么加载（凸包缓存、.bullet 快照）；
+                      None 时用默认模板（凸包缓存，不读写快照）
+        '''
+        build_start = time.perf_counter()
         self._timeStep = 0.001
         # 如果外部已经连好，直接用；否则默认老行为（兼容旧代码）
+        self._owns_client = physicsClientId is None
         if physicsClientId is None:
-            self.physicsClient = p.connect(p.GUI)
+            self.physicsClient = p.connect(p.DIRECT if headless else p.GUI)
         else:
             self.physicsClient = physicsClientId
-        p.resetDebugVisualizerCamera(1.0, 90, -40, [0, 0, 0])
-        p.setPhysicsEngineParameter(numSolverIterations=150)
-        p.setTimeStep(self._timeStep)
-        p.setGravity(0, 0, -9.8)
-
-
-        p.loadURDF("models/floor.urdf", [0, 0, -0.625], useFixedBase=True)
-        p.loadURDF("models/table_collision/table.urdf", [0.5, 0, -0.625],p.getQuaternionFromEuler([0, 0, 0]),
-                   useFixedBase=True)
-        self._dofbot = dofbot("models/dofbot_urdf_with_gripper/dofbot_with_gripper.urdf")
-        self._object1 = Object("models/box_green.urdf", block=True, num=1)
-        self._object2 = Object("models/box_purple.urdf", block=True, num=2)
-
+        # 之后所有 pybullet 调用都经 self._p 发往本环境自己的客户端，同一进程可并存多个环境
+        self._p = BulletClient(self.physicsClient)
+        if headless is None:
+            headless = self._p.getConnectionInfo()["connectionMethod"] == p.DIRECT
+        self.headless = headless
+        if realtime_factor is None:
+            realtime_factor = 0.0 if headless else 1.0
+        self.realtime_factor = realtime_factor
+        self._next_tick = time.perf_counter()
+
+        if not self.headless:
+            self._p.resetDebugVisualizerCamera(1.0, 90, -40, [0, 0, 0])
+        # deterministicOverlappingPairs：broadphase 碰撞对按固定顺序求解，恢复快照后同样的指令序列得到逐位相同的结果
+        # （否则碰撞对顺序取决于之前的仿真历史；episode_log 的逐位回放依赖这一点，开销在测量误差内）
+        self._p.setPhysicsEngineParameter(numSolverIterations=150, deterministicOverlappingPairs=1)
+        self._p.setTimeStep(self._timeStep)
+        self._p.setGravity(0, 0, -9.8)
+
+
+        self._scene = scene if scene is not None else SceneTemplate()
+        self._scene.load_urdf(self._p, "models/floor.urdf", [0, 0, -0.625], useFixedBase=True)
+        self._scene.load_urdf(self._p, "models/table_collision/table.urdf", [0.5, 0, -0.625],
+                              self._p.getQuaternionFromEuler([0, 0, 0]), useFixedBase=True)
+        self._dofbot = dofbot(self._scene.resolve("models/dofbot_urdf_with_gripper/dofbot_with_gripper.urdf"),
+                              self.physicsClient, flags=self._scene.urdf_flags)
+        self._object1 = Object(self._scene.resolve("models/box_green.urdf"), block=True, num=1,
+                               physicsClientId=self.physicsClient, flags=self._scene.urdf_flags)
+        self._object2 = Object(self._scene.resolve("models/box_purple.urdf"), block=True, num=2,
+                               physicsClientId=self.physicsClient, flags=self._scene.urdf_flags)
+
+
+        self._objects = [self._object1, self._object2]
+        # 初始状态快照：第一次 reset 时 saveState，之后一次 restoreState 恢复
+        self._reset_state = None
+        self._reset_object_poses = None
+        # 每个仿真步之后依次调用（录像等），见 add_step_hook
+        self._step_hooks = []
+        # 每条控制指令下发前依次调用（回合录制等），见 add_control_hook
+        self._control_hooks = []
+        # 模板里有 .bullet 快照时直接恢复成第一次复位后的状态，第一次 reset 不再逐个复位
+        if self._scene.restore(self._p):
+            self._dofbot.reset(reset_joints=False)
+            self._remember_reset_state()
 
         self.target_pos = np.array([0.2, -0.1, 0.015])
         # # 创建红色目标球（无碰撞，仅视觉）
@@ -327,21 +443,30 @@ class DofbotEnv:
         #     basePosition=self.end_effector_pos  # 放在目标位置
         # )
 
-        # === 新增：创建滑动条控制关节和夹爪 ===
         self.sliders = []
+        self.ee_text_ids = []  # 每帧用来更新文字的句柄
+        self.end_effector_arrow_id = None
+        self.object_arrow_id = None
+        self.control_mode = 1
+        if not self.headless:
+            self._create_debug_items()
+        # 构造耗时（s），多进程采集时用来对比有无场景缓存
+        self.build_time = time.perf_counter() - build_start
+
+    def _create_debug_items(self):
+        # === 新增：创建滑动条控制关节和夹爪 ===
         joint_names = ["Joint1", "Joint2", "Joint3", "Joint4", "Joint5"]
         for i in range(5):
-            slider = p.addUserDebugParameter(joint_names[i],
+            slider = self._p.addUserDebugParameter(joint_names[i],
                                              self._dofbot.ll[i],
                                              self._dofbot.ul[i],
                                              self._dofbot.rp[i])
             self.sliders.append(slider)
-        self.gripper_slider = p.addUserDebugParameter("Gripper", -1.0, 1.0, 0.0)
+        self.gripper_slider = self._p.addUserDebugParameter("Gripper", -1.0, 1.0, 0.0)
 
         # 添加控制模式滑动条：0 = Joint Control, 1 = EE Pose Control
-        self.control_mode_slider = p.addUserDebugParameter("Control_Mode(0=Joint,1=EE)", 0, 1, 0)
+        self.control_mode_slider = self._p.addUserDebugParameter("Control_Mode(0=Joint,1=EE)", 0, 1, 0)
 
-        self.ee_text_ids = []  # 每帧用来更新文字的句柄
         text_pos = [0.5, 0.05, 0.6]  # 左上角，按自己视角调
         text_quat = [0.5, 0.05, 0.5]  # 左上角，按自己视角调
         text_euler = [0.5, 0.05, 0.4]  # 左上角，按自己视角调
@@ -352,11 +477,62 @@ class DofbotEnv:
         self.ee_text_ids.append(self._make_item("EE quat:  waiting...", text_quat, [0, 1, 0]))
         self.ee_text_ids.append(self._make_item("EE euler: waiting...", text_euler, [0, 0, 1]))
 
-        self.end_effector_arrow_id = None
+    def _step_simulation(self):
+        '''
+        步进一次仿真，同时让机器人的位姿缓存失效
+        '''
+        self._p.stepSimulation()
+        self._dofbot.invalidate_pose()
+        for hook in self._step_hooks:
+            hook()
 
-        self.object_arrow_id = None
+    def add_step_hook(self, hook):
+        '''
+        :param hook: 无参可调用对象，每个仿真步之后调用一次（video_recorder 用它按步长抽帧）
+        '''
+        self._step_hooks.append(hook)
 
-        self.control_mode = 1
+    def remove_step_hook(self, hook):
+        self._step_hooks.remove(hook)
+
+    def add_control_hook(self, hook):
+        '''
+        :param hook: hook(forward, jointPoses, gripperAngle)，dofbot_control / dofbot_forward_control
+                     下发指令前调用，forward 为 True 表示后者（直接改写关节角）
+                     （episode_log 用它记下每步的指令，不必替换 env 的方法）
+        '''
+        self._control_hooks.append(hook)
+
+    def remove_control_hook(self, hook):
+        self._control_hooks.remove(hook)
+
+    def enable_profiler(self, profiler):
+        '''
+        给热路径插桩（见 profiler.py）：env / 机器人 / 物体的 pybullet 调用按函数归类计时，
+        关键方法按阶段计时；不调用本方法时没有任何额外开销，profiler.detach() 撤销
+        '''
+        for owner in [self, self._dofbot] + self._objects:
+            profiler.instrument_client(owner)
+        profiler.instrument(self, {"dofbot_control": "env.control", "dofbot_forward_control": "env.control",
+                                   "reset": "env.reset", "reward": "env.reward",
+                                   "update_arrow_display": "env.debug", "_update_ee_text_window": "env.debug"})
+        profiler.instrument(self._dofbot, {"setInverseKine": "ik", "get_pose": "pose", "get_jointPoses": "pose",
+                                           "joint_control": "motor", "gripper_control": "motor"})
+        return profiler
+
+    def _pace(self):
+        '''
+        按 realtime_factor 控制节奏：等到本步的截止时刻再返回，
+        计算本身已经超时则不再等待（也不累积欠账）
+        '''
+        if not self.realtime_factor or self.realtime_factor <= 0:
+            return
+        self._next_tick += self._timeStep / self.realtime_factor
+        delay = self._next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self._next_tick = time.perf_counter()
 
     def update_arrow_display(self, pos, orn):
         arrow_start = pos
@@ -365,29 +541,29 @@ class DofbotEnv:
         arrow_length = 0.05
 
         # 分别旋转单位向量 [1,0,0], [0,1,0], [0,0,1]（分别对应 X, Y, Z）
-        x_dir = p.multiplyTransforms([0, 0, 0], orn, [arrow_length, 0, 0], [0, 0, 0, 1])[0]
-        y_dir = p.multiplyTransforms([0, 0, 0], orn, [0, arrow_length, 0], [0, 0, 0, 1])[0]
-        z_dir = p.multiplyTransforms([0, 0, 0], orn, [0, 0, arrow_length], [0, 0, 0, 1])[0]
+        x_dir = self._p.multiplyTransforms([0, 0, 0], orn, [arrow_length, 0, 0], [0, 0, 0, 1])[0]
+        y_dir = self._p.multiplyTransforms([0, 0, 0], orn, [0, arrow_length, 0], [0, 0, 0, 1])[0]
+        z_dir = self._p.multiplyTransforms([0, 0, 0], orn, [0, 0, arrow_length], [0, 0, 0, 1])[0]
 
         arrow_end_x = [arrow_start[i] + x_dir[i] for i in range(3)]
         arrow_end_y = [arrow_start[i] + y_dir[i] for i in range(3)]
         arrow_end_z = [arrow_start[i] + z_dir[i] for i in range(3)]
 
         arrow_items = []
-        arrow_items.append(p.addUserDebugLine(
+        arrow_items.append(self._p.addUserDebugLine(
             arrow_start, arrow_end_x, [1, 0, 0], lineWidth=3, lifeTime=0
         ))
-        arrow_items.append(p.addUserDebugLine(
+        arrow_items.append(self._p.addUserDebugLine(
             arrow_start, arrow_end_y, [0, 1, 0], lineWidth=3, lifeTime=0
         ))
-        arrow_items.append(p.addUserDebugLine(
+        arrow_items.append(self._p.addUserDebugLine(
             arrow_start, arrow_end_z, [0, 0, 1], lineWidth=3, lifeTime=0
         ))
 
         return arrow_items
 
     def _make_item(self, text, text_pos, rgb):
-        return p.addUserDebugText(text, text_pos,
+        return self._p.addUserDebugText(text, text_pos,
                                   textColorRGB=rgb,
                                   textSize=0.5,
                                   lifeTime=self._timeStep)  # 0.1 s 后自动消失，下一帧再写
@@ -404,19 +580,83 @@ class DofbotEnv:
 
         # 删掉旧文字，写新文字
         for i in range(3):
-            p.removeUserDebugItem(self.ee_text_ids[i])
-            self.ee_text_ids[i] = p.addUserDebugText(
+            self._p.removeUserDebugItem(self.ee_text_ids[i])
+            self.ee_text_ids[i] = self._p.addUserDebugText(
                 new_txt[i],
                 [-0.50, 0.30, 0.7 - i * 0.05],
                 textColorRGB=rgb[i],
                 textSize=1.2,
                 lifeTime=0.1)
 
-    def reset(self):
+    def reset(self, object_poses=None):
+        '''
+        第一次调用逐个复位物块和机械臂、步进一次后用 saveState 存下快照，之后一次 restoreState 恢复
+        :param object_poses: 可选，与 self._objects 对应的 [(pos, orn), ...]，恢复快照后再摆放物块；
+                             随机摆放可用 sample_object_poses 生成
+        '''
+        self._reset_snapshot()
+        if object_poses is not None:
+            self._place_objects(object_poses)
+
+    def _reset_full(self):
+        '''
+        逐个复位物块和机械臂并步进一次（生成快照时使用）
+        '''
         self._object1.reset()
         self._object2.reset()
         self._dofbot.reset()
-        p.stepSimulation()
+        self._step_simulation()
+
+    def _reset_snapshot(self):
+        '''
+        第一次调用走 _reset_full 并用 saveState 存下快照，之后一次 restoreState 恢复
+        '''
+        if self._reset_state is None:
+            self._reset_full()
+            self._remember_reset_state()
+            self._scene.save(self._p)
+        else:
+            self._p.restoreState(self._reset_state)
+            self._dofbot.reset(reset_joints=False)
+
+    def _remember_reset_state(self):
+        '''
+        把当前状态记为复位快照
+        '''
+        self._reset_state = self._p.saveState()
+        self._reset_object_poses = [self._p.getBasePositionAndOrientation(obj.id) for obj in self._objects]
+
+    def _place_objects(self, object_poses):
+        '''
+        object_poses 为与 self._objects 对应的 [(pos, orn), ...]，某项为 None 则保持当前位姿
+        '''
+        for obj, pose in zip(self._objects, object_poses):
+            if pose is not None:
+                self._p.resetBasePositionAndOrientation(obj.id, pose[0], pose[1])
+
+    def clear_reset_state(self):
+        '''
+        场景中增删物体后调用（restoreState 要求物体与快照一致），下一次 reset 重新生成快照
+        '''
+        if self._reset_state is not None:
+            self._p.removeState(self._reset_state)
+            self._reset_state = None
+
+    def sample_object_poses(self, rng, xy_range=0.02, yaw_range=np.pi / 12):
+        '''
+        在初始位姿附近随机摆放物块：平移 ±xy_range（m），绕 z 轴转 ±yaw_range（rad）
+        :param rng: np.random.Generator
+        :return: 与 self._objects 对应的 [(pos, orn), ...]，可直接传给 reset(object_poses=...)
+        '''
+        if self._reset_object_poses is None:
+            raise RuntimeError("sample_object_poses 需要先调用一次 reset() 生成初始快照")
+        poses = []
+        for pos, orn in self._reset_object_poses:
+            dx, dy = rng.uniform(-xy_range, xy_range, size=2)
+            yaw = self._p.getQuaternionFromEuler([0, 0, rng.uniform(-yaw_range, yaw_range)])
+            _, orn = self._p.multiplyTransforms([0, 0, 0], yaw, [0, 0, 0], orn)
+            poses.append(([pos[0] + dx, pos[1] + dy, pos[2]], orn))
+        return poses
 
     def step_with_sliders(self):
         """
@@ -424,12 +664,14 @@ class DofbotEnv:
         0 - 关节角度控制
         1 - 末端位姿控制
         """
-        mode = p.readUserDebugParameter(self.control_mode_slider)
+        if self.headless:
+            raise RuntimeError("step_with_sliders 需要 GUI，无界面模式下没有滑动条")
+        mode = self._p.readUserDebugParameter(self.control_mode_slider)
 
         if mode < 0.5:
             # === Joint Control Mode ===
-            jointPoses = [p.readUserDebugParameter(slider) for slider in self.sliders]
-            gripperAngle = p.readUserDebugParameter(self.gripper_slider)
+            jointPoses = [self._p.readUserDebugParameter(slider) for slider in self.sliders]
+            gripperAngle = self._p.readUserDebugParameter(self.gripper_slider)
             print(jointPoses)
             self.dofbot_forward_control(jointPoses, gripperAngle)
             # self._dofbot.joint_control(jointPoses)
@@ -448,11 +690,11 @@ class DofbotEnv:
         # 删除上次显示
         if self.end_effector_arrow_id is not None:
             for item in self.end_effector_arrow_id:
-                p.removeUserDebugItem(item)
+                self._p.removeUserDebugItem(item)
 
         if self.object_arrow_id is not None:
             for item in self.object_arrow_id:
-                p.removeUserDebugItem(item)
+                self._p.removeUserDebugItem(item)
 
         pos, orn, euler = self.get_dofbot_pose()
         self.update_arrow_display(pos, orn)
@@ -464,22 +706,28 @@ class DofbotEnv:
         self._update_ee_text_window()  # <-- 新增
 
 
-    def dofbot_control(self,jointPoses,gripperAngle):
+    def dofbot_control(self,jointPoses,gripperAngle,steps=1):
         '''
         :param jointPoses: 数组，机械臂五个关节角度
         :param gripperAngle: 浮点数，机械臂夹爪角度，负值加紧，真值张开
+        :param steps: 下发一次控制后连续步进的仿真步数（目标不变时不必每步重发）
         :return:
         '''
+        for hook in self._control_hooks:
+            hook(False, jointPoses, gripperAngle)
         self._dofbot.joint_control(jointPoses)
         self._dofbot.gripper_control(gripperAngle)
-        p.stepSimulation()
-        time.sleep(self._timeStep)
+        for _ in range(steps):
+            self._step_simulation()
+            self._pace()
 
     def dofbot_forward_control(self, jointPoses, gripperAngle):
+        for hook in self._control_hooks:
+            hook(True, jointPoses, gripperAngle)
         self._dofbot.forwardKinematic(jointPoses)
         self._dofbot.gripper_control(gripperAngle)
-        p.stepSimulation()
-        time.sleep(self._timeStep)
+        self._step_simulation()
+        self._pace()
 
     def dofbot_setInverseKine(self,pos,orn = None):
         '''
@@ -491,6 +739,29 @@ class DofbotEnv:
         jointPoses = self._dofbot.setInverseKine(pos, orn)
         return jointPoses
 
+    def get_ik_cache_stats(self):
+        '''
+        :return: 逆解缓存的命中 / 未命中次数、当前条目数和命中率
+        '''
+        return self._dofbot.ik_cache.stats()
+
+    def set_ik_method(self, method):
+        '''
+        :param method: "pybullet"（默认）或 "model"（多解枚举 + 最近构型选解）
+        '''
+        if method not in ("pybullet", "model"):
+            raise ValueError(f"unknown ik method: {method}")
+        self._dofbot.ik_method = method
+        self._dofbot.ik_cache.invalidate()
+
+    def close(self):
+        '''
+        断开自己创建的连接；外部传入的客户端由调用方自行断开
+        '''
+        if self._owns_client and self.physicsClient >= 0:
+            p.disconnect(physicsClientId=self.physicsClient)
+            self.physicsClient = -1
+
     # def dofbot_forwardKine(self,jointStates):
     #     return self._dofbot.forwardKinematic(jointStates)
 
@@ -0,0 +1,373 @@
+"""
+回合录制 / 回放：逐步记下关节目标、夹爪指令、物块位姿和种子，存成按列分块追加的二进制文件；
+无界面逐位复现、任意速度回放渲染、比较两次录制
+
+复现抓取脚本里的问题原来只能开 GUI 重跑。这里的流程是：
+    1. EpisodeRecorder.attach(env, path)：在 env.reset(...) 之后开始，env.add_control_hook 记下
+       dofbot_control / dofbot_forward_control 每次下发的指令，env.add_step_hook 在每个仿真步之后记一行：
+       flags（本步之前是否下发了指令、哪种指令）、q_target、gripper，以及步后的关节角 q 和物块位姿
+    2. 文件格式：魔数 + 头（JSON：字段 dtype / 形状、种子、初始物块位姿等）+ 起始状态（saveBullet 的内容，
+       zlib 压缩）+ 若干块 + 尾（JSON：步数等）；每块先写行数，再按字段逐列写 zlib 压缩的原始数组。
+       行先写进预分配的 chunk_size 行缓冲区，写满一块才落盘；进程中途退出时已写完的块仍可读
+    3. replay_episode：新建（或传入）env，恢复录制时的起始状态（物块的速度、接触也一并恢复，只按位姿摆放
+       做不到逐位一致），按 flags 在同样的步上下发同样的指令，逐步步进，回放后逐列比较 q / 物块位姿。
+       DofbotEnv 打开了 deterministicOverlappingPairs，调用序列相同时结果逐位一致。
+       传入 GUI env（realtime_factor 调速）或挂上 video_recorder 即为任意速度的回放渲染
+    4. diff_episodes：两份录制逐列比较，给出每列第一个不同的步和最大偏差
+
+只记录经 dofbot_control / dofbot_forward_control 下发的指令和经 env 步进的仿真步；
+录制期间直接调用 pybullet 改动仿真状态（reset、摆放物体等）不会被记下，回放也就无法复现。
+
+    recorder = EpisodeRecorder.attach(env, "results/episodes/run.ep", seed=seed)
+    ...  # 正常调用 env.dofbot_control / TaskExecutor
+    recorder.close(success=env.reward())
+    print(replay_episode("results/episodes/run.ep"))
+
+命令行：python episode_log.py info FILE | replay FILE [--gui] [--speed S] | diff A B
+"""
+import argparse
+import json
+import os
+import struct
+import tempfile
+import time
+import zlib
+
+import numpy as np
+import pybullet as p
+
+MAGIC = b"DOFBOT-EPISODE\x01\n"
+FLAG_CONTROL = 1    # 本步之前经 dofbot_control 下发了关节 / 夹爪指令
+FLAG_FORWARD = 2    # 本步之前经 dofbot_forward_control 直接复位了关节
+STATE_FIELDS = ("q", "gripper_q", "object_pose")
+
+
+# --------------------- 1. 写入 ---------------------
+class EpisodeWriter:
+    def __init__(self, path, fields, meta=None, chunk_size=1000, level=1):
+        '''
+        :param fields: {字段名: (dtype, 每行形状)}，按此顺序逐列存储
+        :param meta: 写进文件头的 JSON 可序列化信息（种子、初始位姿等）
+        :param chunk_size: 每块的行数，写满一块才压缩落盘
+        :param level: zlib 压缩级别
+        '''
+        self.path = path
+        self.fields = {name: (np.dtype(dtype), tuple(shape)) for name, (dtype, shape) in fields.items()}
+        self.chunk_size = chunk_size
+        self.level = level
+        self.rows = 0
+        self._buffers = {name: np.zeros((chunk_size,) + shape, dtype=dtype)
+                         for name, (dtype, shape) in self.fields.items()}
+        self._fill = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        header = {"fields": {name: [dtype.str, list(shape)] for name, (dtype, shape) in self.fields.items()},
+                  "meta": meta or {}}
+        self._write_record(b"H", json.dumps(header).encode())
+
+    def write_state(self, blob):
+        '''
+        写入起始状态（.bullet 文件内容），须在第一行之前调用
+        '''
+        self._write_record(b"S", zlib.compress(blob, self.level))
+
+    def _write_record(self, kind, payload):
+        self._file.write(kind + struct.pack("<I", len(payload)) + payload)
+
+    def row(self):
+        '''
+        :return: 本行各字段的可写视图 {字段名: ndarray}；写完后调用 commit()
+        '''
+        return {name: buffer[self._fill, ...] for name, buffer in self._buffers.items()}
+
+    def commit(self):
+        self._fill += 1
+        self.rows += 1
+        if self._fill == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        '''
+        把缓冲区里的行压缩成一块写出
+        '''
+        if self._fill == 0:
+            return
+        parts = [struct.pack("<I", self._fill)]
+        for name, buffer in self._buffers.items():
+            data = zlib.compress(np.ascontiguousarray(buffer[:self._fill]).tobytes(), self.level)
+            parts.append(struct.pack("<I", len(data)) + data)
+        self._write_record(b"C", b"".join(parts))
+        self._file.flush()
+        self._fill = 0
+
+    def close(self, footer=None):
+        if self._file.closed:
+            return
+        self.flush()
+        self._write_record(b"E", json.dumps(dict(footer or {}, rows=self.rows)).encode())
+        self._file.close()
+
+
+# --------------------- 2. 读取 ---------------------
+class EpisodeLog:
+    def __init__(self, path):
+        '''
+        读出整份录制：meta（文件头）、footer（文件尾，中途退出的录制为 None）、columns（各字段拼好的数组）
+        '''
+        self.path = path
+        self.footer = None
+        self.state = None
+        chunks = []
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{path} 不是回合录制文件")
+        pos = len(MAGIC)
+        header = None
+        while pos + 5 <= len(data):
+            kind, size = data[pos:pos + 1], struct.unpack_from("<I", data, pos + 1)[0]
+            payload = data[pos + 5:pos + 5 + size]
+            if len(payload) < size:
+                break   # 最后一块没写完整
+            pos += 5 + size
+            if kind == b"H":
+                header = json.loads(payload)
+            elif kind == b"S":
+                self.state = zlib.decompress(payload)
+            elif kind == b"C":
+                chunks.append(payload)
+            elif kind == b"E":
+                self.footer = json.loads(payload)
+        self.meta = header["meta"]
+        self.fields = {name: (np.dtype(dtype), tuple(shape)) for name, (dtype, shape) in header["fields"].items()}
+        parts = {name: [] for name in self.fields}
+        for chunk in chunks:
+            rows, offset = struct.unpack_from("<I", chunk, 0)[0], 4
+            for name, (dtype, shape) in self.fields.items():
+                size = struct.unpack_from("<I", chunk, offset)[0]
+                raw = zlib.decompress(chunk[offset + 4:offset + 4 + size])
+                parts[name].append(np.frombuffer(raw, dtype=dtype).reshape((rows,) + shape))
+                offset += 4 + size
+        self.columns = {name: np.concatenate(arrays) if arrays else np.zeros((0,) + shape, dtype=dtype)
+                        for (name, arrays), (dtype, shape) in zip(parts.items(), self.fields.values())}
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+
+def _episode_fields(num_objects, num_gripper_joints):
+    return {"flags": ("u1", ()), "q_target": ("<f8", (5,)), "gripper": ("<f8", ()),
+            "q": ("<f8", (5,)), "gripper_q": ("<f8", (num_gripper_joints,)),
+            "object_pose": ("<f8", (num_objects, 7))}
+
+
+# --------------------- 3. 录制 ---------------------
+class EpisodeRecorder:
+    def __init__(self, env, path, seed=None, meta=None, chunk_size=1000):
+        '''
+        一般用 EpisodeRecorder.attach；在 env.reset(...) 之后、第一条指令之前创建
+        :param seed: 本回合用到的随机种子（sample_object_poses 等），只存档，回放不需要
+        :param meta: 其它要存进文件头的信息
+        '''
+        self.env = env
+        robot = env._dofbot
+        self._bodies = [obj.id for obj in env._objects]
+        self._q_target = np.array(robot.get_jointPoses()[0], dtype=np.float64)
+        self._gripper = float(robot.gripperAngle)
+        self._flags = 0
+        start = {"seed": seed, "time_step": env._timeStep, "pybullet_api": p.getAPIVersion(),
+                 "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                 "object_poses": [[list(pos), list(orn)] for pos, orn in
+                                  (env._p.getBasePositionAndOrientation(body) for body in self._bodies)],
+                 "q0": self._q_target.tolist(), "gripper0": self._gripper}
+        self.writer = EpisodeWriter(path, _episode_fields(len(self._bodies), len(robot.gripper_joints)),
+                                    dict(start, **(meta or {})), chunk_size=chunk_size)
+        self.writer.write_state(save_state(env._p))
+        self.path = path
+
+    @classmethod
+    def attach(cls, env, path, seed=None, meta=None, chunk_size=1000):
+        '''
+        开始录制：挂 control hook 记下每条指令，挂 step hook 逐步记一行
+        '''
+        recorder = cls(env, path, seed, meta, chunk_size)
+        env.add_control_hook(recorder.on_control)
+        env.add_step_hook(recorder.on_step)
+        return recorder
+
+    def on_control(self, forward, jointPoses, gripperAngle):
+        self._q_target[:] = jointPoses[:5]
+        self._gripper = gripperAngle
+        self._flags = FLAG_FORWARD if forward else FLAG_CONTROL
+
+    def on_step(self):
+        row = self.writer.row()
+        row["flags"][...] = self._flags
+        row["q_target"][:] = self._q_target
+        row["gripper"][...] = self._gripper
+        _read_state(self.env, self._bodies, row)
+        self.writer.commit()
+        self._flags = 0
+
+    def close(self, **footer):
+        '''
+        停止录制并写文件尾；footer 里可放成功与否等回合结果
+        '''
+        if self.env is not None:
+            self.env.remove_control_hook(self.on_control)
+            self.env.remove_step_hook(self.on_step)
+            self.env = None
+        self.writer.close(footer)
+        return self.path
+
+
+def save_state(bullet_client):
+    '''
+    :return: 当前仿真状态（saveBullet 写出的 .bullet 文件内容）
+    '''
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.bullet")
+        bullet_client.saveBullet(path)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def restore_state(bullet_client, blob):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.bullet")
+        with open(path, "wb") as f:
+            f.write(blob)
+        bullet_client.restoreState(fileName=path)
+
+
+def _read_state(env, bodies, row):
+    '''
+    步后的臂关节角、夹爪关节角、各物块位姿写进 row
+    '''
+    robot = env._dofbot
+    states = env._p.getJointStates(robot.dofbotUid, robot.arm_joints + robot.gripper_joints)
+    row["q"][:] = [s[0] for s in states[:5]]
+    row["gripper_q"][:] = [s[0] for s in states[5:]]
+    for k, body in enumerate(bodies):
+        pos, orn = env._p.getBasePositionAndOrientation(body)
+        row["object_pose"][k, :3] = pos
+        row["object_pose"][k, 3:] = orn
+
+
+# --------------------- 4. 比较 / 回放 ---------------------
+def diff_columns(a, b, fields=None):
+    '''
+    :param a, b: {字段名: (N,...) 数组}
+    :return: {字段名: {"equal", "first" 第一个不同的步, "max_abs" 最大绝对偏差}}，另有 "rows": (len_a, len_b)
+    '''
+    fields = fields or [name for name in a if name in b]
+    rows = min(len(a[fields[0]]), len(b[fields[0]]))
+    result = {"rows": (len(a[fields[0]]), len(b[fields[0]]))}
+    for name in fields:
+        x, y = a[name][:rows], b[name][:rows]
+        differs = (x != y).reshape(rows, -1).any(axis=1)
+        first = int(np.argmax(differs)) if differs.any() else None
+        max_abs = float(np.abs(x.astype(np.float64) - y).max()) if rows else 0.0
+        result[name] = {"equal": first is None and len(a[name]) == len(b[name]), "first": first,
+                        "max_abs": max_abs}
+    return result
+
+
+def diff_episodes(path_a, path_b):
+    '''
+    比较两份录制：各列逐步比较，以及文件头里的种子 / 初始位姿是否相同
+    '''
+    a, b = EpisodeLog(path_a), EpisodeLog(path_b)
+    result = diff_columns(a.columns, b.columns)
+    result["meta"] = {key: (a.meta.get(key), b.meta.get(key))
+                      for key in ("seed", "object_poses", "q0", "gripper0", "time_step")
+                      if a.meta.get(key) != b.meta.get(key)}
+    return result
+
+
+def replay_episode(path, env=None, check=True):
+    '''
+    按录制的指令序列重跑一遍
+    :param env: None 时新建无界面 DofbotEnv；传入 GUI env（realtime_factor 控制速度）即为回放渲染
+    :param check: 逐列比较回放结果与录制（STATE_FIELDS）
+    :return: dict，steps / wall_s / exact，check 时另有 diff（见 diff_columns）
+    '''
+    from dofbot import DofbotEnv
+
+    log = EpisodeLog(path)
+    owns_env = env is None
+    if owns_env:
+        env = DofbotEnv(headless=True)
+    env.reset(object_poses=log.meta["object_poses"])
+    if log.state is not None:
+        restore_state(env._p, log.state)
+    robot = env._dofbot
+    robot.gripperAngle = log.meta["gripper0"]
+    bodies = [obj.id for obj in env._objects]
+    replayed = {name: np.zeros_like(log[name]) for name in STATE_FIELDS}
+
+    start = time.perf_counter()
+    flags, q_target, gripper = log["flags"], log["q_target"], log["gripper"]
+    for i in range(len(log)):
+        if flags[i] & FLAG_CONTROL:
+            robot.joint_control(q_target[i])
+            robot.gripper_control(float(gripper[i]))
+        elif flags[i] & FLAG_FORWARD:
+            robot.forwardKinematic(q_target[i])
+            robot.gripper_control(float(gripper[i]))
+        env._step_simulation()
+        env._pace()
+        if check:
+            _read_state(env, bodies, {name: replayed[name][i] for name in STATE_FIELDS})
+    result = {"steps": len(log), "wall_s": time.perf_counter() - start}
+    if check:
+        result["diff"] = diff_columns(log.columns, replayed, list(STATE_FIELDS))
+        result["exact"] = all(result["diff"][name]["equal"] for name in STATE_FIELDS)
+    if owns_env:
+        env.close()
+    return result
+
+
+def format_diff(diff):
+    lines = [f"行数：{diff['rows'][0]} / {diff['rows'][1]}"]
+    for name, d in diff.items():
+        if isinstance(d, dict) and "equal" in d:
+            state = "一致" if d["equal"] else f"第 {d['first']} 步起不同，最大偏差 {d['max_abs']:.3g}"
+            lines.append(f"  {name:<12s}{state}")
+    for key, (a, b) in diff.get("meta", {}).items():
+        lines.append(f"  头信息 {key} 不同：{a} / {b}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="回合录制文件：查看 / 回放 / 比较")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("info").add_argument("path")
+    replay_parser = sub.add_parser("replay")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--gui", action="store_true", help="开窗口回放")
+    replay_parser.add_argument("--speed", type=float, default=None, help="回放倍速，0 为尽快")
+    diff_parser = sub.add_parser("diff")
+    diff_parser.add_argument("a")
+    diff_parser.add_argument("b")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        log = EpisodeLog(args.path)
+        print(f"{args.path}：{len(log)} 步，{os.path.getsize(args.path) / 1024:.1f} KB")
+        print("头：", json.dumps(log.meta, ensure_ascii=False))
+        print("尾：", log.footer)
+    elif args.command == "replay":
+        from dofbot import DofbotEnv
+
+        env = DofbotEnv(headless=not args.gui, realtime_factor=args.speed)
+        result = replay_episode(args.path, env)
+        print(f"回放 {result['steps']} 步，{result['wall_s']:.2f} s，{'逐位一致' if result['exact'] else '不一致'}")
+        print(format_diff(result["diff"]))
+        env.close()
+    else:
+        print(format_diff(diff_episodes(args.a, args.b)))
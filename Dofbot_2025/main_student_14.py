@@ -3,6 +3,11 @@ import numpy as np
 import copy
 import time, os, datetime
 import pybullet as p
+from utils_kine.utils_reach_map import ReachMap
+from utils_kine.utils_sim_model import SIM_MODEL
+from task_executor import Phase, TaskExecutor, Waypoint, format_report
+from video_recorder import VideoRecorder
+from episode_log import EpisodeRecorder
 
 # ---------- 1. 准备保存目录 ----------
 save_dir = "results/record"
@@ -10,16 +15,30 @@ os.makedirs(save_dir, exist_ok=True)
 mp4_path = os.path.join(
     save_dir, datetime.datetime.now().strftime("%Y%m%d_%H%M%S") + ".mp4"
 )
+# 回合录制（指令 + 状态，可用 python episode_log.py replay/diff 复现、比较）与视频同名
+episode_path = os.path.splitext(mp4_path)[0] + ".ep"
+
+# 运行方式：HEADLESS = True 时不开窗口；REALTIME_FACTOR 为仿真节奏
+# （1.0 = 实时，N = N 倍实时，0 = 尽快运行，None = GUI 下实时、无界面下尽快）
+HEADLESS = False
+REALTIME_FACTOR = None
+# 离屏录像（GUI / 无界面都可用）：RECORD_STRIDE 个仿真步抓一帧，RECORD_IN_PROCESS 时由镜像进程渲染
+RECORD_VIDEO = True
+RECORD_SIZE = (320, 240)
+RECORD_STRIDE = 33
+RECORD_IN_PROCESS = True
+RECORD_EPISODE = True
 
 if __name__ == "__main__":
-    env = DofbotEnv()
+    env = DofbotEnv(headless=HEADLESS, realtime_factor=REALTIME_FACTOR)
     env.reset()
-    Reward = False
 
-    # 2. 开始录制
-    log_id = p.startStateLogging(
-        p.STATE_LOGGING_VIDEO_MP4, mp4_path, physicsClientId=env.physicsClient
-    )
+    # 2. 开始录制（TINY 渲染器离屏抽帧，后台编码，不占用 GUI）
+    recorder = None
+    if RECORD_VIDEO:
+        recorder = VideoRecorder.from_env(env, mp4_path, process=RECORD_IN_PROCESS, width=RECORD_SIZE[0],
+                                          height=RECORD_SIZE[1], stride=RECORD_STRIDE)
+    episode = EpisodeRecorder.attach(env, episode_path) if RECORD_EPISODE else None
 
     """
     constants here
@@ -27,13 +46,6 @@ if __name__ == "__main__":
     GRIPPER_DEFAULT_ANGLE = 20.0 / 180.0 * 3.1415
     GRIPPER_CLOSE_ANGLE = -20.0 / 180.0 * 3.1415
 
-    # define state machine
-    PRE_GRASP_STATE = 0
-    GRASP_STATE = 1
-    MOVE_STATE = 2
-    SET_STATE = 3
-    current_state = PRE_GRASP_STATE
-
     # print("object1.size: ", env._object1.size)  # → [0.03, 0.03, 0.03]  （半尺寸）
     obj_offset_grasp = [-0.015, -0.015, 0.045]
     obj_offset_move = [0, 0, 0.145]
@@ -41,124 +53,49 @@ if __name__ == "__main__":
 
     block_pos, block_orn, block_euler = env.get_block_pose()
     target_pos = env.get_target_pose()
-    start_time = None
 
-    time.sleep(1.0)
-    num = 0
+    # 状态机的四个阶段：预抓取 → 下降抓取 → 提起并移动到目标上方 → 下降放置并释放
     PRE_GRASP_NUM = 1800
     GRASP_NUM = 1200
     MOVE_NUM = 2000
     SET_NUM = 1000
-
-    while not Reward:
-        """
-        #获取物块位姿、目标位置和机械臂位姿，计算机器臂关节和夹爪角度，使得机械臂夹取绿色物块，放置到紫色区域。
-        """
-
-        # # 获取当前物块和目标位置 - 需要在每个循环开始时获取
-        # block_pos, block_orn, block_euler = env.get_block_pose()
-
-        # 状态机控制
-        if current_state == PRE_GRASP_STATE:  # 0: 预抓取位置
-            print("状态: 移动到预抓取位置")
-
-            # 计算预抓取位置（物块上方）
-            pre_grasp_pos = [
-                block_pos[0] + obj_offset_grasp[0],
-                block_pos[1] + obj_offset_grasp[1],
-                block_pos[2] + obj_offset_grasp[2],
-            ]
-
-            # 使用逆运动学计算关节角度
-            joint_angles, gripper_angle = env.dofbot_setInverseKine(pre_grasp_pos)
-
-            # 控制机械臂和夹爪
-            if joint_angles is not None:
-                env.dofbot_control(joint_angles, GRIPPER_DEFAULT_ANGLE)
-
-            # 短暂停留确保到位
-            if num >= PRE_GRASP_NUM:
-                current_state = GRASP_STATE
-                num = 0
-
-        elif current_state == GRASP_STATE:  # 1: 下降到抓取位置
-            print("状态: 下降到抓取位置")
-
-            # 计算精确抓取位置（稍微降低高度）
-            grasp_pos = [
-                block_pos[0],
-                block_pos[1],
-                block_pos[2] + 0.025,  # 稍微接触物块
-            ]
-
-            joint_angles, gripper_angle = env.dofbot_setInverseKine(grasp_pos)
-            if joint_angles is not None:
-                env.dofbot_control(joint_angles, GRIPPER_CLOSE_ANGLE)  # 夹紧
-
-            if num >= GRASP_NUM:
-                current_state = MOVE_STATE
-                num = 0
-
-        elif current_state == MOVE_STATE:  # 2: 提起并移动到目标上方
-            if num < MOVE_NUM // 2:
-                print("状态: 提起并移动到目标上方")
-                # 先提起物块
-                lift_pos = [
-                    block_pos[0],
-                    block_pos[1],
-                    block_pos[2] + obj_offset_move[2],
-                ]
-
-                joint_angles, gripper_angle = env.dofbot_setInverseKine(lift_pos)
-                if joint_angles is not None:
-                    env.dofbot_control(joint_angles, GRIPPER_CLOSE_ANGLE)
-
-            # 然后移动到目标上方
-            if num >= MOVE_NUM // 2:
-                move_pos = [
-                    target_pos[0],
-                    target_pos[1],
-                    target_pos[2] + obj_offset_move[2],
-                ]
-                print("状态: 移动到目标上方")
-                joint_angles, gripper_angle = env.dofbot_setInverseKine(move_pos)
-                if joint_angles is not None:
-                    env.dofbot_control(joint_angles, GRIPPER_CLOSE_ANGLE)
-
-            if num >= MOVE_NUM:
-                current_state = SET_STATE
-                num = 0
-
-        elif current_state == SET_STATE:  # 3: 下降到放置位置
-            print("状态: 下降到放置位置并释放")
-
-            # 计算预放置位置
-            pre_set_pos = [
-                target_pos[0],
-                target_pos[1],
-                target_pos[2] + obj_offset_set[2] * 0.8,
-            ]
-
-            joint_angles, gripper_angle = env.dofbot_setInverseKine(pre_set_pos)
-            if joint_angles is not None:
-                env.dofbot_control(joint_angles, GRIPPER_CLOSE_ANGLE)
-
-                # 最终放置位置
-            if num >= SET_NUM // 2:
-                set_pos = [target_pos[0], target_pos[1], target_pos[2] + 0.025]
-
-                joint_angles, gripper_angle = env.dofbot_setInverseKine(set_pos)
-                if joint_angles is not None:
-                    env.dofbot_control(joint_angles, GRIPPER_DEFAULT_ANGLE)  # 释放
-
-            if num >= SET_NUM:
-                print("抓取放置任务完成!")
-                Reward = True
-
-        # 计数器递增 - 这行应该与上面的if语句平级
-        num += 1
-        Reward = env.reward()
+    phases = [
+        Phase("pre_grasp", [Waypoint(np.add(block_pos, obj_offset_grasp), GRIPPER_DEFAULT_ANGLE, PRE_GRASP_NUM)]),
+        Phase("grasp", [Waypoint(np.add(block_pos, [0, 0, 0.025]), GRIPPER_CLOSE_ANGLE, GRASP_NUM)]),
+        Phase("move", [Waypoint(np.add(block_pos, obj_offset_move), GRIPPER_CLOSE_ANGLE, MOVE_NUM // 2),
+                       Waypoint(np.add(target_pos, obj_offset_move), GRIPPER_CLOSE_ANGLE, MOVE_NUM // 2)]),
+        Phase("set", [Waypoint(np.add(target_pos, [0, 0, obj_offset_set[2] * 0.8]), GRIPPER_CLOSE_ANGLE, SET_NUM // 2),
+                      Waypoint(np.add(target_pos, [0, 0, 0.025]), GRIPPER_DEFAULT_ANGLE, SET_NUM // 2)]),
+    ]
+
+    # 预先用可达性体素图检查各阶段目标点（首次运行会构建并缓存到 results/reach_map/sim）
+    reach_map = ReachMap.load_or_build("results/reach_map/sim", **SIM_MODEL)
+    waypoints = [(f"{phase.name}[{i}]", wp.pos) for phase in phases for i, wp in enumerate(phase.waypoints)]
+    reach_ok = reach_map.is_reachable(np.array([pos for _, pos in waypoints]))
+    for (name, pos), ok in zip(waypoints, reach_ok):
+        if not ok:
+            print(f"⚠️ 目标点 {name} {pos} 不在可达工作空间内")
+
+    if env.realtime_factor:
+        time.sleep(1.0)
+
+    # 每个路点只求一次逆解，目标不变的步数成批步进；成功判定只在阶段结束时做
+    # （CHECK_EVERY 设为步数则按该节奏判定，INTERP_STEPS > 0 时在关节空间插值过渡）
+    CHECK_EVERY = None
+    INTERP_STEPS = 0
+    executor = TaskExecutor(env, check_every=CHECK_EVERY, interp_steps=INTERP_STEPS, verbose=True)
+    report = executor.run(phases)
+    if report["success"]:
+        print("抓取放置任务完成!")
+
+    print("逆解缓存统计：", env.get_ik_cache_stats())
+    print(format_report(report))
 
     # env.step_with_sliders()
     # ---------- 3. 结束录制 ----------
-    p.stopStateLogging(log_id)
+    if episode is not None:
+        print("回合录制：", episode.close(success=report["success"], steps=report["steps"]))
+    if recorder is not None:
+        stats = recorder.close()
+        print(f"录像 {stats['path']}：{stats['encoded']} 帧，丢帧 {stats['dropped']}，"
+              f"仿真侧抓帧耗时 {stats['capture_s'] * 1e3:.1f} ms")
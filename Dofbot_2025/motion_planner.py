@@ -0,0 +1,475 @@
+"""
+Dofbot 关节空间避障规划：RRT-Connect / 惰性 PRM + 捷径平滑 + 定周期轨迹
+
+现在的运动都是直接把 IK 目标发给电机，路上有没有障碍物不管。这里的流程是：
+    1. CollisionWorld：单独连一个 DIRECT 客户端，只加载碰撞体（场景模板 visual=False + 凸包缓存），
+       按仿真环境里物体的当前位姿摆好；碰撞检查在这个客户端里复位关节、查询，不影响仿真本身
+    2. 构型检查 = 臂自碰撞（collision_query 白名单）+ 机器人与障碍物；初始构型下就贴着的
+       静态物体（底座坐在桌面上）记为允许接触。边检查按 resolution 插值，由粗到细，遇碰撞即停
+    3. rrt_connect：双向树，单次查询；prm：路标图跨查询保留，边只在搜到的路径上才检查（惰性），
+       查过的边记住结果，场景变化后 invalidate()
+    4. shortcut：随机取两点直连，能连就删掉中间点；trajectory：按关节速度上限重采样到定周期
+    5. 输出给仿真（每个点一个仿真步，execute_in_env）和实物 RealEnv（角度制路点，to_real_waypoints）
+
+    planner = MotionPlanner.from_env(env)
+    result = planner.plan(q_start, q_goal)            # 或 method="prm"
+    execute_in_env(env, result["q"], gripper_angle)
+"""
+import functools
+import heapq
+import time
+
+import numpy as np
+import pybullet as p
+
+from collision_query import SelfCollisionChecker
+from dofbot import BulletClient
+from scene_cache import SceneTemplate
+from utils_kine.utils_path_ik import time_parameterize
+
+DOFBOT_URDF = "models/dofbot_urdf_with_gripper/dofbot_with_gripper.urdf"
+ARM_JOINTS = list(range(5))
+GRIPPER_JOINTS = [5, 6, 7, 8, 9, 10]
+JOINT_LL = np.array([-np.pi, 0, 0, 0, 0])
+JOINT_UL = np.array([np.pi, np.pi, np.pi, np.pi, np.pi])
+HOME_Q = np.full(5, 1.57)
+
+
+@functools.lru_cache(maxsize=None)
+def _coarse_to_fine(n):
+    """
+    1..n 的检查顺序：先查终点和中点，再逐级细分，碰撞通常更早被发现
+    """
+    order, seen = [], set()
+    step = 1 << max(n.bit_length() - 1, 0)
+    while step >= 1:
+        for k in range(step, n + 1, step):
+            if k not in seen:
+                seen.add(k)
+                order.append(k)
+        step //= 2
+    return np.array([n] + [k for k in order if k != n])
+
+
+# --------------------- 1. 碰撞世界 ---------------------
+class CollisionWorld:
+    def __init__(self, scene=None, gripper_angle=0.0, margin=0.0, resolution=0.02, home_q=HOME_Q):
+        '''
+        :param scene: SceneTemplate；None 时用 visual=False 的默认模板
+        :param gripper_angle: 检查时夹爪保持的角度
+        :param margin: 与障碍物 / 自身连杆的最小允许距离（m）
+        :param resolution: 边检查的插值步长（rad，按关节最大差值计）
+        :param home_q: 计算底座与桌面等允许接触时的参考构型
+        '''
+        self.client = p.connect(p.DIRECT)
+        self._p = BulletClient(self.client)
+        self._scene = scene if scene is not None else SceneTemplate(visual=False)
+        self.margin = margin
+        self.resolution = resolution
+        self.num_checks = 0
+
+        self.robot = self._scene.load_urdf(self._p, DOFBOT_URDF, useFixedBase=True)
+        self._p.resetJointStatesMultiDof(self.robot, GRIPPER_JOINTS, [[gripper_angle]] * len(GRIPPER_JOINTS))
+        self._self_checker = SelfCollisionChecker(self.robot, links=range(-1, 5), physicsClientId=self.client)
+        self.obstacles = []
+        # (障碍物, 机器人连杆)：参考构型下就接触的静态物体，之后不算碰撞
+        self._allowed = set()
+        self._home_q = np.asarray(home_q, dtype=np.float64)
+        self.add_static("models/floor.urdf", [0, 0, -0.625])
+        self.add_static("models/table_collision/table.urdf", [0.5, 0, -0.625])
+
+    def close(self):
+        if self.client >= 0:
+            p.disconnect(physicsClientId=self.client)
+            self.client = -1
+
+    # ---------- 障碍物 ----------
+    def add_static(self, urdf_path, pos, orn=(0, 0, 0, 1)):
+        '''
+        加载固定不动的场景物体；参考构型下与之接触的机器人连杆记为允许接触
+        '''
+        body = self._scene.load_urdf(self._p, urdf_path, pos, orn, useFixedBase=True)
+        self.obstacles.append(body)
+        self._set_arm(self._home_q)
+        for pt in self._p.getClosestPoints(self.robot, body, self.margin):
+            self._allowed.add((body, pt[3]))
+        return body
+
+    def add_urdf(self, urdf_path, pos, orn=(0, 0, 0, 1)):
+        '''
+        加载可移动的障碍物（物块等），不设允许接触；位姿变了用 set_pose 更新
+        '''
+        body = self._scene.load_urdf(self._p, urdf_path, pos, orn)
+        self.obstacles.append(body)
+        return body
+
+    def add_box(self, half_extents, pos, orn=(0, 0, 0, 1)):
+        '''
+        直接加一个长方体障碍物（不需要 URDF）
+        '''
+        shape = self._p.createCollisionShape(p.GEOM_BOX, halfExtents=half_extents)
+        body = self._p.createMultiBody(0, shape, basePosition=pos, baseOrientation=orn)
+        self.obstacles.append(body)
+        return body
+
+    def remove(self, body):
+        self.obstacles.remove(body)
+        self._p.removeBody(body)
+
+    def set_pose(self, body, pos, orn):
+        self._p.resetBasePositionAndOrientation(body, pos, orn)
+
+    # ---------- 构型 / 边检查 ----------
+    def _set_arm(self, q):
+        self._p.resetJointStatesMultiDof(self.robot, ARM_JOINTS, [[x] for x in q])
+
+    def is_free(self, q):
+        '''
+        :param q: (5,) 臂关节角
+        :return: 该构型下既无自碰撞也不碰障碍物
+        '''
+        self.num_checks += 1
+        self._set_arm(q)
+        if self._self_checker.in_collision(self.margin):
+            return False
+        for body in self.obstacles:
+            for pt in self._p.getClosestPoints(self.robot, body, self.margin):
+                if (body, pt[3]) not in self._allowed:
+                    return False
+        return True
+
+    def edge_free(self, qa, qb):
+        '''
+        qa → qb 直线插值（不含 qa 本身）由粗到细逐点检查，遇碰撞即停
+        '''
+        qa, qb = np.asarray(qa), np.asarray(qb)
+        n = max(1, int(np.ceil(np.abs(qb - qa).max() / self.resolution)))
+        for k in _coarse_to_fine(n):
+            if not self.is_free(qa + (qb - qa) * (k / n)):
+                return False
+        return True
+
+
+# --------------------- 2. RRT-Connect ---------------------
+class _Tree:
+    def __init__(self, root, capacity=1024):
+        self.nodes = np.empty((capacity, len(root)))
+        self.parents = np.empty(capacity, dtype=np.int64)
+        self.nodes[0], self.parents[0] = root, -1
+        self.size = 1
+
+    def nearest(self, q):
+        return int(np.argmin(((self.nodes[:self.size] - q) ** 2).sum(axis=1)))
+
+    def add(self, q, parent):
+        if self.size == len(self.nodes):
+            self.nodes = np.concatenate([self.nodes, np.empty_like(self.nodes)])
+            self.parents = np.concatenate([self.parents, np.empty_like(self.parents)])
+        self.nodes[self.size], self.parents[self.size] = q, parent
+        self.size += 1
+        return self.size - 1
+
+    def path_to_root(self, i):
+        path = []
+        while i >= 0:
+            path.append(self.nodes[i].copy())
+            i = self.parents[i]
+        return path
+
+
+# --------------------- 3. 惰性 PRM 路标图 ---------------------
+class Roadmap:
+    def __init__(self):
+        self.nodes = np.empty((0, 5))
+        # 邻接表 {i: {j: 距离}}；已检查过的边 (min, max) 按结果记在 _valid / _invalid
+        self.adj = {}
+        self._valid = set()
+        self._invalid = set()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def add_node(self, q):
+        self.nodes = np.vstack([self.nodes, q])
+        i = len(self.nodes) - 1
+        self.adj[i] = {}
+        return i
+
+    def connect(self, i, k, radius):
+        '''
+        把节点 i 与最近的 k 个（距离不超过 radius）节点相连，不检查碰撞
+        '''
+        d = np.sqrt(((self.nodes - self.nodes[i]) ** 2).sum(axis=1))
+        d[i] = np.inf
+        for j in np.argsort(d)[:k]:
+            if d[j] > radius:
+                break
+            self.adj[i][int(j)] = self.adj[int(j)][i] = float(d[j])
+
+    def pop_node(self):
+        '''
+        删除最后一个节点（查询时临时加入的起点 / 终点）
+        '''
+        i = len(self.nodes) - 1
+        for j in self.adj.pop(i):
+            self.adj[j].pop(i, None)
+        self._valid = {e for e in self._valid if i not in e}
+        self._invalid = {e for e in self._invalid if i not in e}
+        self.nodes = self.nodes[:i]
+
+    def shortest_path(self, start, goal):
+        '''
+        Dijkstra，返回节点下标列表；不连通时返回 None
+        '''
+        dist, prev = {start: 0.0}, {}
+        heap = [(0.0, start)]
+        while heap:
+            d, i = heapq.heappop(heap)
+            if i == goal:
+                path = [goal]
+                while path[-1] != start:
+                    path.append(prev[path[-1]])
+                return path[::-1]
+            if d > dist[i]:
+                continue
+            for j, w in self.adj[i].items():
+                if (min(i, j), max(i, j)) in self._invalid:
+                    continue
+                if d + w < dist.get(j, np.inf):
+                    dist[j], prev[j] = d + w, i
+                    heapq.heappush(heap, (d + w, j))
+        return None
+
+
+# --------------------- 4. 规划器 ---------------------
+class MotionPlanner:
+    def __init__(self, world, ll=JOINT_LL, ul=JOINT_UL, seed=0):
+        '''
+        :param world: CollisionWorld
+        :param ll / ul: 关节采样范围（rad）
+        '''
+        self.world = world
+        self.ll, self.ul = np.asarray(ll, dtype=np.float64), np.asarray(ul, dtype=np.float64)
+        self.rng = np.random.default_rng(seed)
+        self.roadmap = Roadmap()
+        self._prm_k, self._prm_radius = 10, 1.5
+        self._env_bodies = {}
+
+    @classmethod
+    def from_env(cls, env, margin=0.0, resolution=0.02, seed=0):
+        '''
+        按 DofbotEnv 当前的物体位姿搭一个碰撞世界（独立 DIRECT 客户端），关节范围取机器人的限位
+        '''
+        world = CollisionWorld(gripper_angle=env._dofbot.gripperAngle, margin=margin, resolution=resolution)
+        planner = cls(world, env._dofbot.ll, env._dofbot.ul, seed=seed)
+        for obj in env._objects:
+            pos, orn, _ = obj.pos_and_orn()
+            planner._env_bodies[obj.id] = world.add_urdf(obj.urdfPath, pos, orn)
+        return planner
+
+    def sync_env(self, env):
+        '''
+        仿真里的物体挪动后调用：更新碰撞世界里的位姿，并让路标图的边检查结果失效
+        '''
+        for obj in env._objects:
+            pos, orn, _ = obj.pos_and_orn()
+            self.world.set_pose(self._env_bodies[obj.id], pos, orn)
+        self.invalidate()
+
+    def invalidate(self):
+        '''
+        场景变化后调用：路标图保留无碰撞的节点和全部连线，边的检查结果清空
+        '''
+        self.roadmap = self._revalidated_roadmap()
+
+    def _revalidated_roadmap(self):
+        old, roadmap = self.roadmap, Roadmap()
+        keep = [i for i in range(len(old)) if self.world.is_free(old.nodes[i])]
+        index = {i: n for n, i in enumerate(keep)}
+        for i in keep:
+            roadmap.add_node(old.nodes[i])
+        for i in keep:
+            for j, w in old.adj[i].items():
+                if j in index:
+                    roadmap.adj[index[i]][index[j]] = w
+        return roadmap
+
+    def sample(self):
+        return self.rng.uniform(self.ll, self.ul)
+
+    # ---------- RRT-Connect ----------
+    def rrt_connect(self, q_start, q_goal, step=0.2, max_iters=5000):
+        '''
+        :param step: 每次扩展的最大关节距离（rad，欧氏）
+        :return: (K,5) 关节路径，失败返回 None
+        '''
+        trees = [_Tree(np.asarray(q_start, dtype=np.float64)), _Tree(np.asarray(q_goal, dtype=np.float64))]
+        for it in range(max_iters):
+            tree_a, tree_b = trees[it % 2], trees[(it + 1) % 2]
+            new = self._extend(tree_a, self.sample(), step)
+            if new is None:
+                continue
+            q_new = tree_a.nodes[new]
+            # 另一棵树朝 q_new 一直伸，直到连上或被挡住
+            reached = self._connect(tree_b, q_new, step)
+            if reached is None:
+                continue
+            path_a, path_b = tree_a.path_to_root(new), tree_b.path_to_root(reached)
+            path = path_a[::-1] + path_b[1:]
+            return np.array(path if it % 2 == 0 else path[::-1])
+        return None
+
+    def _extend(self, tree, q_target, step):
+        i = tree.nearest(q_target)
+        q_near = tree.nodes[i]
+        d = np.linalg.norm(q_target - q_near)
+        if d < 1e-9:
+            return None
+        q_new = q_target if d <= step else q_near + (q_target - q_near) * (step / d)
+        if not self.world.edge_free(q_near, q_new):
+            return None
+        return tree.add(q_new, i)
+
+    def _connect(self, tree, q_target, step):
+        while True:
+            new = self._extend(tree, q_target, step)
+            if new is None:
+                return None
+            if np.allclose(tree.nodes[new], q_target):
+                return new
+
+    # ---------- 惰性 PRM ----------
+    def build_roadmap(self, num_nodes=500, k=10, radius=1.5):
+        '''
+        采样 num_nodes 个无碰撞节点并连上 k 近邻；边此时不检查，查询时才检查
+        可多次调用，节点逐步增加
+        '''
+        self._prm_k, self._prm_radius = k, radius
+        added = 0
+        while added < num_nodes:
+            q = self.sample()
+            if self.world.is_free(q):
+                self.roadmap.connect(self.roadmap.add_node(q), k, radius)
+                added += 1
+
+    def prm(self, q_start, q_goal, num_nodes=500, k=10, radius=1.5):
+        '''
+        在路标图上查询；图为空时先建图。起点 / 终点只临时加入，查完删除，
+        路径上检查过的边记在图里，下一次查询直接复用
+        :return: (K,5) 关节路径，失败返回 None
+        '''
+        if len(self.roadmap) == 0:
+            self.build_roadmap(num_nodes, k, radius)
+        roadmap = self.roadmap
+        start = roadmap.add_node(np.asarray(q_start, dtype=np.float64))
+        roadmap.connect(start, self._prm_k, self._prm_radius)
+        goal = roadmap.add_node(np.asarray(q_goal, dtype=np.float64))
+        roadmap.connect(goal, self._prm_k, self._prm_radius)
+        try:
+            while True:
+                path = roadmap.shortest_path(start, goal)
+                if path is None:
+                    return None
+                # 只检查这条路径上的边，遇到不通的记下再搜
+                for i, j in zip(path[:-1], path[1:]):
+                    edge = (min(i, j), max(i, j))
+                    if edge in roadmap._valid:
+                        continue
+                    if not self.world.edge_free(roadmap.nodes[i], roadmap.nodes[j]):
+                        roadmap._invalid.add(edge)
+                        break
+                    roadmap._valid.add(edge)
+                else:
+                    return roadmap.nodes[path].copy()
+        finally:
+            roadmap.pop_node()
+            roadmap.pop_node()
+
+    # ---------- 平滑与轨迹 ----------
+    def shortcut(self, path, iters=200):
+        '''
+        随机取路径上两点，能直连就删掉中间点
+        '''
+        path = list(path)
+        for _ in range(iters):
+            if len(path) < 3:
+                break
+            i, j = sorted(self.rng.choice(len(path), 2, replace=False))
+            if j - i > 1 and self.world.edge_free(path[i], path[j]):
+                path = path[:i + 1] + path[j:]
+        return np.array(path)
+
+    def plan(self, q_start, q_goal, method="rrt_connect", qd_max=1.0, dt=0.001, shortcut_iters=200, **kwargs):
+        '''
+        :param method: "rrt_connect" 或 "prm"（路标图跨查询保留）
+        :param qd_max: 关节速度上限（rad/s），仿真电机的 maxVelocity 为 1.0
+        :param dt: 轨迹周期（s），取仿真步长时每个点对应一个仿真步
+        :return: dict，success / path（平滑后的路点）/ raw_path / t / q（定周期轨迹）/ checks / plan_s
+        '''
+        start = time.perf_counter()
+        checks = self.world.num_checks
+        q_start, q_goal = np.asarray(q_start, dtype=np.float64), np.asarray(q_goal, dtype=np.float64)
+        result = {"success": False, "path": None, "raw_path": None, "t": None, "q": None}
+        if self.world.is_free(q_start) and self.world.is_free(q_goal):
+            if method == "rrt_connect":
+                raw = self.rrt_connect(q_start, q_goal, **kwargs)
+            elif method == "prm":
+                raw = self.prm(q_start, q_goal, **kwargs)
+            else:
+                raise ValueError(f"unknown planner: {method}")
+            if raw is not None:
+                path = self.shortcut(raw, shortcut_iters)
+                result["t"], result["q"] = time_parameterize(path, qd_max, dt)
+                result.update(success=True, path=path, raw_path=raw)
+        result["checks"] = self.world.num_checks - checks
+        result["plan_s"] = time.perf_counter() - start
+        return result
+
+
+# --------------------- 5. 执行 ---------------------
+def execute_in_env(env, q_traj, gripper_angle, steps_per_point=1):
+    '''
+    在 DofbotEnv 里逐点下发定周期轨迹（plan 的 dt 取仿真步长时 steps_per_point=1）
+    '''
+    for q in q_traj:
+        env.dofbot_control(q, gripper_angle, steps=steps_per_point)
+
+
+def to_real_waypoints(path, max_step_deg=5.0):
+    '''
+    关节路径 → RealEnv 用的角度制路点（仿真 1.57 rad 对应实物 90°），
+    相邻路点各关节差不超过 max_step_deg；逐个 real_env.step(joint=q) 执行
+    '''
+    path = np.degrees(np.asarray(path, dtype=np.float64))
+    out = [path[0]]
+    for a, b in zip(path[:-1], path[1:]):
+        n = max(1, int(np.ceil(np.abs(b - a).max() / max_step_deg)))
+        out.extend(a + (b - a) * (k / n) for k in range(1, n + 1))
+    return np.array(out)
+
+
+if __name__ == "__main__":
+    from dofbot import DofbotEnv
+
+    env = DofbotEnv(headless=True)
+    env.reset()
+    planner = MotionPlanner.from_env(env)
+    # 在初始构型到物块上方的直线路径上放一块挡板
+    planner.world.add_box([0.02, 0.1, 0.01], [0.15, 0.05, 0.25])
+
+    q_start = env.get_dofbot_jointPoses()[0]
+    q_goal = np.array(env.dofbot_setInverseKine(np.add(env.get_block_pose()[0], [0, 0, 0.06]))[0])
+    print("直线连接是否无碰撞：", planner.world.edge_free(q_start, q_goal))
+    for method in ("rrt_connect", "prm", "prm"):
+        result = planner.plan(q_start, q_goal, method=method)
+        if result["success"]:
+            print(f"{method}：{result['plan_s'] * 1e3:.1f} ms，{result['checks']} 次构型检查，"
+                  f"路点 {len(result['raw_path'])} → {len(result['path'])}，轨迹 {len(result['q'])} 步")
+        else:
+            print(f"{method}：失败（{result['plan_s'] * 1e3:.1f} ms）")
+
+    execute_in_env(env, result["q"], env._dofbot.gripperAngle)
+    print("到达误差（rad）：", np.abs(env.get_dofbot_jointPoses()[0] - q_goal).max())
+    print("实物路点（°）：", len(to_real_waypoints(result["path"])), "个")
+    planner.world.close()
+    env.close()
@@ -0,0 +1,252 @@
+"""
+仿真热路径分段计时：按阶段统计调用次数、耗时直方图，输出汇总表和 Chrome trace
+
+不知道一个仿真步的时间花在逆解、电机指令、stepSimulation、位姿查询、调试绘制还是 Python 本身上。
+这里的做法是：
+    1. env.enable_profiler(profiler) 时才插桩：把 env / 机器人 / 物体上的 self._p 换成 ProfiledClient，
+       每个 pybullet 调用按函数名归到一个阶段（bullet.step / bullet.ik / bullet.motor / bullet.pose …）；
+       env 的关键方法换成同名实例属性包一层计时（env.control / ik / pose …）
+    2. 没有 enable 时什么都不替换，热路径上没有任何额外判断，可以一直留在采集 / 训练代码里；
+       profiler.detach() 恢复原对象
+    3. 计时区间可以嵌套：每个区间记录总耗时和自身耗时（减去内层区间），
+       最外层方法的自身耗时就是 pybullet 调用之外的 Python 开销
+    4. 每个阶段一个按 2 的幂、每倍程 4 格的直方图（整数位运算分桶），汇总表给出 p50 / p90 / p99
+    5. trace=True 时另存每次调用的起止时间（上限 max_events），write_chrome_trace 输出
+       chrome://tracing / Perfetto 可读的 JSON
+
+    profiler = Profiler()
+    env.enable_profiler(profiler)
+    ...
+    print(profiler.summary())
+    profiler.write_chrome_trace("results/profile/trace.json")
+
+计时用一个栈记录嵌套关系，只支持在单个线程里使用（pybullet 客户端本身也不能跨线程并发）。
+"""
+import json
+import os
+import time
+
+# pybullet 函数 → 阶段；表里没有的归到 bullet.other
+BULLET_PHASES = {}
+for _phase, _names in {
+    "bullet.step": ["stepSimulation"],
+    "bullet.ik": ["calculateInverseKinematics", "calculateInverseKinematics2"],
+    "bullet.motor": ["setJointMotorControl2", "setJointMotorControlArray", "setJointMotorControlMultiDof",
+                     "setJointMotorControlMultiDofArray"],
+    "bullet.pose": ["getLinkState", "getLinkStates", "getJointState", "getJointStates", "getJointStatesMultiDof",
+                    "getBasePositionAndOrientation", "getBaseVelocity"],
+    "bullet.debug": ["addUserDebugLine", "addUserDebugText", "addUserDebugParameter", "readUserDebugParameter",
+                     "removeUserDebugItem", "removeAllUserDebugItems"],
+    "bullet.collision": ["getClosestPoints", "getContactPoints", "getAABB", "getOverlappingObjects", "rayTest",
+                         "rayTestBatch"],
+    "bullet.reset": ["resetJointState", "resetJointStatesMultiDof", "resetBasePositionAndOrientation", "saveState",
+                     "restoreState"],
+    "bullet.render": ["getCameraImage"],
+}.items():
+    for _name in _names:
+        BULLET_PHASES[_name] = _phase
+
+_NUM_BUCKETS = 8 + 60 * 4
+
+
+def _bucket(ns):
+    '''
+    耗时（ns）→ 直方图格子：< 8 ns 每 ns 一格，之后每个 2 的幂区间分 4 格
+    '''
+    bits = ns.bit_length()
+    if bits <= 3:
+        return ns
+    return 8 + (bits - 4) * 4 + ((ns >> (bits - 3)) & 3)
+
+
+def _bucket_upper(index):
+    '''
+    :return: 该格子的上界（ns），用于估计分位数
+    '''
+    if index < 8:
+        return index + 1
+    bits, sub = (index - 8) // 4 + 4, (index - 8) % 4
+    return (5 + sub) << (bits - 3)
+
+
+class PhaseStats:
+    __slots__ = ("calls", "total_ns", "self_ns", "max_ns", "hist")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.self_ns = 0
+        self.max_ns = 0
+        self.hist = [0] * _NUM_BUCKETS
+
+    def percentile(self, q):
+        '''
+        :param q: 0~1
+        :return: 估计的 q 分位耗时（ns，取所在格子上界）
+        '''
+        rank, seen = q * self.calls, 0
+        for index, count in enumerate(self.hist):
+            seen += count
+            if count and seen >= rank:
+                return min(_bucket_upper(index), self.max_ns)
+        return self.max_ns
+
+
+class ProfiledClient:
+    '''
+    包一层已有的客户端（dofbot.BulletClient / pybullet_utils 的 BulletClient 均可），
+    每个 pybullet 函数第一次取用时包上计时，之后直接命中实例属性
+    '''
+
+    def __init__(self, client, profiler):
+        self._inner = client
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        attribute = getattr(self._inner, name)
+        if callable(attribute):
+            attribute = self._profiler.wrap(attribute, BULLET_PHASES.get(name, "bullet.other"), name)
+        setattr(self, name, attribute)
+        return attribute
+
+
+class Profiler:
+    def __init__(self, trace=True, max_events=200000):
+        '''
+        :param trace: 是否记录每次调用的起止时间（Chrome trace 用）；只要汇总表时关掉更省内存
+        :param max_events: trace 最多记录的调用数，超出的只进直方图
+        '''
+        self.trace = trace
+        self.max_events = max_events
+        self.phases = {}
+        self.events = []
+        self.dropped_events = 0
+        self.root_ns = 0
+        self._stack = []
+        self._patched = []
+        self._start_ns = time.perf_counter_ns()
+
+    def reset(self):
+        '''
+        清空统计，插桩保持不变（例如跳过预热阶段）
+        '''
+        self.phases.clear()
+        self.events.clear()
+        self.dropped_events = 0
+        self.root_ns = 0
+        self._start_ns = time.perf_counter_ns()
+
+    # ---------- 插桩 ----------
+    def _phase(self, name):
+        if name not in self.phases:
+            self.phases[name] = PhaseStats()
+        return self.phases[name]
+
+    def wrap(self, function, phase, name=None):
+        '''
+        :return: 计时版的 function，耗时记到 phase，trace 里显示为 name
+        '''
+        name = name or getattr(function, "__qualname__", phase)
+        stack, events, clock = self._stack, self.events, time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            stack.append(0)
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                duration = clock() - start
+                inner = stack.pop()
+                if stack:
+                    stack[-1] += duration
+                else:
+                    self.root_ns += duration
+                stats = self.phases.get(phase) or self._phase(phase)
+                stats.calls += 1
+                stats.total_ns += duration
+                stats.self_ns += duration - inner
+                stats.hist[_bucket(duration)] += 1
+                if duration > stats.max_ns:
+                    stats.max_ns = duration
+                if self.trace:
+                    if len(events) < self.max_events:
+                        events.append((name, phase, start, duration, len(stack)))
+                    else:
+                        self.dropped_events += 1
+
+        return timed
+
+    def instrument(self, obj, methods):
+        '''
+        :param methods: {方法名: 阶段}，用计时版覆盖成实例属性，detach 时删掉
+        '''
+        for method, phase in methods.items():
+            previous, wrapper = obj.__dict__.get(method), self.wrap(getattr(obj, method), phase,
+                                                                      f"{type(obj).__name__}.{method}")
+            self._patched.append((obj, method, previous, wrapper))
+            setattr(obj, method, wrapper)
+
+    def instrument_client(self, obj, attr="_p"):
+        '''
+        把 obj.<attr> 换成 ProfiledClient
+        '''
+        client = getattr(obj, attr)
+        wrapper = ProfiledClient(client, self)
+        self._patched.append((obj, attr, client, wrapper))
+        setattr(obj, attr, wrapper)
+
+    def detach(self):
+        '''
+        按相反顺序恢复所有被替换的属性；属性已被别人再次替换（例如另一个包装装在外面并转调到这里）时
+        不动它，以免把别人的包装连同这一层一起拆掉，只把这一层标记为已撤销，这一层会继续计时；
+        之后外层的 Profiler detach 时跳过已撤销的层，不会把它装回去
+        :return: 没能恢复的 (对象, 属性名) 列表
+        '''
+        kept = []
+        for obj, attr, previous, wrapper in reversed(self._patched):
+            if obj.__dict__.get(attr) is not wrapper:
+                wrapper._profiler_detached, wrapper._profiler_previous = True, previous
+                kept.append((obj, attr))
+                continue
+            while getattr(previous, "_profiler_detached", False):
+                previous = previous._profiler_previous
+            if previous is None:
+                delattr(obj, attr)
+            else:
+                setattr(obj, attr, previous)
+        self._patched = []
+        return kept
+
+    # ---------- 输出 ----------
+    def summary(self, sort="self"):
+        '''
+        :param sort: "self" 按自身耗时排序，"total" 按总耗时
+        :return: 每阶段一行：调用次数、总耗时、自身耗时及占最外层总时间的比例、均值和分位数
+        '''
+        key = (lambda s: s.self_ns) if sort == "self" else (lambda s: s.total_ns)
+        root = max(self.root_ns, 1)
+        lines = [f"{'阶段':<18s}{'次数':>9s}{'总 ms':>11s}{'自身 ms':>11s}{'占比':>8s}"
+                 f"{'均值 μs':>10s}{'p50 μs':>9s}{'p90 μs':>9s}{'p99 μs':>9s}{'最大 μs':>10s}"]
+        for name, s in sorted(self.phases.items(), key=lambda item: -key(item[1])):
+            lines.append(f"{name:<20s}{s.calls:>9d}{s.total_ns / 1e6:>11.1f}{s.self_ns / 1e6:>11.1f}"
+                         f"{s.self_ns / root:>8.1%}{s.total_ns / max(s.calls, 1) / 1e3:>10.1f}"
+                         f"{s.percentile(0.5) / 1e3:>9.1f}{s.percentile(0.9) / 1e3:>9.1f}"
+                         f"{s.percentile(0.99) / 1e3:>9.1f}{s.max_ns / 1e3:>10.1f}")
+        python_ns = sum(s.self_ns for name, s in self.phases.items() if not name.startswith("bullet."))
+        lines.append(f"最外层合计 {self.root_ns / 1e6:.1f} ms，其中 pybullet 之外的 Python 开销 "
+                     f"{python_ns / 1e6:.1f} ms（{python_ns / root:.1%}）")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        '''
+        写出 Chrome trace（"X" 完整事件，时间单位 μs），可在 chrome://tracing 或 ui.perfetto.dev 打开
+        '''
+        pid = os.getpid()
+        events = [{"name": name, "cat": phase, "ph": "X", "ts": (start - self._start_ns) / 1e3,
+                   "dur": duration / 1e3, "pid": pid, "tid": 0, "args": {"depth": depth}}
+                  for name, phase, start, duration, depth in self.events]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"dropped_events": self.dropped_events}}, f)
+        return path
@@ -0,0 +1,200 @@
+"""
+场景模板缓存：缩短 DofbotEnv 的构造时间（采集脚本里每个 worker 进程都要构造一次）
+
+构造耗时几乎全在 dofbot_with_gripper.urdf 的 STL 碰撞网格上：PyBullet 把每个碰撞网格的
+全部顶点交给凸包算法（link5.STL 约 22 万个顶点，单个就要 ~180 ms），而且每个进程都要重算。
+这里把每个碰撞网格的凸包顶点预先算好写成 OBJ（只剩几百个顶点），再生成一份碰撞网格指向
+这些 OBJ 的 URDF。PyBullet 对它求出的凸包与原网格相同，视觉网格、惯量仍用原文件。
+无界面、不取相机图像的 worker 还可以去掉 <visual>，连视觉网格也不解析。
+缓存放在 URDF 同目录的 .scene_cache/ 下，源文件比缓存新时自动重建。
+
+另外可以把装配好、完成第一次复位的世界用 saveBullet 存成 .bullet 快照，之后的构造加载完
+URDF 后直接 restoreState(fileName=...) 恢复，不再逐个复位物块和机械臂。
+注意：当前 PyBullet 的 loadBullet 不能从 .bullet 重建多刚体（返回空元组），快照只能恢复
+状态，URDF 仍要加载——构造时间的大头靠凸包缓存省下。
+
+    scene = SceneTemplate(snapshot_path="models/.scene_cache/dofbot_scene.bullet")
+    scene.prepare()                       # 主进程里先建好缓存，再启动 worker
+    env = DofbotEnv(physicsClientId=conn, scene=scene)
+    print(env.build_time)
+"""
+import os
+import struct
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pybullet as p
+from scipy.spatial import ConvexHull
+
+CACHE_DIR_NAME = ".scene_cache"
+MESH_SUFFIXES = (".stl", ".obj")
+
+# DofbotEnv 场景里的 URDF，prepare() 默认预先处理这些
+SCENE_URDFS = ["models/floor.urdf", "models/table_collision/table.urdf",
+               "models/dofbot_urdf_with_gripper/dofbot_with_gripper.urdf",
+               "models/box_green.urdf", "models/box_purple.urdf"]
+
+
+# --------------------- 1. 网格读写 ---------------------
+def read_mesh_vertices(path):
+    """
+    读取网格的全部顶点（二进制 / ASCII STL，或 OBJ 的 v 行），返回 (N,3) float64
+    """
+    if path.lower().endswith(".obj"):
+        with open(path, "r") as f:
+            rows = [line.split()[1:4] for line in f if line.startswith("v ")]
+        return np.array(rows, dtype=np.float64)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) >= 84:
+        n = struct.unpack_from("<I", data, 80)[0]
+        if 84 + 50 * n == len(data):  # 二进制 STL：每个三角形 12 个 float + 2 字节属性
+            tri = np.dtype([("normal", "<f4", 3), ("v", "<f4", (3, 3)), ("attr", "<u2")])
+            return np.frombuffer(data, dtype=tri, count=n, offset=84)["v"].reshape(-1, 3).astype(np.float64)
+    rows = [line.split()[1:4] for line in data.decode("ascii", "ignore").splitlines()
+            if line.strip().startswith("vertex")]
+    return np.array(rows, dtype=np.float64)
+
+
+def write_hull_obj(vertices, path):
+    """
+    求 vertices 的凸包，把凸包顶点和三角面写成 OBJ（先写临时文件再改名，多进程同时写也安全）
+    返回
+    ----
+    凸包顶点数
+    """
+    hull = ConvexHull(vertices)
+    index = {k: i + 1 for i, k in enumerate(hull.vertices)}  # OBJ 下标从 1 开始
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        for x, y, z in vertices[hull.vertices]:
+            f.write(f"v {x:.9g} {y:.9g} {z:.9g}\n")
+        for a, b, c in hull.simplices:
+            f.write(f"f {index[a]} {index[b]} {index[c]}\n")
+    os.replace(tmp, path)
+    return len(hull.vertices)
+
+
+def _is_stale(target, sources):
+    return not os.path.exists(target) or any(os.path.getmtime(s) > os.path.getmtime(target) for s in sources)
+
+
+# --------------------- 2. 缓存版 URDF ---------------------
+def cached_urdf(urdf_path, hull=True, visual=True):
+    """
+    生成（或复用）缓存版 URDF，返回其路径；没有需要改动的地方时返回原路径
+
+    参数
+    ----
+    hull : 把碰撞网格换成凸包 OBJ。只替换质量不为 0 且未标 concave 的 link：PyBullet 对它们
+           本来就用凸包；质量为 0 的静态 link 按三角网格处理，换成凸包会改变几何，保持原样
+    visual : False 时去掉全部 <visual>，给不渲染图像的无界面 worker 用（视觉网格同样要逐个解析）
+    """
+    base_dir = os.path.dirname(os.path.abspath(urdf_path))
+    cache_dir = os.path.join(base_dir, CACHE_DIR_NAME)
+    name, _ = os.path.splitext(os.path.basename(urdf_path))
+    target = os.path.join(cache_dir, name + ("" if hull else ".mesh") + ("" if visual else ".novisual") + ".urdf")
+
+    tree = ET.parse(urdf_path)
+    hulls = []  # (源网格, 凸包 OBJ)
+    for link in tree.getroot().iter("link"):
+        if not visual:
+            for node in link.findall("visual"):
+                link.remove(node)
+        mass = link.find("inertial/mass")
+        if not hull or mass is None or float(mass.get("value", 0)) == 0 or link.get("concave") == "yes":
+            continue
+        for mesh in link.findall("collision/geometry/mesh"):
+            filename = mesh.get("filename", "")
+            if not filename.lower().endswith(MESH_SUFFIXES) or "://" in filename:
+                continue
+            source = os.path.join(base_dir, filename)
+            obj = os.path.join(cache_dir, os.path.splitext(os.path.basename(filename))[0] + ".hull.obj")
+            mesh.set("filename", os.path.basename(obj))
+            hulls.append((source, obj))
+    if not hulls and visual:
+        return urdf_path
+
+    if not _is_stale(target, [urdf_path] + [source for source, _ in hulls]):
+        return target
+
+    os.makedirs(cache_dir, exist_ok=True)
+    for source, obj in hulls:
+        if _is_stale(obj, [source]):
+            write_hull_obj(read_mesh_vertices(source), obj)
+    # 其余相对路径（视觉网格、纹理）改成相对缓存目录，仍指向原文件
+    hull_names = {os.path.basename(obj) for _, obj in hulls}
+    for node in tree.getroot().iter():
+        filename = node.get("filename")
+        if filename and filename not in hull_names and "://" not in filename and not os.path.isabs(filename):
+            node.set("filename", os.path.relpath(os.path.join(base_dir, filename), cache_dir))
+    tmp = f"{target}.{os.getpid()}.tmp"
+    tree.write(tmp, encoding="utf-8", xml_declaration=True)
+    os.replace(tmp, target)
+    return target
+
+
+# --------------------- 3. 场景模板 ---------------------
+class SceneTemplate:
+    # 同一进程里同一网格文件只建一份视觉形状（GUI 下多环境 / 重复构造时有用）
+    urdf_flags = p.URDF_ENABLE_CACHED_GRAPHICS_SHAPES
+
+    def __init__(self, snapshot_path=None, hull_cache=True, visual=True):
+        '''
+        :param snapshot_path: .bullet 快照路径；None 时不存也不读快照。
+                              场景里的物体（URDF、加载顺序）变了要换路径或删掉旧文件
+        :param hull_cache: 是否把碰撞网格换成预先算好的凸包 OBJ
+        :param visual: False 时不加载视觉网格（只适合不看画面、不取相机图像的无界面环境）
+        '''
+        self.snapshot_path = snapshot_path
+        self.hull_cache = hull_cache
+        self.visual = visual
+        # 原路径 → 实际加载的路径
+        self._resolved = {}
+
+    def prepare(self, urdf_paths=SCENE_URDFS):
+        '''
+        预先生成缓存版 URDF 和凸包 OBJ；多进程采集前在主进程调用一次，worker 里只读缓存
+        '''
+        for path in urdf_paths:
+            self.resolve(path)
+
+    def resolve(self, urdf_path):
+        '''
+        :return: 实际加载的 URDF 路径（开启凸包缓存或去掉视觉时为缓存版）
+        '''
+        if urdf_path not in self._resolved:
+            self._resolved[urdf_path] = cached_urdf(urdf_path, hull=self.hull_cache, visual=self.visual)
+        return self._resolved[urdf_path]
+
+    def load_urdf(self, bullet_client, urdf_path, *args, **kwargs):
+        '''
+        按模板加载 URDF：换成缓存路径并带上 urdf_flags，其余参数原样传给 loadURDF
+        '''
+        kwargs["flags"] = kwargs.get("flags", 0) | self.urdf_flags
+        return bullet_client.loadURDF(self.resolve(urdf_path), *args, **kwargs)
+
+    def has_snapshot(self):
+        return self.snapshot_path is not None and os.path.exists(self.snapshot_path)
+
+    def restore(self, bullet_client):
+        '''
+        场景已按相同顺序加载完时，从 .bullet 快照恢复状态
+        :return: 是否恢复成功（没有快照文件时返回 False）
+        '''
+        if not self.has_snapshot():
+            return False
+        bullet_client.restoreState(fileName=self.snapshot_path)
+        return True
+
+    def save(self, bullet_client):
+        '''
+        把当前世界存成 .bullet 快照（已存在则跳过）；先写临时文件再改名，多个 worker 同时存也安全
+        '''
+        if self.snapshot_path is None or self.has_snapshot():
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+        tmp = f"{self.snapshot_path}.{os.getpid()}.bullet"
+        bullet_client.saveBullet(tmp)
+        os.replace(tmp, self.snapshot_path)
@@ -0,0 +1,152 @@
+"""
+预先求解的任务执行器：按阶段声明路点和夹爪动作，逐段下发关节目标、成批步进仿真
+
+原状态机（main_student_14.py 改写前）每个 1 ms 仿真步都要重新查一次逆解、打印一行状态、
+调一次 env.reward()，约 6000 个循环才完成一次抓取放置。这里的流程是：
+    1. 任务 = 若干 Phase，每个 Phase 是一串 Waypoint（末端目标位置、夹爪角度、停留步数）
+    2. 每个路点在开始执行时只求一次逆解（PyBullet IK 以当前关节角为初值，与原状态机一致）
+    3. 可选在关节空间从上一路点线性插值 interp_steps 步，其余步数目标不变，
+       一次下发控制后连续步进（env.dofbot_control(..., steps=n)），中间不读状态
+    4. 成功判定只在阶段结束时做，或按 check_every 步的节奏做；判定成功即停止
+    5. 每个阶段统计逆解 / 仿真 / 判定耗时，format_report 打印成表
+
+    phases = [Phase("pre_grasp", [Waypoint(block_pos + [-0.015, -0.015, 0.045], GRIPPER_OPEN, 1800)]),
+              Phase("grasp", [Waypoint(block_pos + [0, 0, 0.025], GRIPPER_CLOSE, 1200)]), ...]
+    report = TaskExecutor(env).run(phases)
+    print(format_report(report))
+"""
+import time
+
+import numpy as np
+
+
+class Waypoint:
+    def __init__(self, pos, gripper, steps, orn=None, interp_steps=None):
+        '''
+        :param pos: 末端目标位置 xyz
+        :param gripper: 本路点期间的夹爪角度（与上一路点不同即为一次夹爪动作）
+        :param steps: 本路点占用的仿真步数（含插值步）
+        :param orn: 末端目标姿态四元数，None 时只约束位置
+        :param interp_steps: 从上一路点的关节目标线性插值的步数；None 时用执行器的默认值
+        '''
+        self.pos = np.asarray(pos, dtype=np.float64)
+        self.gripper = gripper
+        self.steps = int(steps)
+        self.orn = orn
+        self.interp_steps = interp_steps
+
+
+class Phase:
+    def __init__(self, name, waypoints):
+        '''
+        :param name: 阶段名，用于报告
+        :param waypoints: [Waypoint, ...]，按顺序执行
+        '''
+        self.name = name
+        self.waypoints = list(waypoints)
+
+    @property
+    def steps(self):
+        return sum(wp.steps for wp in self.waypoints)
+
+
+class TaskExecutor:
+    def __init__(self, env, check_every=None, interp_steps=0, stop_on_success=True, success_fn=None,
+                 verbose=False):
+        '''
+        :param env: DofbotEnv
+        :param check_every: 阶段内每多少步判定一次成功；None 时只在每个阶段结束时判定
+        :param interp_steps: 路点之间关节空间插值的默认步数，0 表示目标直接跳到新路点
+                             （关节电机本身有 1 rad/s 的速度上限，与原状态机一致）
+        :param stop_on_success: 判定成功后立即结束，不再执行剩余步数
+        :param success_fn: success_fn(env) -> bool；None 时用 env.reward()
+        :param verbose: 每个路点开始时打印一行状态
+        '''
+        self.env = env
+        self.check_every = check_every
+        self.interp_steps = interp_steps
+        self.stop_on_success = stop_on_success
+        self.success_fn = success_fn if success_fn is not None else (lambda e: e.reward())
+        self.verbose = verbose
+
+    def run(self, phases):
+        '''
+        依次执行各阶段
+        :return: dict，success / steps / wall_s / phases（每阶段一个 dict，见 _run_phase）
+        '''
+        start = time.perf_counter()
+        report = {"success": False, "steps": 0, "phases": []}
+        q_prev = np.asarray(self.env.get_dofbot_jointPoses()[0], dtype=np.float64)
+        for phase in phases:
+            stats, q_prev, success = self._run_phase(phase, q_prev)
+            report["phases"].append(stats)
+            report["steps"] += stats["steps"]
+            report["success"] = success
+            if success and self.stop_on_success:
+                break
+        report["wall_s"] = time.perf_counter() - start
+        return report
+
+    def _run_phase(self, phase, q_prev):
+        '''
+        :return: (stats, 最后一个路点的关节目标, 最近一次判定是否成功)
+                 stats 含 name / steps / checks / ik_s / sim_s / check_s / wall_s
+        '''
+        stats = {"name": phase.name, "steps": 0, "checks": 0, "ik_s": 0.0, "sim_s": 0.0, "check_s": 0.0}
+        start = time.perf_counter()
+        success = False
+        for wp in phase.waypoints:
+            if self.verbose:
+                print(f"[{phase.name}] 目标 {np.round(wp.pos, 4)}，夹爪 {wp.gripper:.3f}，{wp.steps} 步")
+            tic = time.perf_counter()
+            q_target = np.asarray(self.env.dofbot_setInverseKine(wp.pos, wp.orn)[0], dtype=np.float64)
+            stats["ik_s"] += time.perf_counter() - tic
+
+            interp = self.interp_steps if wp.interp_steps is None else wp.interp_steps
+            interp = min(interp, wp.steps)
+            done = 0
+            while done < wp.steps:
+                # 插值段每步一个新目标；之后目标不变，一直步进到下一次判定或路点结束
+                if done < interp:
+                    q, n = q_prev + (q_target - q_prev) * (done + 1) / interp, 1
+                else:
+                    q, n = q_target, wp.steps - done
+                if self.check_every:
+                    n = min(n, self.check_every - stats["steps"] % self.check_every)
+                tic = time.perf_counter()
+                self.env.dofbot_control(q, wp.gripper, steps=n)
+                stats["sim_s"] += time.perf_counter() - tic
+                done += n
+                stats["steps"] += n
+                if self.check_every and stats["steps"] % self.check_every == 0:
+                    success = self._check(stats)
+                    if success and self.stop_on_success:
+                        stats["wall_s"] = time.perf_counter() - start
+                        return stats, q_target, success
+            q_prev = q_target
+
+        if not self.check_every or stats["steps"] % self.check_every:
+            success = self._check(stats)
+        stats["wall_s"] = time.perf_counter() - start
+        return stats, q_prev, success
+
+    def _check(self, stats):
+        tic = time.perf_counter()
+        success = bool(self.success_fn(self.env))
+        stats["check_s"] += time.perf_counter() - tic
+        stats["checks"] += 1
+        return success
+
+
+def format_report(report):
+    '''
+    :param report: TaskExecutor.run 的返回值
+    :return: 每阶段一行的耗时表（ms）
+    '''
+    lines = ["阶段          步数  判定次数   逆解 ms   仿真 ms   判定 ms   合计 ms"]
+    for s in report["phases"]:
+        lines.append(f"{s['name']:<12s}{s['steps']:>6d}{s['checks']:>10d}{s['ik_s'] * 1e3:>10.1f}"
+                     f"{s['sim_s'] * 1e3:>10.1f}{s['check_s'] * 1e3:>10.2f}{s['wall_s'] * 1e3:>10.1f}")
+    lines.append(f"{'成功' if report['success'] else '未成功'}：共 {report['steps']} 步，"
+                 f"墙钟 {report['wall_s'] * 1e3:.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,53 @@
+"""
+Dofbot 运动学工具包（无界面、无 roboticstoolbox 依赖）
+
+    from utils_kine import MDH_PARAMS, JOINT_LL, JOINT_UL, fkine_batch, ik_analytic, jacob0
+
+导入本包只加载 numpy；各子模块在第一次访问对应名字时才导入，
+多进程 worker / 训练脚本里使用不会带来额外启动开销，也不会弹出任何窗口。
+roboticstoolbox 仅在 make_rtb_model / check_against_rtb 等验证函数内部导入。
+"""
+import importlib
+
+# 名字 → 所在子模块
+_EXPORTS = {
+    "utils_fk": [
+        "MDH_PARAMS",
+        "NUM_JOINTS",
+        "JOINT_LL",
+        "JOINT_UL",
+        "mdh_transforms",
+        "fkine_batch",
+        "fkine_pos",
+        "fkine_all",
+        "sample_joints",
+        "make_rtb_model",
+    ],
+    "utils_ik_analytic": ["ik_analytic", "ik_pos_approach", "reachable", "wrap_into_limits"],
+    "utils_ik_lm": ["ik_lm_batch", "pose_error"],
+    "utils_ik_multi": ["ik_candidates", "select_solution", "ik_nearest", "limit_margin"],
+    "utils_jacobian": ["jacob0", "manipulability", "condition_number", "manipulability_q"],
+    "utils_sim_model": ["SIM_MDH_PARAMS", "SIM_BASE", "SIM_LL", "SIM_UL", "SIM_KINE", "SIM_MODEL", "sim_tool", "sim_fkine"],
+    "utils_reach_map": ["ReachMap", "build_reach_map"],
+    "utils_sweep": ["sweep_workspace", "load_sweep"],
+    "utils_workspace_sdf": ["WorkspaceSDF", "build_workspace_sdf"],
+    "utils_ik_cache": ["IKCache"],
+    "utils_pose": ["mean_link_pose"],
+    "utils_path_ik": ["cartesian_path", "ik_path", "time_parameterize", "plan_cartesian"],
+}
+_NAME_TO_MODULE = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_NAME_TO_MODULE)
+
+
+def __getattr__(name):
+    module = _NAME_TO_MODULE.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value  # 之后直接命中，不再经过 __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
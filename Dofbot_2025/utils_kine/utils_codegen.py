@@ -0,0 +1,235 @@
+"""
+Dofbot FK / 雅可比的符号推导与代码生成（sympy + 公共子表达式消去）
+
+五个 MDH 连杆参数固定，末端位姿与雅可比都是关节角的闭式三角函数表达式。
+这里用 sympy 推导全部元素，cse() 提取公共子表达式后生成一个独立的 Python 模块：
+    * 纯 NumPy 版：每个中间量是一次数组运算，没有 4×4 矩阵链乘
+    * Numba 版（可选）：逐样本标量循环 + @njit，需要安装 numba
+生成的模块只依赖 numpy（/ numba），运行时不需要 sympy；
+仓库里提交的 utils_kine/utils_gen_dofbot.py 即由本文件生成：
+    python -m utils_kine.utils_codegen
+"""
+import time
+from pathlib import Path
+
+import numpy as np
+
+from utils_kine.utils_fk import MDH_PARAMS, fkine_batch, sample_joints
+
+GEN_PATH = Path(__file__).resolve().parent / "utils_gen_dofbot.py"
+
+
+# --------------------- 1. 符号推导 ---------------------
+def _const(sp, v):
+    """数值常数 → sympy：π/2 的整数倍取精确值，其余保留原始浮点"""
+    v = float(v)
+    k = v / (np.pi / 2)
+    if abs(k - round(k)) < 1e-12:
+        return sp.Integer(int(round(k))) * sp.pi / 2
+    return sp.Float(repr(v), 17)
+
+
+def derive(params=MDH_PARAMS, base=None, tool=None):
+    """
+    符号推导末端位姿与几何雅可比
+
+    返回
+    ----
+    q : 关节角符号列表
+    T : 4×4 sympy 矩阵
+    J : 6×n sympy 矩阵（前三行线速度，后三行角速度）
+    """
+    import sympy as sp
+
+    n = params.shape[0]
+    q = sp.symbols(f"q0:{n}", real=True)
+    T = sp.eye(4) if base is None else sp.Matrix(base).applyfunc(lambda v: _const(sp, v))
+    frames = []
+    for i, (a, alpha, d, offset) in enumerate(params):
+        a, alpha, d = _const(sp, a), _const(sp, alpha), _const(sp, d)
+        theta = q[i] + _const(sp, offset)
+        ca, sa, ct, st = sp.cos(alpha), sp.sin(alpha), sp.cos(theta), sp.sin(theta)
+        A = sp.Matrix(
+            [
+                [ct, -st, 0, a],
+                [st * ca, ct * ca, -sa, -sa * d],
+                [st * sa, ct * sa, ca, ca * d],
+                [0, 0, 0, 1],
+            ]
+        )
+        T = (T * A).applyfunc(sp.expand)
+        frames.append(T)
+    if tool is not None:
+        T = (T * sp.Matrix(tool).applyfunc(lambda v: _const(sp, v))).applyfunc(sp.expand)
+
+    p = T[:3, 3]
+    cols = []
+    for F in frames:
+        z, o = F[:3, 2], F[:3, 3]
+        cols.append(sp.Matrix.vstack(z.cross(p - o), z))
+    J = sp.Matrix.hstack(*cols).applyfunc(sp.expand)
+    return q, T, J
+
+
+# --------------------- 2. 代码生成 ---------------------
+def _cse_lines(sp, exprs, indent, lib):
+    """对一组表达式做 CSE，返回 (中间量赋值语句, 化简后的表达式字符串)"""
+    replacements, reduced = sp.cse(exprs, symbols=sp.numbered_symbols("x"), optimizations="basic")
+    lines = [f"{indent}{sym} = {sp.pycode(e).replace('math.', lib)}" for sym, e in replacements]
+    return lines, [sp.pycode(e).replace("math.", lib) for e in reduced]
+
+
+def _emit_numpy(sp, name, q, entries, shape):
+    """entries: [((行, 列), expr)]，生成批量 NumPy 函数"""
+    indent = " " * 4
+    lines = [f"def {name}(q):"]
+    lines += [f"{indent}{s} = q[:, {i}]" for i, s in enumerate(q)]
+    body, exprs = _cse_lines(sp, [e for _, e in entries], indent, "np.")
+    lines += body
+    lines.append(f"{indent}out = np.zeros((q.shape[0],) + {shape})")
+    for (idx, _), e in zip(entries, exprs):
+        lines.append(f"{indent}out[:, {', '.join(map(str, idx))}] = {e}")
+    lines.append(f"{indent}return out")
+    return "\n".join(lines)
+
+
+def _emit_numba(sp, name, q, entries, shape):
+    """逐样本标量循环版本，由 @njit 编译"""
+    indent = " " * 8
+    lines = [
+        "@njit(cache=True)",
+        f"def {name}(q):",
+        f"    out = np.zeros((q.shape[0],) + {shape})",
+        "    for i in range(q.shape[0]):",
+    ]
+    lines += [f"{indent}{s} = q[i, {k}]" for k, s in enumerate(q)]
+    body, exprs = _cse_lines(sp, [e for _, e in entries], indent, "math.")
+    lines += body
+    for (idx, _), e in zip(entries, exprs):
+        lines.append(f"{indent}out[i, {', '.join(map(str, idx))}] = {e}")
+    lines.append("    return out")
+    return "\n".join(lines)
+
+
+def generate_module(path=GEN_PATH, params=MDH_PARAMS, base=None, tool=None, numba=False):
+    """
+    推导并写出生成模块
+
+    参数
+    ----
+    path : 输出文件
+    params / base / tool : 运动学模型，常数会被直接折叠进表达式
+    numba : True 时生成 @njit 标量循环版本（需要 numba）
+    返回
+    ----
+    path
+    """
+    import sympy as sp
+
+    start = time.perf_counter()
+    q, T, J = derive(params, base, tool)
+    # 常数行 [0,0,0,1] 和恒为 0 的雅可比元素不生成代码
+    T_entries = [((r, c), T[r, c]) for r in range(3) for c in range(4)]
+    P_entries = [((r,), T[r, 3]) for r in range(3)]
+    J_entries = [((r, c), J[r, c]) for r in range(6) for c in range(J.shape[1]) if J[r, c] != 0]
+
+    emit = _emit_numba if numba else _emit_numpy
+    funcs = [
+        emit(sp, "_fkine", q, T_entries, "(4, 4)"),
+        emit(sp, "_fkine_pos", q, P_entries, "(3,)"),
+        emit(sp, "_jacob0", q, J_entries, f"(6, {J.shape[1]})"),
+    ]
+    header = [
+        '"""',
+        "Dofbot 末端位姿 / 位置 / 几何雅可比的闭式批量内核",
+        "",
+        "本文件由 utils_kine/utils_codegen.py 自动生成（sympy 推导 + CSE），请勿手动修改；",
+        "修改 MDH 参数后重新运行：python -m utils_kine.utils_codegen",
+        '"""',
+    ]
+    imports = ["import math", "", "import numpy as np"] if numba else ["import numpy as np"]
+    if numba:
+        imports.append("from numba import njit")
+    wrappers = '''
+
+def fkine(q):
+    """(N,5) 关节角 → (N,4,4) 末端位姿，输入一维时返回 (4,4)"""
+    single = np.ndim(q) == 1
+    T = _fkine(np.atleast_2d(np.asarray(q, dtype=np.float64)))
+    T[:, 3, 3] = 1.0
+    return T[0] if single else T
+
+
+def fkine_pos(q):
+    """(N,5) 关节角 → (N,3) 末端位置"""
+    single = np.ndim(q) == 1
+    p = _fkine_pos(np.atleast_2d(np.asarray(q, dtype=np.float64)))
+    return p[0] if single else p
+
+
+def jacob0(q):
+    """(N,5) 关节角 → (N,6,5) 基坐标系几何雅可比"""
+    return _jacob0(np.atleast_2d(np.asarray(q, dtype=np.float64)))
+'''
+    src = "\n".join(header) + "\n" + "\n".join(imports) + "\n\n\n" + "\n\n\n".join(funcs) + "\n" + wrappers
+    Path(path).write_text(src, encoding="utf-8")
+    print(f"✅ 已生成 {path}（{len(src.splitlines())} 行，耗时 {time.perf_counter() - start:.1f} 秒）")
+    return path
+
+
+# --------------------- 3. 回归测试与测速 ---------------------
+def check_against_rtb(gen=None, num_samples=1000, seed=0, atol=1e-9):
+    """生成的 fkine / jacob0 与 DHRobot.fkine / jacob0 逐个对比，返回最大误差"""
+    from utils_kine.utils_fk import make_rtb_model
+
+    if gen is None:
+        from utils_kine import utils_gen_dofbot as gen
+
+    robot = make_rtb_model()
+    q = sample_joints(num_samples, rng=np.random.default_rng(seed))
+    T_ref = np.array([robot.fkine(qi).A for qi in q])
+    J_ref = np.array([robot.jacob0(qi) for qi in q])
+    err = max(
+        np.abs(gen.fkine(q) - T_ref).max(),
+        np.abs(gen.fkine_pos(q) - T_ref[:, :3, 3]).max(),
+        np.abs(gen.jacob0(q) - J_ref).max(),
+    )
+    if err > atol:
+        raise AssertionError(f"生成的内核与 DHRobot 不一致，最大误差 {err:.3e}")
+    return float(err)
+
+
+def benchmark(gen=None, num_samples=200_000, repeat=5):
+    """与矩阵链乘版本 (utils_fk / utils_jacobian) 对比吞吐，返回每秒构型数"""
+    from utils_kine.utils_jacobian import jacob0
+
+    if gen is None:
+        from utils_kine import utils_gen_dofbot as gen
+
+    q = sample_joints(num_samples)
+    cases = {
+        "fkine_batch": lambda: fkine_batch(q),
+        "gen.fkine": lambda: gen.fkine(q),
+        "fkine_pos (chain)": lambda: fkine_batch(q)[:, :3, 3],
+        "gen.fkine_pos": lambda: gen.fkine_pos(q),
+        "jacob0 (chain)": lambda: jacob0(q),
+        "gen.jacob0": lambda: gen.jacob0(q),
+    }
+    rates = {}
+    for name, fn in cases.items():
+        fn()  # 预热（Numba 版本在这里编译）
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        rates[name] = num_samples * repeat / (time.perf_counter() - start)
+    return rates
+
+
+if __name__ == "__main__":
+    import importlib
+
+    generate_module()
+    gen = importlib.import_module("utils_kine.utils_gen_dofbot")
+    print(f"✅ 与 DHRobot 对比通过，最大误差 {check_against_rtb(gen):.3e}")
+    for name, rate in benchmark(gen).items():
+        print(f"  {name:>18s}: {rate / 1e6:.2f} M configs/s")
@@ -0,0 +1,202 @@
+"""
+Dofbot 改进DH (MDH) 模型的批量正运动学内核（纯 NumPy）
+
+与 dh_kine_student_hw.py 中 rtb.DHRobot 的五个 RevoluteMDH 连杆完全一致，
+输入 (N,5) 关节角，一次性返回 (N,4,4) 齐次变换或 (N,3) 末端位置，
+没有逐样本的 Python 循环，工作空间遍历 / 数据集生成 / 模型验证都可以直接调用。
+"""
+import time
+
+import numpy as np
+
+# --------------------- 1. Dofbot MDH 参数 ---------------------
+# 每行: [a_{i-1}, alpha_{i-1}, d_i, offset_i]，与 rtb.RevoluteMDH(a, alpha, d, offset) 同序
+MDH_PARAMS = np.array(
+    [
+        [0.0, 0.0, 0.1045, 0.0],
+        [0.0, -np.pi / 2, 0.0, -np.pi / 2],
+        [0.08285, 0.0, 0.0, 0.0],
+        [0.08285, 0.0, 0.0, np.pi / 2],
+        [0.0, np.pi / 2, 0.12842, 0.0],
+    ]
+)
+NUM_JOINTS = MDH_PARAMS.shape[0]
+
+# 关节限位（rad），与 dofbot.ll / dofbot.ul 一致
+JOINT_LL = np.array([-np.pi, 0.0, 0.0, 0.0, 0.0])
+JOINT_UL = np.array([np.pi, np.pi, np.pi, np.pi, np.pi])
+
+
+# --------------------- 2. 单连杆变换 ---------------------
+def mdh_transforms(theta, a, alpha, d, out=None):
+    """
+    批量计算单个 MDH 连杆的齐次变换 Rx(alpha) Tx(a) Rz(theta) Tz(d)
+
+    参数
+    ----
+    theta : (N,) 关节转角（已加 offset）
+    a, alpha, d : 标量，连杆常数
+    out : 可选 (N,4,4) 输出缓冲区
+    返回
+    ----
+    T : (N,4,4)
+    """
+    theta = np.asarray(theta)
+    if out is None:
+        out = np.empty(theta.shape + (4, 4), dtype=theta.dtype)
+    ct, st = np.cos(theta), np.sin(theta)
+    ca, sa = np.cos(alpha), np.sin(alpha)
+
+    out[..., 0, 0] = ct
+    out[..., 0, 1] = -st
+    out[..., 0, 2] = 0.0
+    out[..., 0, 3] = a
+    out[..., 1, 0] = st * ca
+    out[..., 1, 1] = ct * ca
+    out[..., 1, 2] = -sa
+    out[..., 1, 3] = -sa * d
+    out[..., 2, 0] = st * sa
+    out[..., 2, 1] = ct * sa
+    out[..., 2, 2] = ca
+    out[..., 2, 3] = ca * d
+    out[..., 3, :3] = 0.0
+    out[..., 3, 3] = 1.0
+    return out
+
+
+# --------------------- 3. 批量正运动学 ---------------------
+def fkine_batch(q, params=MDH_PARAMS, base=None, tool=None, dtype=np.float64):
+    """
+    批量正运动学
+
+    参数
+    ----
+    q : (5,) 或 (N,5) 关节角（rad）
+    params : (n,4) MDH 参数表，默认 Dofbot
+    base / tool : 可选 (4,4) 基座 / 工具变换
+    dtype : 计算精度，大规模遍历时可用 np.float32 减半内存
+    返回
+    ----
+    T : (4,4) 或 (N,4,4) 末端齐次变换（输入为一维时去掉批维度）
+    """
+    q = np.asarray(q, dtype=dtype)
+    single = q.ndim == 1
+    q = np.atleast_2d(q)
+    if q.shape[1] != params.shape[0]:
+        raise ValueError(f"q 的列数应为 {params.shape[0]}，实际为 {q.shape[1]}")
+
+    n = q.shape[0]
+    # 三块缓冲区轮换使用，链式相乘过程中不再分配内存
+    T = np.empty((n, 4, 4), dtype=dtype)
+    A = np.empty((n, 4, 4), dtype=dtype)
+    B = np.empty((n, 4, 4), dtype=dtype)
+    a, alpha, d, offset = params[0]
+    mdh_transforms(q[:, 0] + offset, a, alpha, d, out=T)
+    if base is not None:
+        T = np.matmul(np.asarray(base, dtype=dtype), T)
+    for i in range(1, params.shape[0]):
+        a, alpha, d, offset = params[i]
+        mdh_transforms(q[:, i] + offset, a, alpha, d, out=A)
+        np.matmul(T, A, out=B)
+        T, B = B, T
+    if tool is not None:
+        T = np.matmul(T, np.asarray(tool, dtype=dtype))
+    return T[0] if single else T
+
+
+def fkine_pos(q, params=MDH_PARAMS, base=None, tool=None, dtype=np.float64):
+    """
+    批量正运动学，只返回末端位置
+
+    返回
+    ----
+    pos : (3,) 或 (N,3)
+    """
+    if params is MDH_PARAMS and base is None and tool is None and dtype == np.float64:
+        # 默认模型走代码生成的闭式内核（utils_codegen），比矩阵链乘快数倍
+        from utils_kine.utils_gen_dofbot import fkine_pos as gen_fkine_pos
+
+        return gen_fkine_pos(q)
+    T = fkine_batch(q, params=params, base=base, tool=tool, dtype=dtype)
+    return np.ascontiguousarray(T[..., :3, 3])
+
+
+def fkine_all(q, params=MDH_PARAMS, base=None, dtype=np.float64):
+    """
+    批量正运动学，返回每个关节坐标系（雅可比 / 碰撞检测等需要中间连杆位姿）
+
+    参数
+    ----
+    q : (N,5) 关节角
+    返回
+    ----
+    frames : (N, n+1, 4, 4)，frames[:, 0] 为基座，frames[:, i] 为关节 i 坐标系
+    """
+    q = np.atleast_2d(np.asarray(q, dtype=dtype))
+    n, dof = q.shape[0], params.shape[0]
+    frames = np.empty((n, dof + 1, 4, 4), dtype=dtype)
+    frames[:, 0] = np.eye(4) if base is None else base
+    A = np.empty((n, 4, 4), dtype=dtype)
+    for i in range(dof):
+        a, alpha, d, offset = params[i]
+        mdh_transforms(q[:, i] + offset, a, alpha, d, out=A)
+        np.matmul(frames[:, i], A, out=frames[:, i + 1])
+    return frames
+
+
+def sample_joints(num_samples, ll=JOINT_LL, ul=JOINT_UL, rng=None):
+    """
+    在关节限位内均匀随机采样
+
+    返回
+    ----
+    q : (num_samples, 5)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    return rng.uniform(ll, ul, size=(num_samples, len(ll)))
+
+
+# --------------------- 4. 与 roboticstoolbox 对照 ---------------------
+def make_rtb_model(params=MDH_PARAMS, name="Dofbot"):
+    """用同一张 MDH 参数表构造 rtb.DHRobot（仅验证时导入 roboticstoolbox）"""
+    import roboticstoolbox as rtb
+
+    return rtb.DHRobot(
+        [rtb.RevoluteMDH(a=a, alpha=alpha, d=d, offset=offset) for a, alpha, d, offset in params],
+        name=name,
+    )
+
+
+def check_against_rtb(num_samples=1000, atol=1e-9, seed=0):
+    """
+    随机关节角下与 DHRobot.fkine 逐个对比
+
+    返回
+    ----
+    max_err : 所有样本齐次矩阵元素的最大绝对误差
+    """
+    robot = make_rtb_model()
+    q = sample_joints(num_samples, rng=np.random.default_rng(seed))
+    T_ref = np.array([robot.fkine(qi).A for qi in q])
+    T = fkine_batch(q)
+    max_err = float(np.abs(T - T_ref).max())
+    if max_err > atol:
+        raise AssertionError(f"批量 FK 与 DHRobot.fkine 不一致，最大误差 {max_err:.3e}")
+    return max_err
+
+
+def benchmark(num_samples=1_000_000, chunk=200_000, dtype=np.float64):
+    """批量 FK 吞吐测试，返回每秒位姿数"""
+    q = sample_joints(num_samples)
+    start = time.perf_counter()
+    for i in range(0, num_samples, chunk):
+        fkine_pos(q[i:i + chunk], dtype=dtype)
+    elapsed = time.perf_counter() - start
+    return num_samples / elapsed
+
+
+if __name__ == "__main__":
+    err = check_against_rtb()
+    print(f"✅ 与 DHRobot.fkine 对比通过，最大误差 {err:.3e}")
+    rate = benchmark()
+    print(f"批量 FK 吞吐：{rate / 1e6:.2f} M poses/s")
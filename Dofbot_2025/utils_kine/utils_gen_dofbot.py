@@ -0,0 +1,169 @@
+"""
+Dofbot 末端位姿 / 位置 / 几何雅可比的闭式批量内核
+
+本文件由 utils_kine/utils_codegen.py 自动生成（sympy 推导 + CSE），请勿手动修改；
+修改 MDH 参数后重新运行：python -m utils_kine.utils_codegen
+"""
+import numpy as np
+
+
+def _fkine(q):
+    q0 = q[:, 0]
+    q1 = q[:, 1]
+    q2 = q[:, 2]
+    q3 = q[:, 3]
+    q4 = q[:, 4]
+    x0 = np.sin(q0)
+    x1 = np.sin(q4)
+    x2 = x0*x1
+    x3 = np.cos(q0)
+    x4 = np.cos(q4)
+    x5 = x3*x4
+    x6 = np.cos(q3)
+    x7 = np.sin(q1)
+    x8 = np.sin(q2)
+    x9 = x7*x8
+    x10 = x6*x9
+    x11 = np.sin(q3)
+    x12 = np.cos(q2)
+    x13 = x12*x7
+    x14 = x11*x13
+    x15 = np.cos(q1)
+    x16 = x15*x8
+    x17 = x11*x16
+    x18 = x0*x4
+    x19 = x1*x3
+    x20 = x12*x15
+    x21 = x20*x6
+    x22 = x13*x6
+    x23 = x16*x6
+    x24 = x11*x20
+    x25 = x11*x9
+    x26 = x22 + x23 + x24 - x25
+    x27 = 0.08285*x7
+    x28 = x12*x27 + 0.08285*x15*x8 + 0.12842*x22 + 0.12842*x23 + 0.12842*x24 - 0.12842*x25 + x27
+    out = np.zeros((q.shape[0],) + (4, 4))
+    out[:, 0, 0] = -x10*x5 + x12*x15*x3*x4*x6 - x14*x5 - x17*x5 - x2
+    out[:, 0, 1] = x10*x19 + x14*x19 + x17*x19 - x18 - x19*x21
+    out[:, 0, 2] = x26*x3
+    out[:, 0, 3] = x28*x3
+    out[:, 1, 0] = x0*x12*x15*x4*x6 + x1*x3 - x10*x18 - x14*x18 - x17*x18
+    out[:, 1, 1] = x10*x2 + x14*x2 + x17*x2 - x2*x21 + x5
+    out[:, 1, 2] = x0*x26
+    out[:, 1, 3] = x0*x28
+    out[:, 2, 0] = -x26*x4
+    out[:, 2, 1] = x1*x26
+    out[:, 2, 2] = -x10 + x12*x15*x6 - x14 - x17
+    out[:, 2, 3] = -0.12842*x10 + 0.12842*x12*x15*x6 + 0.08285*x12*x15 - 0.12842*x14 + 0.08285*x15 - 0.12842*x17 - x27*x8 + 0.1045
+    return out
+
+
+def _fkine_pos(q):
+    q0 = q[:, 0]
+    q1 = q[:, 1]
+    q2 = q[:, 2]
+    q3 = q[:, 3]
+    q4 = q[:, 4]
+    x0 = np.sin(q1)
+    x1 = 0.08285*x0
+    x2 = np.cos(q2)
+    x3 = np.sin(q2)
+    x4 = np.cos(q1)
+    x5 = np.sin(q3)
+    x6 = 0.12842*x0
+    x7 = x3*x6
+    x8 = np.cos(q3)
+    x9 = x2*x6
+    x10 = 0.12842*x4
+    x11 = x10*x3
+    x12 = x1*x2 + x1 + x10*x2*x5 + x11*x8 + 0.08285*x3*x4 - x5*x7 + x8*x9
+    out = np.zeros((q.shape[0],) + (3,))
+    out[:, 0] = x12*np.cos(q0)
+    out[:, 1] = x12*np.sin(q0)
+    out[:, 2] = -x1*x3 - x11*x5 + 0.12842*x2*x4*x8 + 0.08285*x2*x4 + 0.08285*x4 - x5*x9 - x7*x8 + 0.1045
+    return out
+
+
+def _jacob0(q):
+    q0 = q[:, 0]
+    q1 = q[:, 1]
+    q2 = q[:, 2]
+    q3 = q[:, 3]
+    q4 = q[:, 4]
+    x0 = np.sin(q0)
+    x1 = np.sin(q1)
+    x2 = 0.08285*x1
+    x3 = np.cos(q2)
+    x4 = x2*x3
+    x5 = np.sin(q2)
+    x6 = np.cos(q1)
+    x7 = 0.08285*x5*x6
+    x8 = np.sin(q3)
+    x9 = np.cos(q3)
+    x10 = x1*x3
+    x11 = x10*x9
+    x12 = 0.12842*x11
+    x13 = x5*x6
+    x14 = x13*x9
+    x15 = 0.12842*x14
+    x16 = x3*x6*x8
+    x17 = 0.12842*x16
+    x18 = -0.12842*x1*x5*x8 + x12 + x15 + x17 + x2 + x4 + x7
+    x19 = np.cos(q0)
+    x20 = x1*x5
+    x21 = x20*x9
+    x22 = x10*x8
+    x23 = x13*x8
+    x24 = x2*x5 + 0.12842*x21 + 0.12842*x22 + 0.12842*x23 - 0.12842*x3*x6*x9 - 0.08285*x3*x6
+    x25 = -x24 + 0.08285*x6
+    x26 = -x24
+    x27 = -x21 - x22 - x23 + x3*x6*x9
+    x28 = 0.12842*x27
+    x29 = x19**2
+    x30 = x0**2
+    x31 = -0.12842*x1*x29*x5*x8 - 0.12842*x1*x30*x5*x8 + x12*x29 + x12*x30 + x15*x29 + x15*x30 + x17*x29 + x17*x30 + x29*x4 + x29*x7 + x30*x4 + x30*x7
+    x32 = -x0
+    x33 = x11 + x14 + x16 - x20*x8
+    out = np.zeros((q.shape[0],) + (6, 5))
+    out[:, 0, 0] = -x0*x18
+    out[:, 0, 1] = x19*x25
+    out[:, 0, 2] = x19*x26
+    out[:, 0, 3] = x19*x28
+    out[:, 1, 0] = x18*x19
+    out[:, 1, 1] = x0*x25
+    out[:, 1, 2] = x0*x26
+    out[:, 1, 3] = x0*x28
+    out[:, 2, 1] = -x2*x29 - x2*x30 - x31
+    out[:, 2, 2] = -x31
+    out[:, 2, 3] = 0.12842*x1*x29*x5*x8 + 0.12842*x1*x30*x5*x8 - 0.12842*x11*x29 - 0.12842*x11*x30 - 0.12842*x14*x29 - 0.12842*x14*x30 - 0.12842*x16*x29 - 0.12842*x16*x30
+    out[:, 3, 1] = x32
+    out[:, 3, 2] = x32
+    out[:, 3, 3] = x32
+    out[:, 3, 4] = x19*x33
+    out[:, 4, 1] = x19
+    out[:, 4, 2] = x19
+    out[:, 4, 3] = x19
+    out[:, 4, 4] = x0*x33
+    out[:, 5, 0] = 1
+    out[:, 5, 4] = x27
+    return out
+
+
+def fkine(q):
+    """(N,5) 关节角 → (N,4,4) 末端位姿，输入一维时返回 (4,4)"""
+    single = np.ndim(q) == 1
+    T = _fkine(np.atleast_2d(np.asarray(q, dtype=np.float64)))
+    T[:, 3, 3] = 1.0
+    return T[0] if single else T
+
+
+def fkine_pos(q):
+    """(N,5) 关节角 → (N,3) 末端位置"""
+    single = np.ndim(q) == 1
+    p = _fkine_pos(np.atleast_2d(np.asarray(q, dtype=np.float64)))
+    return p[0] if single else p
+
+
+def jacob0(q):
+    """(N,5) 关节角 → (N,6,5) 基坐标系几何雅可比"""
+    return _jacob0(np.atleast_2d(np.asarray(q, dtype=np.float64)))
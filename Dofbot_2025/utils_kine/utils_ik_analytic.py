@@ -0,0 +1,180 @@
+"""
+Dofbot 5 自由度机械臂的批量解析逆运动学（闭式解）
+
+q1 确定之后，关节 2/3/4 的转轴相互平行，肩-肘-腕构成平面二连杆，
+末端再沿接近矢量 (approach, T[:3,2]) 延伸 d5，q5 只绕接近矢量旋转：
+    r   = a2 sin q2 + a3 sin(q2+q3) + d5 sin φ
+    z   = d1 + a2 cos q2 + a3 cos(q2+q3) + d5 cos φ,   φ = q2+q3+q4
+因此每个目标最多 4 组解：q1 ∈ {θ, θ+π} × 肘部 {上, 下}，一次向量化调用全部给出，
+不可达（超出臂长 / 接近矢量不在臂平面内 / 超出关节限位）的分支直接置为无效，不做迭代。
+"""
+import time
+
+import numpy as np
+
+from utils_kine.utils_fk import MDH_PARAMS, JOINT_LL, JOINT_UL, fkine_batch, sample_joints
+
+# --------------------- 1. 几何常数（取自 MDH 参数表） ---------------------
+D1 = MDH_PARAMS[0, 2]  # 基座 → 关节2 高度
+A2 = MDH_PARAMS[2, 0]  # 关节2 → 关节3
+A3 = MDH_PARAMS[3, 0]  # 关节3 → 关节4
+D5 = MDH_PARAMS[4, 2]  # 关节4 → 末端
+
+NUM_BRANCHES = 4  # (q1, q1+π) × (肘上, 肘下)
+ANGLE_TOL = 1e-6  # 限位判定的角度容差：arccos / arctan2 在 ±1、限位 0 / π 附近有 1e-8 量级的误差
+
+
+def wrap_into_limits(q, ll=JOINT_LL, ul=JOINT_UL, tol=ANGLE_TOL):
+    """
+    把角度平移 2kπ 到 [ll, ll+2π) 区间，并判断是否落在 [ll, ul] 内（容差 tol）；
+    容差内越界的值截到 [ll, ul] 上
+
+    返回
+    ----
+    q_wrapped : 与 q 同形状
+    in_limits : bool，与 q 同形状
+    """
+    q_wrapped = ll + np.mod(q - ll, 2 * np.pi)
+    # 略小于 ll 的值（如零位附近 arccos 给出的 -1e-8）取模后落在 ll+2π 附近，平移回 ll
+    near_upper = q_wrapped - 2 * np.pi >= ll - tol
+    q_wrapped = np.where(near_upper, q_wrapped - 2 * np.pi, q_wrapped)
+    in_limits = (q_wrapped >= ll - tol) & (q_wrapped <= ul + tol)
+    q_wrapped = np.where(in_limits, np.clip(q_wrapped, ll, ul), q_wrapped)
+    return q_wrapped, in_limits
+
+
+# --------------------- 2. 核心：位置 + 接近矢量 ---------------------
+def ik_pos_approach(pos, approach, q5=0.0, ll=JOINT_LL, ul=JOINT_UL, tol=1e-3):
+    """
+    由末端位置和接近矢量批量求全部解析解
+
+    参数
+    ----
+    pos : (N,3) 或 (3,) 末端位置
+    approach : (N,3) 或 (3,) 接近矢量（末端 z 轴，自动归一化）
+    q5 : 标量或 (N,) 腕部转角，只给接近矢量时 q5 为自由量
+    ll / ul : 关节限位
+    tol : 接近矢量偏离臂平面的容差（弧度量级）
+    返回
+    ----
+    q : (N,4,5) 全部分支的关节角
+    valid : (N,4) bool，分支可达且在限位内
+    """
+    pos = np.atleast_2d(np.asarray(pos, dtype=np.float64))
+    approach = np.atleast_2d(np.asarray(approach, dtype=np.float64))
+    approach = approach / np.linalg.norm(approach, axis=1, keepdims=True)
+    n = pos.shape[0]
+
+    # 1. q1 的两个候选：指向目标 / 背向目标（再“翻过头顶”）
+    r_xy = np.hypot(pos[:, 0], pos[:, 1])
+    theta = np.arctan2(pos[:, 1], pos[:, 0])
+    # 目标在 z 轴上时由接近矢量的方位角决定 q1，二者都退化则取 0
+    theta_a = np.arctan2(approach[:, 1], approach[:, 0])
+    a_xy = np.hypot(approach[:, 0], approach[:, 1])
+    theta = np.where(r_xy > 1e-9, theta, np.where(a_xy > 1e-9, theta_a, 0.0))
+    q1 = np.stack([theta, theta, theta + np.pi, theta + np.pi], axis=1)  # (N,4)
+    elbow = np.array([1.0, -1.0, 1.0, -1.0])
+
+    c1, s1 = np.cos(q1), np.sin(q1)
+    px, py, pz = (pos[:, i:i + 1] for i in range(3))
+    ax, ay, az = (approach[:, i:i + 1] for i in range(3))
+
+    # 2. 投影到臂平面（带符号的水平距离 r，俯仰角 φ）
+    r = px * c1 + py * s1
+    a_perp = -ax * s1 + ay * c1  # 接近矢量的平面外分量，应为 0
+    phi = np.arctan2(ax * c1 + ay * s1, np.broadcast_to(az, q1.shape))
+
+    # 3. 腕心 → 平面二连杆
+    wr = r - D5 * np.sin(phi)
+    wz = pz - D1 - D5 * np.cos(phi)
+    cos_q3 = (wr ** 2 + wz ** 2 - A2 ** 2 - A3 ** 2) / (2 * A2 * A3)
+    reach_ok = np.abs(cos_q3) <= 1.0 + 1e-9
+    q3 = elbow * np.arccos(np.clip(cos_q3, -1.0, 1.0))
+    q2 = np.arctan2(wr, wz) - np.arctan2(A3 * np.sin(q3), A2 + A3 * np.cos(q3))
+    q4 = phi - q2 - q3
+
+    q5 = np.broadcast_to(np.asarray(q5, dtype=np.float64).reshape(-1, 1), (n, NUM_BRANCHES))
+    q = np.stack([q1, q2, q3, q4, q5], axis=-1)  # (N,4,5)
+
+    q, in_limits = wrap_into_limits(q, ll, ul)
+    valid = reach_ok & (np.abs(a_perp) <= tol) & in_limits.all(axis=-1)
+    return q, valid
+
+
+# --------------------- 3. 齐次变换目标 ---------------------
+def ik_analytic(T, ll=JOINT_LL, ul=JOINT_UL, tol=1e-3):
+    """
+    由 (N,4,4) 目标位姿批量求全部解析解（5 自由度只能满足接近矢量在臂平面内的位姿）
+
+    参数
+    ----
+    T : (4,4) 或 (N,4,4) 目标齐次变换
+    ll / ul : 关节限位
+    tol : 姿态不可达判定容差
+    返回
+    ----
+    q : (N,4,5) 全部分支
+    valid : (N,4) bool
+    """
+    T = np.asarray(T, dtype=np.float64)
+    if T.ndim == 2:
+        T = T[None]
+    pos = T[:, :3, 3]
+    R = T[:, :3, :3]
+
+    # q5 由臂平面内的 y 行决定：Rz(-q1) R 的第 1 行 = [sin q5, cos q5, 0]
+    q, valid = ik_pos_approach(pos, R[:, :, 2], 0.0, ll, ul, tol)
+    c1, s1 = np.cos(q[..., 0]), np.sin(q[..., 0])
+    s5 = -s1 * R[:, 0, 0:1] + c1 * R[:, 1, 0:1]
+    c5 = -s1 * R[:, 0, 1:2] + c1 * R[:, 1, 1:2]
+    q5, q5_ok = wrap_into_limits(np.arctan2(s5, c5), ll[4], ul[4])
+    q[..., 4] = q5
+    return q, valid & q5_ok
+
+
+def reachable(T, ll=JOINT_LL, ul=JOINT_UL, tol=1e-3):
+    """目标是否至少存在一组合法解析解，返回 (N,) bool"""
+    _, valid = ik_analytic(T, ll, ul, tol)
+    return valid.any(axis=1)
+
+
+# --------------------- 4. 验证与测速 ---------------------
+def check_roundtrip(num_samples=10000, seed=0, atol=1e-8, atol_boundary=1e-7):
+    """
+    随机关节角 → FK → 解析 IK → FK，检查每个合法分支都回到同一位姿；
+    另加关节正好在限位上的构型（随机采样几乎不会落到限位上），这些构型上 arccos 的参数接近 ±1，
+    角度误差约 sqrt(eps) ≈ 1.5e-8，回代容差取 atol_boundary
+    """
+    boundary = np.array([
+        [0, 0, 0, 0, 0],
+        [np.pi, np.pi / 2, 0, 0, np.pi],
+        [-np.pi, np.pi / 2, np.pi / 2, 0, 0],
+        [np.pi / 2, np.pi, 0, np.pi, np.pi],
+        [0, np.pi / 2, np.pi, 0, 0],
+    ])
+    q_true = np.vstack([boundary, sample_joints(num_samples, rng=np.random.default_rng(seed))])
+    num_samples = len(q_true)
+    T = fkine_batch(q_true)
+    q, valid = ik_analytic(T)
+    if not valid.any(axis=1).all():
+        raise AssertionError("存在由合法关节角生成、却被判为不可达的目标")
+    T_back = fkine_batch(q.reshape(-1, 5)).reshape(num_samples, NUM_BRANCHES, 4, 4)
+    err = np.where(valid, np.abs(T_back - T[:, None]).max(axis=(2, 3)), 0.0)
+    limit = np.where(np.arange(num_samples) < len(boundary), atol_boundary, atol)
+    if (err.max(axis=1) > limit).any():
+        raise AssertionError(f"解析逆解回代误差过大：{err.max():.3e}")
+    return float(err.max())
+
+
+def benchmark(num_samples=100000):
+    """解析 IK 吞吐测试，返回每秒目标数"""
+    T = fkine_batch(sample_joints(num_samples))
+    start = time.perf_counter()
+    ik_analytic(T)
+    return num_samples / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    err = check_roundtrip()
+    print(f"✅ FK→IK→FK 回代通过，最大误差 {err:.3e}")
+    print(f"解析 IK 吞吐：{benchmark() / 1e6:.2f} M targets/s")
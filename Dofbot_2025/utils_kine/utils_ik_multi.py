@@ -0,0 +1,201 @@
+"""
+多解逆运动学：一次给出目标的全部候选解，再按“离当前构型最近 + 远离关节限位”选一组
+
+5 自由度臂同一目标通常有多组解（q1 / q1+π、肘上 / 肘下、腕部翻转）。
+单次数值 IK 只会收敛到初值附近的某一组，控制器落到坏分支后只能重新求解。这里：
+    1. 候选初值：课程 DH 模型用解析 IK 的全部分支；其他模型（如仿真模型）用当前构型 +
+       一组固定的分散初值；也可追加外部初值（如 ReachMap.nearest_seed）
+    2. 所有 (目标, 初值) 组合拉平成一批，ik_lm_batch 一次精修
+    3. 收敛且在限位内的为有效候选，同一目标下几乎相同的解去重
+    4. select_solution 对 (N,K) 候选一次向量化打分取最优，不再回头重解
+"""
+import time
+
+import numpy as np
+
+from utils_kine.utils_fk import MDH_PARAMS, JOINT_LL, JOINT_UL, fkine_batch, sample_joints
+from utils_kine.utils_ik_analytic import ik_analytic
+from utils_kine.utils_ik_lm import ik_lm_batch
+
+
+# --------------------- 1. 候选解 ---------------------
+def _fixed_seeds(num, ll, ul, seed=0):
+    """固定随机种子生成的分散初值（每次调用相同，结果可复现）"""
+    return sample_joints(num, ll, ul, np.random.default_rng(seed))
+
+
+def ik_candidates(
+    Tep,
+    q_current=None,
+    mask=None,
+    num_seeds=16,
+    seeds=None,
+    tol=1e-8,
+    ilimit=30,
+    dedup_tol=1e-2,
+    params=MDH_PARAMS,
+    base=None,
+    tool=None,
+    ll=JOINT_LL,
+    ul=JOINT_UL,
+):
+    """
+    批量求每个目标的全部候选解
+
+    参数
+    ----
+    Tep : (4,4) 或 (N,4,4) 目标位姿
+    q_current : 可选 (n,) 或 (N,n) 当前构型，会作为一个初值
+    mask : (6,) 误差权重，如 [1,1,1,0,0,0] 只解位置；None 为完整位姿
+    num_seeds : 非解析模型使用的固定分散初值个数
+    seeds : 可选 (N,m,n) 额外初值
+    tol / ilimit : 同 ik_lm_batch（每个初值只做一次搜索，不随机重启）
+    dedup_tol : 同一目标下各关节差都小于该值（rad）的候选视为同一解
+    params / base / tool / ll / ul : 运动学模型，仿真模型可传 **SIM_MODEL
+    返回
+    ----
+    q : (N,K,n) 候选解
+    valid : (N,K) bool，收敛、在限位内且不与前面的候选重复
+    residual : (N,K) 最终误差 E
+    """
+    Tep = np.asarray(Tep, dtype=np.float64)
+    if Tep.ndim == 2:
+        Tep = Tep[None]
+    n_tgt, dof = Tep.shape[0], params.shape[0]
+    ll, ul = np.asarray(ll, dtype=np.float64), np.asarray(ul, dtype=np.float64)
+
+    # 1. 拼出 (N,K,n) 初值
+    groups = []
+    if params is MDH_PARAMS and base is None and tool is None:
+        # 只约束位置时接近矢量不必在臂平面内，tol=inf 让解析解给出投影后的分支
+        q_an, _ = ik_analytic(Tep, ll, ul, tol=1e-3 if mask is None else np.inf)
+        groups.append(q_an)
+    else:
+        groups.append(np.broadcast_to(_fixed_seeds(num_seeds, ll, ul), (n_tgt, num_seeds, dof)))
+    if q_current is not None:
+        groups.append(np.broadcast_to(np.asarray(q_current, dtype=np.float64), (n_tgt, dof))[:, None])
+    if seeds is not None:
+        groups.append(np.asarray(seeds, dtype=np.float64).reshape(n_tgt, -1, dof))
+    q0 = np.concatenate(groups, axis=1)
+    n_cand = q0.shape[1]
+
+    # 2. 全部组合一次精修
+    T_flat = np.repeat(Tep, n_cand, axis=0)
+    q, success, _, _, residual = ik_lm_batch(
+        T_flat, q0=q0.reshape(-1, dof), ilimit=ilimit, slimit=1, tol=tol, mask=mask,
+        tool=tool, params=params, base=base, ll=ll, ul=ul,
+    )
+    q = q.reshape(n_tgt, n_cand, dof)
+    residual = residual.reshape(n_tgt, n_cand)
+    in_limits = ((q >= ll - 1e-9) & (q <= ul + 1e-9)).all(axis=2)
+    valid = success.reshape(n_tgt, n_cand) & in_limits
+
+    # 3. 去重：与任一排在前面的有效候选几乎相同则丢弃
+    diff = np.abs(q[:, :, None] - q[:, None]).max(axis=3)  # (N,K,K)
+    same = (diff < dedup_tol) & valid[:, None, :] & np.tril(np.ones((n_cand, n_cand), dtype=bool), -1)
+    valid &= ~same.any(axis=2)
+    return q, valid, residual
+
+
+# --------------------- 2. 选解 ---------------------
+def limit_margin(q, ll=JOINT_LL, ul=JOINT_UL):
+    """各关节到最近限位的距离占半行程的比例取最小值，∈ [0,1]，越大越远离限位"""
+    ll, ul = np.asarray(ll, dtype=np.float64), np.asarray(ul, dtype=np.float64)
+    half = 0.5 * (ul - ll)
+    return np.clip(np.minimum(q - ll, ul - q) / half, 0.0, 1.0).min(axis=-1)
+
+
+def select_solution(q_all, valid, q_current=None, w_margin=0.1, ll=JOINT_LL, ul=JOINT_UL):
+    """
+    对 (N,K) 候选一次打分，取代价最小的一组
+
+    代价 = 与当前构型的关节空间欧氏距离（rad，无当前构型时为 0）- w_margin × 限位裕度
+
+    参数
+    ----
+    q_all : (N,K,n) 候选解
+    valid : (N,K) bool
+    q_current : 可选 (n,) 或 (N,n) 当前构型
+    w_margin : 限位裕度的权重
+    返回
+    ----
+    q : (N,n) 选中的解（无有效候选的行为 NaN）
+    index : (N,) 选中的候选下标
+    ok : (N,) bool，至少有一个有效候选
+    """
+    cost = -w_margin * limit_margin(q_all, ll, ul)
+    if q_current is not None:
+        q_current = np.asarray(q_current, dtype=np.float64)
+        q_current = q_current[None, None] if q_current.ndim == 1 else q_current[:, None]
+        cost = cost + np.linalg.norm(q_all - q_current, axis=2)
+    cost = np.where(valid, cost, np.inf)
+    index = np.argmin(cost, axis=1)
+    q = q_all[np.arange(len(q_all)), index].copy()
+    ok = valid.any(axis=1)
+    q[~ok] = np.nan
+    return q, index, ok
+
+
+def ik_nearest(Tep, q_current=None, mask=None, w_margin=0.1, **kwargs):
+    """
+    候选解 + 选解一步完成
+
+    参数
+    ----
+    Tep : (4,4) 或 (N,4,4) 目标位姿
+    q_current : 可选 (n,) 或 (N,n) 当前构型
+    mask / w_margin : 见 ik_candidates / select_solution
+    kwargs : 其余参数传给 ik_candidates（num_seeds、seeds、params、base、tool、ll、ul 等）
+    返回
+    ----
+    q : (n,) 或 (N,n)
+    ok : bool 或 (N,) bool
+    """
+    single = np.ndim(Tep) == 2
+    q_all, valid, _ = ik_candidates(Tep, q_current, mask, **kwargs)
+    ll, ul = kwargs.get("ll", JOINT_LL), kwargs.get("ul", JOINT_UL)
+    q, _, ok = select_solution(q_all, valid, q_current, w_margin, ll, ul)
+    return (q[0], bool(ok[0])) if single else (q, ok)
+
+
+# --------------------- 3. 自检 ---------------------
+def check_candidates(num_targets=1000, seed=0, mask=None, **kine):
+    """
+    随机构型 → FK 得到目标 → 求全部候选，检查：
+    生成目标的那组关节角总在候选中（允许去重误差），且选出的解离它最近
+
+    返回
+    ----
+    stats : dict（命中率、平均候选数、耗时）
+    """
+    params = kine.get("params", MDH_PARAMS)
+    ll, ul = kine.get("ll", JOINT_LL), kine.get("ul", JOINT_UL)
+    rng = np.random.default_rng(seed)
+    q_true = sample_joints(num_targets, ll, ul, rng)
+    T = fkine_batch(q_true, params, kine.get("base"), kine.get("tool"))
+
+    start = time.perf_counter()
+    q_all, valid, _ = ik_candidates(T, q_current=None, mask=mask, **kine)
+    elapsed = time.perf_counter() - start
+    # 以真实构型作为“当前构型”选解，应选回它本身（或与之等价的解）
+    q_sel, _, ok = select_solution(q_all, valid, q_true, ll=ll, ul=ul)
+    T_sel = fkine_batch(np.where(ok[:, None], q_sel, q_true), params, kine.get("base"), kine.get("tool"))
+    # 只约束位置时比较末端位置，否则比较完整位姿
+    cols = slice(3, 4) if mask is not None else slice(0, 4)
+    err = np.abs(T_sel[:, :3, cols] - T[:, :3, cols]).max(axis=(1, 2))
+    return {
+        "found": float(ok.mean()),
+        "recovered": float((np.abs(q_sel - q_true).max(axis=1) < 5e-2)[ok].mean()),
+        "mean_candidates": float(valid.sum(axis=1).mean()),
+        "max_err": float(err[ok].max()),
+        "time_ms": elapsed * 1e3,
+    }
+
+
+if __name__ == "__main__":
+    from utils_kine.utils_sim_model import SIM_MODEL
+
+    print("课程 DH 模型（完整位姿）：", check_candidates())
+    print("课程 DH 模型（只约束位置）：", check_candidates(mask=[1, 1, 1, 0, 0, 0]))
+    # 只约束位置时 q5 等有连续多解，“选回原构型”没有意义，仿真模型用完整位姿检查
+    print("仿真模型（完整位姿）：", check_candidates(num_targets=200, **SIM_MODEL))
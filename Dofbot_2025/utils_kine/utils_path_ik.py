@@ -0,0 +1,225 @@
+"""
+笛卡尔路径逆运动学：整条路径一次求解，保证分支连续并满足关节速度限制
+
+状态机 / 实物脚本里各路点各自求逆解、再在关节空间线性插值，末端走的不是直线，
+相邻路点还可能落在不同分支（肘上 / 肘下）上。这里的流程是：
+    1. cartesian_path：位置线性插值 + 姿态 slerp，得到稠密的 (N,4,4) 路径
+    2. 初值：课程 DH 模型用解析 IK 一次给出所有点的全部分支（接近矢量投影到臂平面），
+       再按相邻点关节距离做动态规划选出一条连续分支，然后批量 LM 一次精修全部点；
+       其他模型（如仿真模型）没有解析解，沿路径逐点求解，每点以前一点的解为初值
+    3. LM 不随机重启，避免跳分支。5 自由度臂一般无法同时满足插值出来的完整姿态，
+       默认只约束位置，姿态由初值（解析分支 / 前一点的解）近似保持
+    4. 相邻点关节跳变超过 max_jump 的点，以前一点的解为初值重新求解，直到连续
+    5. 按关节速度上限给每段分配时间，并重采样到固定控制周期，直接下发即可
+"""
+import numpy as np
+from scipy.spatial.transform import Rotation, Slerp
+
+from utils_kine.utils_fk import MDH_PARAMS, JOINT_LL, JOINT_UL
+from utils_kine.utils_ik_analytic import ik_analytic
+from utils_kine.utils_ik_lm import ik_lm_batch
+
+
+# --------------------- 1. 笛卡尔路径 ---------------------
+def cartesian_path(waypoints, step=0.005):
+    """
+    在相邻路点之间按直线 + slerp 稠密插值
+
+    参数
+    ----
+    waypoints : (K,4,4) 路点位姿
+    step : 最大位置步长（m），每段点数按段长自动确定
+    返回
+    ----
+    Tpath : (N,4,4)，包含首尾路点
+    """
+    waypoints = np.asarray(waypoints, dtype=np.float64)
+    segments = []
+    for i in range(len(waypoints) - 1):
+        A, B = waypoints[i], waypoints[i + 1]
+        n = max(2, int(np.ceil(np.linalg.norm(B[:3, 3] - A[:3, 3]) / step)) + 1)
+        s = np.linspace(0.0, 1.0, n)
+        slerp = Slerp([0.0, 1.0], Rotation.from_matrix([A[:3, :3], B[:3, :3]]))
+        T = np.tile(np.eye(4), (n, 1, 1))
+        T[:, :3, :3] = slerp(s).as_matrix()
+        T[:, :3, 3] = A[:3, 3] + s[:, None] * (B[:3, 3] - A[:3, 3])
+        segments.append(T if i == 0 else T[1:])
+    return np.concatenate(segments, axis=0)
+
+
+# --------------------- 2. 初值：解析分支 + 动态规划 ---------------------
+def _angle_dist(qa, qb):
+    """
+    每个关节的绝对角差，不按 2π 取模：关节有限位不能绕圈（q1 ∈ [-π, π]），
+    ±π 两侧的解看似相邻，实际要反向转过近 2π
+    """
+    return np.abs(qa - qb)
+
+
+def continuous_branches(q_all, valid, q_start):
+    """
+    在每个路径点的候选分支中选出一条关节跳变最小的连续序列（Viterbi）
+
+    参数
+    ----
+    q_all : (N,B,n) 候选解
+    valid : (N,B) bool
+    q_start : (n,) 起始构型
+    返回
+    ----
+    q : (N,n) 选中的解（某点无合法分支时沿用上一点）
+    ok : (N,) bool
+    """
+    n_pts, n_br, _ = q_all.shape
+    cost = np.where(valid[0], _angle_dist(q_all[0], q_start).max(axis=1), np.inf)
+    back = np.zeros((n_pts, n_br), dtype=np.int64)
+    for i in range(1, n_pts):
+        # step[j,k]：从上一点分支 j 到当前分支 k 的最大关节跳变
+        step = _angle_dist(q_all[i - 1][:, None], q_all[i][None]).max(axis=2)
+        total = np.maximum(cost[:, None], step)
+        back[i] = np.argmin(total, axis=0)
+        new_cost = total[back[i], np.arange(n_br)]
+        # 当前点没有合法分支：保持上一点的代价，让路径可以“穿过”这个点
+        cost = np.where(valid[i], new_cost, np.where(valid[i].any(), np.inf, cost))
+        if not valid[i].any():
+            back[i] = np.arange(n_br)
+
+    idx = np.empty(n_pts, dtype=np.int64)
+    idx[-1] = np.argmin(cost)
+    for i in range(n_pts - 1, 0, -1):
+        idx[i - 1] = back[i, idx[i]]
+    q = q_all[np.arange(n_pts), idx]
+    ok = valid[np.arange(n_pts), idx]
+    return q, ok
+
+
+# --------------------- 3. 路径 IK ---------------------
+def ik_path(
+    Tpath,
+    q_start,
+    mask=(1, 1, 1, 0, 0, 0),
+    max_jump=0.2,
+    repair_passes=50,
+    tol=1e-8,
+    params=MDH_PARAMS,
+    base=None,
+    tool=None,
+    ll=JOINT_LL,
+    ul=JOINT_UL,
+):
+    """
+    一次求解整条笛卡尔路径
+
+    参数
+    ----
+    Tpath : (N,4,4) 稠密路径（cartesian_path 的输出）
+    q_start : (n,) 当前关节构型
+    mask : (6,) 误差权重，默认只解位置；传 None 则要求完整位姿（仅适用于可达姿态）
+    max_jump : 相邻点允许的最大关节跳变（rad），超过视为跳分支
+    repair_passes : 修复跳变的最大轮数
+    tol / params / base / tool / ll / ul : 同 ik_lm_batch
+    返回
+    ----
+    q : (N,n) 关节轨迹
+    success : (N,) bool，LM 收敛
+    continuous : (N,) bool，与前一点的跳变不超过 max_jump
+    """
+    Tpath = np.asarray(Tpath, dtype=np.float64)
+    q_start = np.asarray(q_start, dtype=np.float64)
+    kine = dict(params=params, base=base, tool=tool, ll=ll, ul=ul)
+
+    # 1. 初值 + 精修，slimit=1 不做随机重启
+    if params is MDH_PARAMS and base is None and tool is None:
+        q_all, valid = ik_analytic(Tpath, ll, ul, tol=np.inf)
+        q0, _ = continuous_branches(q_all, valid, q_start)
+        q, success, _, _, _ = ik_lm_batch(Tpath, q0=q0, slimit=1, tol=tol, mask=mask, **kine)
+    else:
+        # 逐点热启动：每点以前一点的解为初值，相邻点的解自然落在同一分支
+        q = np.empty((len(Tpath), len(q_start)))
+        success = np.zeros(len(Tpath), dtype=bool)
+        prev = q_start
+        for i, T in enumerate(Tpath):
+            q[i], success[i], _, _, _ = ik_lm_batch(T, q0=prev, slimit=1, tol=tol, mask=mask, **kine)
+            prev = q[i]
+
+    # 2. 跳变处以前一点为初值重解；每轮至少把连续段向后推进一个点
+    for _ in range(repair_passes):
+        prev = np.vstack([q_start, q[:-1]])
+        jump = _angle_dist(q, prev).max(axis=1) > max_jump
+        if not jump.any():
+            break
+        idx = np.flatnonzero(jump)
+        q_fix, ok_fix, _, _, _ = ik_lm_batch(Tpath[idx], q0=prev[idx], slimit=1, tol=tol, mask=mask, **kine)
+        if np.array_equal(q_fix, q[idx]):
+            # 不随机重启时重解是确定的，这一轮没有变化之后也不会变
+            break
+        q[idx], success[idx] = q_fix, ok_fix
+
+    prev = np.vstack([q_start, q[:-1]])
+    continuous = _angle_dist(q, prev).max(axis=1) <= max_jump
+    return q, success, continuous
+
+
+# --------------------- 4. 关节速度限制与重采样 ---------------------
+def time_parameterize(q, qd_max, dt, q_start=None):
+    """
+    按关节速度上限为每段分配时间，再重采样到固定控制周期
+
+    参数
+    ----
+    q : (N,n) 关节路径
+    qd_max : 标量或 (n,) 关节速度上限（rad/s）
+    dt : 控制周期（s）
+    q_start : 可选起始构型，会作为轨迹的第一个点
+    返回
+    ----
+    t : (M,) 时间戳，间隔为 dt
+    q_traj : (M,n) 可直接逐拍下发的关节角
+    """
+    if q_start is not None:
+        q = np.vstack([q_start, q])
+    seg = np.abs(np.diff(q, axis=0)) / np.asarray(qd_max, dtype=np.float64)
+    t_knots = np.concatenate([[0.0], np.cumsum(np.maximum(seg.max(axis=1), 1e-9))])
+    t = np.arange(0.0, t_knots[-1] + dt, dt)
+    t[-1] = min(t[-1], t_knots[-1])
+    q_traj = np.stack([np.interp(t, t_knots, q[:, j]) for j in range(q.shape[1])], axis=1)
+    return t, q_traj
+
+
+def plan_cartesian(waypoints, q_start, qd_max, dt, step=0.005, mask=(1, 1, 1, 0, 0, 0), max_jump=0.2, **kine):
+    """
+    路点 → 稠密笛卡尔路径 → 连续关节路径 → 定周期关节轨迹，一次调用完成
+
+    返回
+    ----
+    dict : t, q（定周期轨迹）, q_path / Tpath（稠密路径及其逆解）, success, continuous
+    """
+    Tpath = cartesian_path(waypoints, step)
+    q_path, success, continuous = ik_path(Tpath, q_start, mask=mask, max_jump=max_jump, **kine)
+    t, q = time_parameterize(q_path, qd_max, dt, q_start=q_start)
+    return {"t": t, "q": q, "q_path": q_path, "Tpath": Tpath, "success": success, "continuous": continuous}
+
+
+if __name__ == "__main__":
+    import time
+
+    from utils_kine.utils_sim_model import SIM_MODEL, sim_fkine
+
+    # 仿真模型：从初始构型（各关节 1.57）出发，末端竖直向下走到物块上方再下降
+    q_start = np.full(5, 1.57)
+    T0 = sim_fkine(q_start)
+    down = Rotation.from_euler("x", np.pi).as_matrix()
+    waypoints = [T0]
+    for pos in ([0.2, 0.1, 0.10], [0.2, 0.1, 0.04]):
+        T = np.eye(4)
+        T[:3, :3], T[:3, 3] = down, pos
+        waypoints.append(T)
+
+    start = time.perf_counter()
+    res = plan_cartesian(waypoints, q_start, qd_max=1.0, dt=0.01, **SIM_MODEL)
+    elapsed = time.perf_counter() - start
+    pos_err = np.linalg.norm(sim_fkine(res["q_path"])[:, :3, 3] - res["Tpath"][:, :3, 3], axis=1)
+    print(f"稠密路径 {len(res['Tpath'])} 点，求解耗时 {elapsed * 1e3:.1f} ms")
+    print(f"收敛 {res['success'].mean() * 100:.1f}%，连续 {res['continuous'].mean() * 100:.1f}%，最大位置误差 {pos_err.max() * 1e3:.3f} mm")
+    print(f"定周期轨迹 {len(res['t'])} 拍，时长 {res['t'][-1]:.2f} s，最大关节速度 "
+          f"{np.abs(np.diff(res['q'], axis=0)).max() / 0.01:.3f} rad/s")
@@ -0,0 +1,71 @@
+"""
+夹爪末端位姿：两个指尖 link 位姿求均值（dofbot.get_pose 的热路径，纯标量运算，不经 scipy）
+
+两个单位四元数的均值（即 scipy Rotation.mean 的结果）有闭式解：
+先把 qb 翻到与 qa 同一半球，再对二者之和归一化。
+"""
+import math
+
+
+def mean_link_pose(pa, qa, pb, qb, out, z_offset=0.0):
+    """
+    两个 link 位姿的均值，写入调用方给的缓冲区
+
+    参数
+    ----
+    pa, pb : 两个 link 的位置 (3,)
+    qa, qb : 两个 link 的朝向四元数 [x,y,z,w]
+    out : (7,) 输出缓冲，写入 [x,y,z, qx,qy,qz,qw]
+    z_offset : 沿均值姿态的 z 轴前移的距离（m），用于把参考点移到指尖之间
+    返回
+    ----
+    out
+    """
+    s = 1.0 if qa[0] * qb[0] + qa[1] * qb[1] + qa[2] * qb[2] + qa[3] * qb[3] >= 0.0 else -1.0
+    x, y, z, w = qa[0] + s * qb[0], qa[1] + s * qb[1], qa[2] + s * qb[2], qa[3] + s * qb[3]
+    inv = 1.0 / math.sqrt(x * x + y * y + z * z + w * w)
+    x, y, z, w = x * inv, y * inv, z * inv, w * inv
+
+    px, py, pz = 0.5 * (pa[0] + pb[0]), 0.5 * (pa[1] + pb[1]), 0.5 * (pa[2] + pb[2])
+    if z_offset:
+        # 旋转矩阵第三列 × z_offset
+        px += z_offset * 2.0 * (x * z + w * y)
+        py += z_offset * 2.0 * (y * z - w * x)
+        pz += z_offset * (1.0 - 2.0 * (x * x + y * y))
+
+    out[0], out[1], out[2] = px, py, pz
+    out[3], out[4], out[5], out[6] = x, y, z, w
+    return out
+
+
+if __name__ == "__main__":
+    import time
+
+    import numpy as np
+    from scipy.spatial.transform import Rotation as R
+
+    # 与原 scipy 写法对照：两指朝向相差最多约 30°，且随机翻转四元数符号
+    rng = np.random.default_rng(0)
+    n = 10000
+    qa = R.random(n, random_state=1)
+    qb = qa * R.from_rotvec(rng.normal(scale=0.3, size=(n, 3)))
+    quat_a, quat_b = qa.as_quat(), qb.as_quat() * rng.choice([-1.0, 1.0], size=(n, 1))
+    pa, pb = rng.uniform(-0.3, 0.3, (n, 3)), rng.uniform(-0.3, 0.3, (n, 3))
+
+    out = np.empty(7)
+    err_pos = err_rot = 0.0
+    start = time.perf_counter()
+    for i in range(n):
+        mean_link_pose(pa[i], quat_a[i], pb[i], quat_b[i], out, z_offset=0.02)
+    fast_us = (time.perf_counter() - start) / n * 1e6
+    start = time.perf_counter()
+    for i in range(n):
+        rot = R.from_quat([quat_a[i], quat_b[i]]).mean()
+        ref_pos = rot.apply([0, 0, 0.02]) + np.mean([pa[i], pb[i]], axis=0)
+    scipy_us = (time.perf_counter() - start) / n * 1e6
+    for i in range(0, n, 100):
+        mean_link_pose(pa[i], quat_a[i], pb[i], quat_b[i], out, z_offset=0.02)
+        rot = R.from_quat([quat_a[i], quat_b[i]]).mean()
+        err_pos = max(err_pos, np.abs(rot.apply([0, 0, 0.02]) + (pa[i] + pb[i]) / 2 - out[:3]).max())
+        err_rot = max(err_rot, (rot.inv() * R.from_quat(out[3:])).magnitude())
+    print(f"闭式均值 {fast_us:.2f} μs / 次，scipy {scipy_us:.2f} μs / 次；最大位置差 {err_pos:.2e} m，最大姿态差 {err_rot:.2e} rad")
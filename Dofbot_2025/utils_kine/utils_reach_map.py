@@ -0,0 +1,261 @@
+"""
+Dofbot 工作空间可达性体素索引（一次构建、落盘、O(1) 查询）
+
+构建：在关节限位内分块随机采样 → 批量 FK → 落到体素（可选再按接近矢量俯仰角分桶），
+每个体素记录“是否可达”以及离体素中心最近的那组关节角和它的末端位置，作为 IK 初值。
+落盘：目录下四个 .npy + meta.json，np.load(mmap_mode='r') 直接内存映射，不必整体读入。
+查询：is_reachable / nearest_seed 只做下标运算，任意批量目标不跑求解器。
+"""
+import inspect
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from utils_kine.utils_fk import MDH_PARAMS, JOINT_LL, JOINT_UL, fkine_batch, sample_joints
+
+REACH_FILE = "reach.npy"  # (V,) uint8，1 = 可达
+SEED_FILE = "seed_q.npy"  # (V,5) float32，体素内最靠近中心的关节角
+DIST_FILE = "seed_dist.npy"  # (V,) float32，该关节角到体素中心的距离
+SEED_POS_FILE = "seed_pos.npy"  # (V,3) float32，该关节角对应的末端位置
+META_FILE = "meta.json"
+
+
+def _approach_bin(approach, n_orient_bins):
+    """接近矢量与 +z 的夹角 ∈ [0,π] 均分成 n_orient_bins 个桶"""
+    cos_t = np.clip(approach[..., 2] / np.linalg.norm(approach, axis=-1), -1.0, 1.0)
+    b = (np.arccos(cos_t) / np.pi * n_orient_bins).astype(np.int64)
+    return np.minimum(b, n_orient_bins - 1)
+
+
+# --------------------- 1. 构建 ---------------------
+def _build_meta(resolution, n_orient_bins, num_samples, params, base, tool, ll, ul, seed):
+    """决定索引内容的构建参数（写进 meta.json，load_or_build 据此判断已有索引是否过期）"""
+    return {
+        "resolution": resolution,
+        "n_orient_bins": n_orient_bins,
+        "num_samples": num_samples,
+        "params": np.asarray(params).tolist(),
+        "base": None if base is None else np.asarray(base).tolist(),
+        "tool": None if tool is None else np.asarray(tool).tolist(),
+        "ll": np.asarray(ll).tolist(),
+        "ul": np.asarray(ul).tolist(),
+        "seed": seed,
+    }
+
+
+def build_reach_map(
+    save_dir,
+    resolution=0.01,
+    n_orient_bins=1,
+    num_samples=2_000_000,
+    chunk=200_000,
+    params=MDH_PARAMS,
+    base=None,
+    tool=None,
+    ll=JOINT_LL,
+    ul=JOINT_UL,
+    seed=0,
+):
+    """
+    分块构建可达性体素图并保存
+
+    参数
+    ----
+    save_dir : 输出目录
+    resolution : 体素边长（m）
+    n_orient_bins : 接近矢量俯仰角分桶数，1 表示只看位置
+    num_samples / chunk : 总采样数与每块大小（控制峰值内存）
+    params / base / tool / ll / ul : 运动学模型，仿真模型可传 **SIM_MODEL
+    返回
+    ----
+    ReachMap
+    """
+    save_dir = Path(save_dir)
+    save_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+
+    # 1. 保守包围盒：基座原点 ± 所有连杆长度之和
+    base_t = np.zeros(3) if base is None else np.asarray(base)[:3, 3]
+    tool_len = 0.0 if tool is None else float(np.linalg.norm(np.asarray(tool)[:3, 3]))
+    reach = np.abs(params[:, 0]).sum() + np.abs(params[:, 2]).sum() + tool_len
+    origin = base_t - reach - resolution
+    shape = np.full(3, int(np.ceil((2 * reach + 2 * resolution) / resolution)), dtype=np.int64)
+    n_vox = int(np.prod(shape)) * n_orient_bins
+
+    occupied = np.zeros(n_vox, dtype=np.uint8)
+    seed_q = np.full((n_vox, len(ll)), np.nan, dtype=np.float32)
+    seed_pos = np.full((n_vox, 3), np.nan, dtype=np.float32)
+    best = np.full(n_vox, np.inf, dtype=np.float32)
+
+    rng = np.random.default_rng(seed)
+    for i in range(0, num_samples, chunk):
+        q = sample_joints(min(chunk, num_samples - i), ll, ul, rng)
+        T = fkine_batch(q, params=params, base=base, tool=tool)
+        pos = T[:, :3, 3]
+
+        ijk = np.floor((pos - origin) / resolution).astype(np.int64)
+        flat = np.ravel_multi_index(tuple(ijk.T), shape) * n_orient_bins + _approach_bin(T[:, :3, 2], n_orient_bins)
+        center = origin + (ijk + 0.5) * resolution
+        dist = np.linalg.norm(pos - center, axis=1).astype(np.float32)
+
+        # 2. 本块内每个体素只保留离中心最近的样本，再与已有结果比较
+        order = np.lexsort((dist, flat))
+        flat_s = flat[order]
+        first = np.r_[True, flat_s[1:] != flat_s[:-1]]
+        idx, cand = flat_s[first], order[first]
+        better = dist[cand] < best[idx]
+        idx, cand = idx[better], cand[better]
+        occupied[idx] = 1
+        best[idx] = dist[cand]
+        seed_q[idx] = q[cand]
+        seed_pos[idx] = pos[cand]
+        print(f"  可达性体素图：已采样 {i + len(q)}/{num_samples}")
+
+    np.save(save_dir / REACH_FILE, occupied)
+    np.save(save_dir / SEED_FILE, seed_q)
+    np.save(save_dir / DIST_FILE, best)
+    np.save(save_dir / SEED_POS_FILE, seed_pos)
+    # 同目录下由旧索引派生的可操作度图（utils_jacobian）体素划分可能已不同，一并作废
+    from utils_kine.utils_jacobian import MANIP_FILE, COND_FILE
+
+    for name in (MANIP_FILE, COND_FILE):
+        (save_dir / name).unlink(missing_ok=True)
+    meta = _build_meta(resolution, n_orient_bins, num_samples, params, base, tool, ll, ul, seed)
+    meta.update({
+        "origin": origin.tolist(),
+        "shape": shape.tolist(),
+        "build_time_s": time.perf_counter() - start,
+    })
+    with open(save_dir / META_FILE, "w") as f:
+        json.dump(meta, f, indent=4)
+    print(f"✅ 可达性体素图已保存 → {save_dir}（{occupied.sum()} / {n_vox} 个体素可达）")
+    return ReachMap(save_dir)
+
+
+# --------------------- 2. 查询 ---------------------
+class ReachMap:
+    """
+    已落盘的可达性体素图，数组以内存映射方式打开。
+    """
+
+    def __init__(self, save_dir):
+        self.save_dir = save_dir = Path(save_dir)
+        with open(save_dir / META_FILE, "r") as f:
+            self.meta = json.load(f)
+        self.resolution = self.meta["resolution"]
+        self.origin = np.array(self.meta["origin"])
+        self.shape = np.array(self.meta["shape"])
+        self.n_orient_bins = self.meta["n_orient_bins"]
+        self.occupied = np.load(save_dir / REACH_FILE, mmap_mode="r")
+        self.seed_q = np.load(save_dir / SEED_FILE, mmap_mode="r")
+        self.seed_dist = np.load(save_dir / DIST_FILE, mmap_mode="r")
+        # 旧版索引没有存末端位置，nearest_seed 退回按到体素中心的距离挑选
+        pos_path = save_dir / SEED_POS_FILE
+        self.seed_pos = np.load(pos_path, mmap_mode="r") if pos_path.exists() else None
+        self._manip = None
+
+    @classmethod
+    def load_or_build(cls, save_dir, **build_kwargs):
+        """
+        目录下已有索引且构建参数（分辨率、朝向桶、采样数、运动学模型、限位、种子）与 build_kwargs
+        一致则直接加载，否则重新构建并覆盖
+        """
+        meta_path = Path(save_dir) / META_FILE
+        if meta_path.exists():
+            bound = inspect.signature(build_reach_map).bind(save_dir, **build_kwargs)
+            bound.apply_defaults()
+            expected = _build_meta(**{k: bound.arguments[k] for k in inspect.signature(_build_meta).parameters})
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if {k: meta.get(k) for k in expected} == expected:
+                return cls(save_dir)
+            print(f"可达性体素图 {save_dir} 的构建参数与本次不同，重新构建")
+        return build_reach_map(save_dir, **build_kwargs)
+
+    def voxel_index(self, points):
+        """
+        位置 → 体素下标（不含朝向桶）
+
+        返回
+        ----
+        flat : (N,) 体素下标，包围盒外为 0
+        inside : (N,) bool
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        ijk = np.floor((points - self.origin) / self.resolution).astype(np.int64)
+        inside = ((ijk >= 0) & (ijk < self.shape)).all(axis=1)
+        ijk[~inside] = 0
+        return np.ravel_multi_index(tuple(ijk.T), self.shape), inside
+
+    def _candidates(self, points, approach):
+        """返回 (N,B) 候选下标：给定接近矢量时 B=1，否则遍历所有朝向桶"""
+        flat, inside = self.voxel_index(points)
+        if approach is not None:
+            b = _approach_bin(np.atleast_2d(np.asarray(approach, dtype=np.float64)), self.n_orient_bins)
+            idx = (flat * self.n_orient_bins + b)[:, None]
+        else:
+            idx = flat[:, None] * self.n_orient_bins + np.arange(self.n_orient_bins)
+        return idx, inside
+
+    def is_reachable(self, points, approach=None):
+        """批量判断目标是否落在可达体素内，返回 (N,) bool"""
+        idx, inside = self._candidates(points, approach)
+        return inside & (self.occupied[idx] > 0).any(axis=1)
+
+    def nearest_seed(self, points, approach=None):
+        """
+        批量取目标所在体素中存的关节角作为 IK 初值
+
+        每个（体素, 朝向桶）只存一组关节角（采样时离体素中心最近的那组）；不给 approach 时
+        一个体素有 n_orient_bins 组候选，取末端位置离查询点最近的一组。
+        返回的是体素代表构型，末端与查询点的距离最多约一个体素对角线
+
+        返回
+        ----
+        q : (N,5)，不可达目标对应行为 NaN
+        ok : (N,) bool
+        """
+        idx, inside = self._candidates(points, approach)
+        if self.seed_pos is not None:
+            points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+            dist = np.linalg.norm(np.asarray(self.seed_pos[idx], dtype=np.float64) - points[:, None], axis=2)
+            dist = np.where(inside[:, None] & np.isfinite(dist), dist, np.inf)
+        else:
+            dist = np.where(inside[:, None], self.seed_dist[idx], np.inf)
+        pick = idx[np.arange(len(idx)), np.argmin(dist, axis=1)]
+        q = np.array(self.seed_q[pick], dtype=np.float64)
+        ok = np.isfinite(dist).any(axis=1)
+        q[~ok] = np.nan
+        return q, ok
+
+    def manipulability(self, points, approach=None):
+        """
+        批量查询目标处的最大可操作度（需先运行 utils_jacobian.build_manipulability_map）
+
+        返回
+        ----
+        w : (N,)，不可达或包围盒外为 0
+        """
+        if self._manip is None:
+            from utils_kine.utils_jacobian import MANIP_FILE
+
+            self._manip = np.load(self.save_dir / MANIP_FILE, mmap_mode="r")
+        idx, inside = self._candidates(points, approach)
+        return np.where(inside, np.asarray(self._manip[idx]).max(axis=1), 0.0)
+
+    def occupied_points(self):
+        """所有可达体素中心 (M,3)，可直接代替点云做工作空间可视化"""
+        flat = np.flatnonzero(np.asarray(self.occupied)) // self.n_orient_bins
+        ijk = np.stack(np.unravel_index(np.unique(flat), self.shape), axis=1)
+        return self.origin + (ijk + 0.5) * self.resolution
+
+
+if __name__ == "__main__":
+    reach_map = build_reach_map("results/reach_map/dh_1cm", resolution=0.01, n_orient_bins=4)
+    q = sample_joints(100000)
+    T = fkine_batch(q)
+    start = time.perf_counter()
+    ok = reach_map.is_reachable(T[:, :3, 3], T[:, :3, 2])
+    print(f"10 万次查询耗时 {time.perf_counter() - start:.4f} s，命中率 {ok.mean() * 100:.2f}%")
@@ -0,0 +1,157 @@
+"""
+PyBullet 仿真中 Dofbot 的精确 MDH 模型（与 dofbot_with_gripper.urdf 一致）
+
+课程 DH 模型（utils_fk.MDH_PARAMS）是理想化的教学模型；仿真里的 URDF 还有
+基座 x 偏移、肩部 / 腕部的横向偏置，以及 q=1.57 才竖直的零位约定。
+这里把 URDF 关节链精确换写成 MDH 参数 + 基座变换 + 工具变换，
+关节角直接使用 PyBullet 的关节角（dofbot.ll / dofbot.ul 同一套约定），
+工具点取 dofbot.get_pose() 使用的两指 (link 6 / 8) 质心平均。
+"""
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+
+from utils_kine.utils_fk import fkine_batch
+
+URDF_PATH = Path(__file__).resolve().parent.parent / "models/dofbot_urdf_with_gripper/dofbot_with_gripper.urdf"
+
+# --------------------- 1. URDF → MDH ---------------------
+# 每行: [a_{i-1}, alpha_{i-1}, d_i, offset_i]
+#   d1 = 0.082 + 0.0255        基座 → 关节2 高度
+#   d2 = -0.0183, d4 = 0.0006 + 0.018305   肩 / 腕的横向偏置（几乎相互抵消）
+#   a4 = -0.00216911, d5 = 0.081624        关节4 → 关节5
+# URDF 中的旋转用的是 1.57 而不是 π/2，offset 原样保留以保证与仿真逐位一致
+SIM_MDH_PARAMS = np.array(
+    [
+        [0.0, 0.0, 0.1075, 1.57],
+        [0.0, -np.pi / 2, -0.0183, -1.57 - np.pi / 2],
+        [0.08285, 0.0, 0.0, -1.57],
+        [0.0828499999999967, 0.0, 0.000599999999990254 + 0.0183050000000032, np.pi / 2 - 1.57],
+        [-0.00216911459875002, np.pi / 2, 0.0816240000000007, -1.57],
+    ]
+)
+SIM_BASE = np.array(
+    [
+        [1.0, 0.0, 0.0, 0.073174],
+        [0.0, 1.0, 0.0, 0.0],
+        [0.0, 0.0, 1.0, 0.0],
+        [0.0, 0.0, 0.0, 1.0],
+    ]
+)
+
+# 关节限位，与 Dofbot_2025/dofbot.py 中 dofbot.ll / dofbot.ul 相同
+SIM_LL = np.array([-np.pi, 0.0, 0.0, 0.0, 0.0])
+SIM_UL = np.array([np.pi, np.pi, np.pi, np.pi, np.pi])
+
+# 两指 (link6_left_2 / link6_right_2) 在 link5 坐标系下的关节原点与质心
+_LEFT_J1 = np.array([-0.00108088540125051, 0.012375, 0.025800000000001])
+_LEFT_J2 = np.array([-0.00440000000000004, 0.0186727156720229, 0.0234804107594351])
+_LEFT_COM = np.array([0.0050250597371003, -0.0057226479073307, 0.0213296894547329])
+_RIGHT_J1 = np.array([-0.00173088540125052, -0.012625, 0.025800000000001])
+_RIGHT_J2 = np.array([-0.00400000000000003, -0.01865124444305, 0.023497469666447])
+_RIGHT_COM = np.array([0.0050250597371003, 0.00590754740821361, 0.0212792207328644])
+
+
+def _rot_x(angle):
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([[1.0, 0.0, 0.0], [0.0, c, -s], [0.0, s, c]])
+
+
+def sim_tool(gripper_angle=0.0):
+    """
+    link5 → 夹爪工具点的变换（两指质心平均，姿态与 link5 相同）
+
+    两指各自的两个关节转轴相反、转角相同，姿态相互抵消，只有位置随夹爪角变化。
+    """
+    left = _LEFT_J1 + _rot_x(-gripper_angle) @ (_LEFT_J2 + _rot_x(gripper_angle) @ _LEFT_COM)
+    right = _RIGHT_J1 + _rot_x(gripper_angle) @ (_RIGHT_J2 + _rot_x(-gripper_angle) @ _RIGHT_COM)
+    tool = np.eye(4)
+    tool[:3, 3] = 0.5 * (left + right)
+    return tool
+
+
+SIM_TOOL = sim_tool(0.0)
+
+# 便于整体传参：fkine_batch(q, **SIM_KINE)、build_reach_map(..., **SIM_MODEL)
+SIM_KINE = dict(params=SIM_MDH_PARAMS, base=SIM_BASE, tool=SIM_TOOL)
+SIM_MODEL = dict(SIM_KINE, ll=SIM_LL, ul=SIM_UL)
+
+
+def sim_fkine(q, gripper_angle=0.0):
+    """仿真关节角 → 夹爪工具点位姿 (N,4,4)，对应 dofbot.get_pose()"""
+    return fkine_batch(q, params=SIM_MDH_PARAMS, base=SIM_BASE, tool=sim_tool(gripper_angle))
+
+
+# --------------------- 2. 与 URDF 对照 ---------------------
+def _urdf_joints(urdf_path=URDF_PATH):
+    joints = {}
+    for j in ET.parse(urdf_path).getroot().findall("joint"):
+        origin = j.find("origin")
+        axis = j.find("axis")
+        joints[j.find("child").get("link")] = (
+            j.find("parent").get("link"),
+            np.array(origin.get("xyz").split(), dtype=float),
+            np.array(origin.get("rpy").split(), dtype=float),
+            np.array(axis.get("xyz").split(), dtype=float) if axis is not None else np.zeros(3),
+            j.get("name"),
+        )
+    return joints
+
+
+def _rpy_matrix(rpy):
+    r, p_, y = rpy
+    cr, sr, cp, sp, cy, sy = np.cos(r), np.sin(r), np.cos(p_), np.sin(p_), np.cos(y), np.sin(y)
+    return np.array(
+        [
+            [cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+            [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+            [-sp, cp * sr, cp * cr],
+        ]
+    )
+
+
+def _axis_angle_matrix(axis, angle):
+    k = np.array([[0, -axis[2], axis[1]], [axis[2], 0, -axis[0]], [-axis[1], axis[0], 0]])
+    return np.eye(3) + np.sin(angle) * k + (1 - np.cos(angle)) * k @ k
+
+
+def urdf_link_frame(joints, link, joint_values):
+    """按 URDF 逐级累乘得到 link 坐标系（单个构型，仅用于验证）"""
+    T = np.eye(4)
+    while link in joints:
+        parent, xyz, rpy, axis, name = joints[link]
+        J = np.eye(4)
+        J[:3, :3] = _rpy_matrix(rpy) @ _axis_angle_matrix(axis, joint_values.get(name, 0.0))
+        J[:3, 3] = xyz
+        T = J @ T
+        link = parent
+    return T
+
+
+def check_against_urdf(num_samples=200, seed=0, atol=1e-9):
+    """随机关节角 / 夹爪角下，与 URDF 逐级计算的两指质心平均位置对比，返回最大误差"""
+    joints = _urdf_joints()
+    rng = np.random.default_rng(seed)
+    com = {"link6_left_2": _LEFT_COM, "link6_right_2": _RIGHT_COM}
+    max_err = 0.0
+    for _ in range(num_samples):
+        q = rng.uniform(SIM_LL, SIM_UL)
+        g = rng.uniform(-0.35, 0.35)
+        values = {f"joint{i + 1}": q[i] for i in range(5)}
+        for name in ["link6_left_joint_1", "link6_left_joint_2", "link6_right_joint_1", "link6_right_joint_2"]:
+            values[name] = g
+        p_ref = np.mean(
+            [(urdf_link_frame(joints, link, values) @ np.append(c, 1.0))[:3] for link, c in com.items()],
+            axis=0,
+        )
+        R_ref = urdf_link_frame(joints, "link5", values)[:3, :3]
+        T = sim_fkine(q, g)
+        max_err = max(max_err, np.abs(T[:3, 3] - p_ref).max(), np.abs(T[:3, :3] - R_ref).max())
+    if max_err > atol:
+        raise AssertionError(f"仿真 MDH 模型与 URDF 不一致，最大误差 {max_err:.3e}")
+    return float(max_err)
+
+
+if __name__ == "__main__":
+    print(f"✅ 与 URDF 对比通过，最大误差 {check_against_urdf():.3e}")
@@ -0,0 +1,176 @@
+"""
+关节网格遍历法求工作空间（分块、多进程、流式落盘、可断点续跑）
+
+dh_kine_student_hw.py 原先注释掉的五重循环（10° 步长共 36×18⁴ ≈ 378 万次 dofbot.fkine）改为：
+整个关节网格按扁平下标切成若干块，每块由子进程用批量 FK 一次算完，
+主进程把结果写进 .npy 内存映射文件的对应区间，并在 done.npy 里标记该块已完成。
+中途中断后再次调用同一目录，只会补算未完成的块。
+
+末端点位于关节5 转轴上时（课程 DH 模型、无工具偏置），q5 不影响末端位置，
+默认把这一维折叠掉，点数减少为原来的 1/len(q5_range)。
+"""
+import json
+import multiprocessing as mp
+import time
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from utils_kine.utils_fk import MDH_PARAMS, JOINT_LL, JOINT_UL, fkine_pos
+
+POINTS_FILE = "points.npy"  # (M,3) float32 末端位置，按网格扁平下标排列
+DONE_FILE = "done.npy"  # (num_chunks,) uint8，1 = 该块已写入
+META_FILE = "meta.json"
+
+
+# --------------------- 1. 网格定义 ---------------------
+def grid_axes(step, ll=JOINT_LL, ul=JOINT_UL):
+    """每个关节的遍历角度列表，与原五重循环相同：np.arange(ll, ul, step)"""
+    return [np.arange(lo, hi, step) for lo, hi in zip(ll, ul)]
+
+
+def wrist_affects_position(tool=None):
+    """末端点偏离关节5 转轴时，q5 才会改变末端位置"""
+    return tool is not None and np.hypot(tool[0, 3], tool[1, 3]) > 1e-12
+
+
+def grid_chunk(axes, start, stop):
+    """
+    扁平下标 [start, stop) 对应的关节角
+
+    返回
+    ----
+    q : (stop-start, len(axes))
+    """
+    idx = np.unravel_index(np.arange(start, stop), [len(a) for a in axes])
+    return np.stack([a[i] for a, i in zip(axes, idx)], axis=1)
+
+
+def _sweep_chunk(args):
+    """子进程：计算一块网格的末端位置"""
+    chunk_id, axes, start, stop, kine, n_joints = args
+    q = grid_chunk(axes, start, stop)
+    if q.shape[1] < n_joints:  # 折叠掉的 q5 取 0
+        q = np.concatenate([q, np.zeros((len(q), n_joints - q.shape[1]))], axis=1)
+    return chunk_id, fkine_pos(q, **kine).astype(np.float32)
+
+
+# --------------------- 2. 遍历 ---------------------
+def sweep_workspace(
+    save_dir,
+    step_deg=5.0,
+    chunk=500_000,
+    num_workers=None,
+    params=MDH_PARAMS,
+    base=None,
+    tool=None,
+    ll=JOINT_LL,
+    ul=JOINT_UL,
+    collapse_wrist=True,
+    report_every=1.0,
+):
+    """
+    多进程分块遍历关节网格，结果流式写入 save_dir/points.npy
+
+    参数
+    ----
+    save_dir : 输出目录，已存在且参数一致时从未完成的块继续
+    step_deg : 网格步长（度）
+    chunk : 每块的网格点数（控制子进程峰值内存）
+    num_workers : 进程数，None 为 CPU 核数，1 则在当前进程内计算
+    params / base / tool / ll / ul : 运动学模型，仿真模型可传 **SIM_MODEL
+    collapse_wrist : q5 不影响末端位置时跳过 q5 这一维
+    report_every : 进度打印间隔（秒）
+    返回
+    ----
+    points : (M,3) float32 只读内存映射
+    """
+    save_dir = Path(save_dir)
+    save_dir.mkdir(parents=True, exist_ok=True)
+    axes = grid_axes(np.deg2rad(step_deg), ll, ul)
+    full_total = int(np.prod([len(a) for a in axes]))
+    if collapse_wrist and not wrist_affects_position(tool):
+        axes = axes[:-1]
+    total = int(np.prod([len(a) for a in axes]))
+    num_chunks = -(-total // chunk)
+
+    # 1. 参数一致才续跑，否则重新开始
+    meta = {
+        "step_deg": step_deg,
+        "chunk": chunk,
+        "grid_shape": [len(a) for a in axes],
+        "full_grid_points": full_total,
+        "params": np.asarray(params).tolist(),
+        "base": None if base is None else np.asarray(base).tolist(),
+        "tool": None if tool is None else np.asarray(tool).tolist(),
+        "ll": np.asarray(ll).tolist(),
+        "ul": np.asarray(ul).tolist(),
+    }
+    meta_path = save_dir / META_FILE
+    resume = meta_path.exists() and json.loads(meta_path.read_text()) == meta
+    if resume:
+        points = open_memmap(save_dir / POINTS_FILE, mode="r+")
+        done = np.load(save_dir / DONE_FILE)
+    else:
+        points = open_memmap(save_dir / POINTS_FILE, mode="w+", dtype=np.float32, shape=(total, 3))
+        done = np.zeros(num_chunks, dtype=np.uint8)
+        np.save(save_dir / DONE_FILE, done)
+        meta_path.write_text(json.dumps(meta, indent=4))
+
+    todo = np.flatnonzero(done == 0)
+    print(f"步长: {step_deg} degrees，网格点数: {total}（完整五维网格 {full_total}）")
+    print(f"共 {num_chunks} 块，已完成 {num_chunks - todo.size} 块，待计算 {todo.size} 块")
+
+    # 2. 子进程算 FK，主进程按块写盘并记录进度
+    kine = dict(params=params, base=base, tool=tool)
+    tasks = [
+        (int(c), axes, int(c) * chunk, min((int(c) + 1) * chunk, total), kine, len(ll))
+        for c in todo
+    ]
+    start = last_report = time.perf_counter()
+    finished = 0
+    pool = mp.Pool(num_workers) if num_workers != 1 else None
+    results = map(_sweep_chunk, tasks) if pool is None else pool.imap_unordered(_sweep_chunk, tasks)
+    try:
+        for chunk_id, pos in results:
+            begin = chunk_id * chunk
+            points[begin:begin + len(pos)] = pos
+            points.flush()
+            done[chunk_id] = 1
+            np.save(save_dir / DONE_FILE, done)
+            finished += 1
+
+            now = time.perf_counter()
+            if now - last_report >= report_every or finished == len(tasks):
+                last_report = now
+                n_done = int(done.sum())
+                rate = finished * chunk / (now - start)
+                eta = (num_chunks - n_done) * chunk / rate
+                print(
+                    f"  已计算 {n_done}/{num_chunks} 块 ({n_done / num_chunks * 100:.2f}%)，"
+                    f"{rate / 1e6:.2f} M points/s，预计剩余 {eta:.1f} 秒"
+                )
+    except BaseException:
+        # Ctrl-C / 出错时直接结束子进程，不等剩下的块算完；已写盘的块下次续算
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        raise
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    del points
+    print(f"✅ 工作空间遍历完成 → {save_dir / POINTS_FILE}，耗时 {time.perf_counter() - start:.2f} 秒")
+    return load_sweep(save_dir)
+
+
+def load_sweep(save_dir):
+    """以只读内存映射方式打开遍历结果 (M,3)"""
+    return np.load(Path(save_dir) / POINTS_FILE, mmap_mode="r")
+
+
+if __name__ == "__main__":
+    pts = sweep_workspace("results/workspace_sweep/dh_5deg", step_deg=5.0)
+    print("末端位置范围：", pts.min(axis=0), pts.max(axis=0))
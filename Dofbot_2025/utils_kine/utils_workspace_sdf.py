@@ -0,0 +1,222 @@
+"""
+Dofbot 工作空间边界的有符号距离场（由关节网格遍历结果构建，向量化查询）
+
+utils_sweep 得到的是离散的末端点云，点与点之间有空隙，不能直接当作边界。这里：
+    1. 点云落到体素（分块读取内存映射，不整体载入）
+    2. 形态学闭运算把网格步长造成的空隙补成实心区域，再向外膨胀 dilate 个体素
+       （点云只覆盖网格点所在体素，真实边界在其外侧最多一个体素处）；填洞可选
+    3. 内外两次欧氏距离变换，得到每个体素中心到边界的有符号距离（内部为负）
+    4. 查询时三线性插值，is_reachable 只做数组运算，可在求解器 / 仿真之前过滤整批目标
+包围盒外的点按“盒边界处距离 + 到盒边界的距离”外推，保证仍为正值。
+"""
+import hashlib
+import inspect
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+SDF_FILE = "sdf.npy"  # (X,Y,Z) float32，体素中心到工作空间边界的有符号距离（m），内部为负
+META_FILE = "meta.json"
+
+
+# --------------------- 1. 构建 ---------------------
+def _points_digest(points, num_rows=4096):
+    """点云指纹：等间隔抽取至多 num_rows 行做哈希，不必整体读入内存映射"""
+    rows = np.asarray(points[::max(1, len(points) // num_rows)], dtype=np.float32)
+    return hashlib.sha1(np.ascontiguousarray(rows).tobytes()).hexdigest()
+
+
+def _build_meta(points, resolution, close_iters, dilate, fill_holes, pad):
+    """决定距离场内容的构建参数（写进 meta.json，load_or_build 据此判断已有距离场是否过期）"""
+    return {
+        "resolution": resolution,
+        "close_iters": close_iters,
+        "dilate": dilate,
+        "fill_holes": fill_holes,
+        "pad": pad,
+        "num_points": int(len(points)),
+        "points_digest": _points_digest(points),
+    }
+
+
+def _bounds(points, chunk):
+    """分块求点云包围盒"""
+    lo, hi = np.full(3, np.inf), np.full(3, -np.inf)
+    for i in range(0, len(points), chunk):
+        block = np.asarray(points[i:i + chunk], dtype=np.float64)
+        lo = np.minimum(lo, block.min(axis=0))
+        hi = np.maximum(hi, block.max(axis=0))
+    return lo, hi
+
+
+def build_workspace_sdf(save_dir, points, resolution=0.01, close_iters=2, dilate=1, fill_holes=False, pad=3,
+                        chunk=1_000_000):
+    """
+    由末端点云构建有符号距离场并保存
+
+    参数
+    ----
+    save_dir : 输出目录
+    points : (M,3) 末端位置，一般为 utils_sweep.load_sweep 的内存映射，也可传 ReachMap.occupied_points()
+    resolution : 体素边长（m）
+    close_iters : 闭运算迭代次数，应覆盖网格步长造成的点间空隙（约 臂展×步长 / resolution）
+    dilate : 闭运算后向外膨胀的体素数；0 时边界紧贴遍历点，网格点之间的真实可达点会有少量被判为不可达
+    fill_holes : 是否填实封闭空腔；只有确认工作空间内部没有真实的不可达区域时再打开
+    pad : 包围盒外扩的体素数，需大于 close_iters + dilate，保证形态学运算不被边界截断
+    chunk : 分块读取点云的大小
+    返回
+    ----
+    WorkspaceSDF
+    """
+    from scipy import ndimage
+
+    save_dir = Path(save_dir)
+    save_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+
+    meta = _build_meta(points, resolution, close_iters, dilate, fill_holes, pad)
+
+    # 1. 点云 → 占据体素
+    pad = max(pad, close_iters + dilate + 1)
+    lo, hi = _bounds(points, chunk)
+    origin = lo - pad * resolution
+    shape = np.ceil((hi - lo) / resolution).astype(np.int64) + 2 * pad + 1
+    occupied = np.zeros(shape, dtype=bool)
+    for i in range(0, len(points), chunk):
+        block = np.asarray(points[i:i + chunk], dtype=np.float64)
+        ijk = np.floor((block - origin) / resolution).astype(np.int64)
+        occupied[tuple(ijk.T)] = True
+    n_raw = int(occupied.sum())
+
+    # 2. 补齐网格空隙
+    if close_iters > 0:
+        occupied = ndimage.binary_closing(occupied, iterations=close_iters)
+    if dilate > 0:
+        occupied = ndimage.binary_dilation(occupied, iterations=dilate)
+    if fill_holes:
+        occupied = ndimage.binary_fill_holes(occupied)
+
+    # 3. 有符号距离：外部到最近占据体素、内部到最近空体素，各减半个体素使零点落在体素面上
+    d_out = ndimage.distance_transform_edt(~occupied) * resolution
+    d_in = ndimage.distance_transform_edt(occupied) * resolution
+    sdf = np.where(occupied, 0.5 * resolution - d_in, d_out - 0.5 * resolution).astype(np.float32)
+
+    np.save(save_dir / SDF_FILE, sdf)
+    meta.update({
+        "origin": origin.tolist(),
+        "shape": shape.tolist(),
+        "raw_voxels": n_raw,
+        "filled_voxels": int(occupied.sum()),
+        "build_time_s": time.perf_counter() - start,
+    })
+    with open(save_dir / META_FILE, "w") as f:
+        json.dump(meta, f, indent=4)
+    print(
+        f"✅ 工作空间距离场已保存 → {save_dir}（点云占据 {n_raw} 个体素，补齐后 {meta['filled_voxels']} 个，"
+        f"耗时 {meta['build_time_s']:.2f} 秒）"
+    )
+    return WorkspaceSDF(save_dir)
+
+
+# --------------------- 2. 查询 ---------------------
+class WorkspaceSDF:
+    """
+    已落盘的工作空间有符号距离场，数组以内存映射方式打开。
+    """
+
+    def __init__(self, save_dir):
+        self.save_dir = save_dir = Path(save_dir)
+        with open(save_dir / META_FILE, "r") as f:
+            self.meta = json.load(f)
+        self.resolution = self.meta["resolution"]
+        self.origin = np.array(self.meta["origin"])
+        self.shape = np.array(self.meta["shape"])
+        self.sdf = np.load(save_dir / SDF_FILE, mmap_mode="r")
+
+    @classmethod
+    def load_or_build(cls, save_dir, **build_kwargs):
+        """
+        目录下已有距离场且构建参数（体素、形态学参数、点云数量与指纹）与 build_kwargs 一致则直接加载，
+        否则重新构建并覆盖（build_kwargs 需含 points）
+        """
+        meta_path = Path(save_dir) / META_FILE
+        if meta_path.exists():
+            bound = inspect.signature(build_workspace_sdf).bind(save_dir, **build_kwargs)
+            bound.apply_defaults()
+            expected = _build_meta(**{k: bound.arguments[k] for k in inspect.signature(_build_meta).parameters})
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if {k: meta.get(k) for k in expected} == expected:
+                return cls(save_dir)
+            print(f"工作空间距离场 {save_dir} 的构建参数与本次不同，重新构建")
+        return build_workspace_sdf(save_dir, **build_kwargs)
+
+    def signed_distance(self, points):
+        """
+        批量查询到工作空间边界的有符号距离（三线性插值）
+
+        参数
+        ----
+        points : (3,) 或 (N,3) 目标位置
+        返回
+        ----
+        d : (N,) 内部为负，外部为正（m）
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        # 体素中心坐标系下的连续下标，超出网格的部分截到边界再外推
+        u = (points - self.origin) / self.resolution - 0.5
+        u_clip = np.clip(u, 0.0, self.shape - 1.0)
+        i0 = np.minimum(np.floor(u_clip).astype(np.int64), self.shape - 2)
+        f = u_clip - i0
+
+        d = np.zeros(len(points))
+        for corner in range(8):
+            bits = np.array([(corner >> k) & 1 for k in range(3)])
+            w = np.prod(np.where(bits, f, 1.0 - f), axis=1)
+            ijk = i0 + bits
+            d += w * self.sdf[ijk[:, 0], ijk[:, 1], ijk[:, 2]]
+        return d + np.linalg.norm(u - u_clip, axis=1) * self.resolution
+
+    def is_reachable(self, points, margin=0.0):
+        """
+        批量判断目标是否在工作空间内
+
+        边界由离散网格点近似，两类误判都存在：10° 网格、1 cm 体素、dilate=1 时随机关节构型的末端点
+        约 0.1% 被判为不可达（dilate=0 时约 0.85%），边界外约一个体素以内的点可能被判为可达。
+        用于求解前的粗筛时取 margin=0 或略小于 0；需要确保可达时配合逆解结果使用
+
+        参数
+        ----
+        points : (3,) 或 (N,3) 目标位置
+        margin : 与边界保持的最小距离（m），>0 更保守，<0 放宽
+        返回
+        ----
+        ok : (N,) bool
+        """
+        return self.signed_distance(points) <= -margin
+
+
+if __name__ == "__main__":
+    from utils_kine.utils_fk import fkine_pos, sample_joints
+    from utils_kine.utils_reach_map import ReachMap
+    from utils_kine.utils_sweep import sweep_workspace
+
+    # 10° 网格、臂展约 0.4 m → 点间空隙约 0.07 m，1 cm 体素下闭运算取 4 次
+    sweep = sweep_workspace("results/workspace_sweep/dh_10deg", step_deg=10.0, num_workers=1)
+    ws = build_workspace_sdf("results/workspace_sdf/dh_10deg", sweep, resolution=0.01, close_iters=4)
+
+    # 1. 随机关节构型的末端点应全部判为可达
+    inside = fkine_pos(sample_joints(100000, rng=np.random.default_rng(1)))
+    start = time.perf_counter()
+    ok = ws.is_reachable(inside)
+    print(f"10 万次查询耗时 {time.perf_counter() - start:.4f} s，随机 FK 点判为可达 {ok.mean() * 100:.2f}%")
+
+    # 2. 包围盒内均匀随机点，与采样式可达性体素图对照
+    rng = np.random.default_rng(2)
+    probe = rng.uniform(-0.45, 0.45, size=(100000, 3))
+    ok_sdf = ws.is_reachable(probe)
+    reach_map = ReachMap.load_or_build("results/reach_map/dh_1cm", resolution=0.01, n_orient_bins=4)
+    ok_map = reach_map.is_reachable(probe)
+    print(f"与可达性体素图一致率 {(ok_sdf == ok_map).mean() * 100:.2f}%，距离场判为可达 {ok_sdf.mean() * 100:.2f}%")
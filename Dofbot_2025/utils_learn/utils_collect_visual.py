@@ -5,6 +5,7 @@ import matplotlib.pyplot as plt
 from pathlib import Path
 from typing import Optional
 from dofbot import DofbotEnv, any_self_collision
+from scene_cache import SceneTemplate
 from scipy.spatial.transform import Rotation
 import torch
 import shutil
@@ -53,9 +54,11 @@ CHUNK_SIZE   = 1000          # 每多少条刷一次盘
 WORK_DIR     = Path('dataset') # 顶层目录
 
 # ---------- 数据集采集仿真函数 ----------
-def worker(rank: int, samples_per_worker: int, flush_every: int, run_tag: str):
+def worker(rank: int, samples_per_worker: int, flush_every: int, run_tag: str,
+           scene: Optional[SceneTemplate] = None):
     """
     每个 worker 独享一个分片 csv，边采边写。
+    scene 为主进程 prepare 过的场景模板，None 时用 DofbotEnv 的默认模板。
     返回 (rank, 实际写入条数, 分片文件绝对路径)
     """
     chunk_file = WORK_DIR / run_tag / f'chunk_{rank:03d}.csv'
@@ -71,8 +74,9 @@ def worker(rank: int, samples_per_worker: int, flush_every: int, run_tag: str):
     # 否则重新采集
     gui_options = f"--window_port={6660 + rank} --width=640 --height=480"
     conn = p.connect(p.DIRECT, options=gui_options)
-    env = DofbotEnv(physicsClientId=conn)
+    env = DofbotEnv(physicsClientId=conn, scene=scene)
     env.reset()
+    print(f'[Worker {rank}] 环境构造耗时 {env.build_time * 1e3:.0f} ms')
 
     ll = [-np.pi, 0, 0, 0, -np.pi]
     ul = [np.pi, np.pi, np.pi, np.pi, np.pi]
@@ -102,7 +106,7 @@ def worker(rank: int, samples_per_worker: int, flush_every: int, run_tag: str):
                 #     # print(f"[Worker {rank}][Local {i + 1}] unreachable. Retrying...")
                 #     break
                 #
-                # if any_self_collision(env._dofbot.dofbotUid, safety_margin=0.001):
+                # if any_self_collision(env._dofbot.dofbotUid, safety_margin=0.001, physicsClientId=conn):
                 #     attempts = max_attempts
                 #     # print(f"[Worker {rank}][Local {i + 1}] Collision. Retrying...")
                 #     break
@@ -158,10 +162,14 @@ def collect_dofbot_dataset(num_envs: int = 2,
     run_tag = datetime.now().strftime("%Y%m%d_%H%M%S")
     samples_per_worker = (num_samples + num_envs - 1) // num_envs
 
+    # 0. 采集只读关节角和位姿，不加载视觉网格；凸包缓存在主进程建好，worker 直接读
+    scene = SceneTemplate(visual=False)
+    scene.prepare()
+
     # 1. 启动所有 worker（同步返回分片信息）
     with mp.Pool(num_envs) as pool:
         results = [
-            pool.apply_async(worker, (r, samples_per_worker, flush_every, run_tag))
+            pool.apply_async(worker, (r, samples_per_worker, flush_every, run_tag, scene))
             for r in range(num_envs)
         ]
         chunk_info = [r.get() for r in results]  # [(rank, cnt, path), ...]
@@ -0,0 +1,383 @@
+"""
+离屏录像：ER_TINY_RENDERER 按步长抽帧，帧 / 状态先进预分配的环形缓冲区，后台编码，不依赖 GUI
+
+原来的录像是 p.STATE_LOGGING_VIDEO_MP4，只能在 GUI 下用，而且每帧都抓屏；无界面、CI 上录不了。
+这里的流程是：
+    1. 每 stride 个仿真步抓一帧（env.add_step_hook 挂在步进循环里），相机矩阵只算一次
+    2. process=False：在调用线程里用 TINY 渲染器渲染，写进 (buffer_size,H,W,3) 的帧环形缓冲区，
+       后台线程取帧送给编码器；pybullet 客户端不能跨线程并发调用，所以渲染留在调用线程
+    3. process=True：调用线程只读各物体的位姿和关节角（几 μs），写进共享内存里的状态环形缓冲区；
+       镜像进程自己连一个 DIRECT 客户端加载同样的场景，按状态摆好后渲染、编码，仿真完全不等渲染
+    4. 缓冲区满时：env 按实时节奏运行（realtime_factor > 0）时默认丢帧并计数，不拖慢仿真；
+       不限速（无界面默认 realtime_factor=0）时默认等待空位，仿真没有截止时刻，丢帧省不下任何东西。
+       进程模式先等镜像进程加载完场景再开始抓帧；close() 等编码收尾
+    5. 编码器：有 ffmpeg 就用管道送 rawvideo；否则用 imageio（若已安装）；都没有就写 .rgb24 裸帧，
+       关闭时打印转码命令
+
+    with VideoRecorder.from_env(env, "results/record/run.mp4") as recorder:
+        ...  # 正常调用 env.dofbot_control / TaskExecutor
+    print(recorder.stats)
+"""
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import numpy as np
+import pybullet as p
+
+from dofbot import BulletClient
+from scene_cache import SceneTemplate
+
+# 与 DofbotEnv 的 GUI 调试相机一致
+DEFAULT_CAMERA = {"distance": 1.0, "yaw": 90, "pitch": -40, "target": (0, 0, 0), "fov": 60,
+                  "near": 0.01, "far": 10.0}
+
+
+# --------------------- 1. 编码器 ---------------------
+class _FfmpegWriter:
+    def __init__(self, path, width, height, fps, ffmpeg):
+        self.path = path
+        self._proc = subprocess.Popen(
+            [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+             "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+             "-an", "-vcodec", "libx264", "-pix_fmt", "yuv420p", path],
+            stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self._proc.stdin.write(frame.tobytes())
+
+    def close(self):
+        self._proc.stdin.close()
+        self._proc.wait()
+
+
+class _ImageioWriter:
+    def __init__(self, path, fps, imageio):
+        self.path = path
+        self._writer = imageio.get_writer(path, fps=fps)
+
+    def write(self, frame):
+        self._writer.append_data(frame)
+
+    def close(self):
+        self._writer.close()
+
+
+class _RawWriter:
+    def __init__(self, path, width, height, fps):
+        self.path = os.path.splitext(path)[0] + ".rgb24"
+        self._size, self._fps = f"{width}x{height}", fps
+        self._file = open(self.path, "wb")
+
+    def write(self, frame):
+        self._file.write(frame.tobytes())
+
+    def close(self):
+        self._file.close()
+        print(f"未找到 ffmpeg / imageio，已写出裸帧 {self.path}，转码：\n"
+              f"  ffmpeg -f rawvideo -pix_fmt rgb24 -s {self._size} -r {self._fps} -i {self.path} "
+              f"-pix_fmt yuv420p {os.path.splitext(self.path)[0]}.mp4")
+
+
+def open_writer(path, width, height, fps):
+    '''
+    按 ffmpeg → imageio → 裸帧的顺序选编码器
+    :return: 有 write(frame) / close() 和 path 属性的对象
+    '''
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is not None:
+        return _FfmpegWriter(path, width, height, fps, ffmpeg)
+    try:
+        import imageio
+    except ImportError:
+        return _RawWriter(path, width, height, fps)
+    return _ImageioWriter(path, fps, imageio)
+
+
+# --------------------- 2. 渲染 / 状态 ---------------------
+def camera_matrices(camera, width, height):
+    '''
+    :param camera: 与 DEFAULT_CAMERA 同样的键，缺的键取默认值
+    :return: (view_matrix, projection_matrix)
+    '''
+    cam = dict(DEFAULT_CAMERA, **(camera or {}))
+    view = p.computeViewMatrixFromYawPitchRoll(cam["target"], cam["distance"], cam["yaw"], cam["pitch"], 0, 2)
+    proj = p.computeProjectionMatrixFOV(cam["fov"], width / height, cam["near"], cam["far"])
+    return view, proj
+
+
+def render_into(bullet_client, out, view, proj):
+    '''
+    用 TINY 渲染器离屏渲染一帧，RGB 写进 out (H,W,3)
+    '''
+    height, width = out.shape[:2]
+    rgba = bullet_client.getCameraImage(width, height, view, proj, shadow=0, renderer=p.ER_TINY_RENDERER,
+                                        flags=p.ER_NO_SEGMENTATION_MASK)[2]
+    out[...] = np.reshape(rgba, (height, width, 4))[:, :, :3]
+
+
+def _state_layout(bullet_client, bodies):
+    '''
+    :return: [(body, 该物体状态在行里的起始位置, 关节数)], 行长
+    '''
+    layout, offset = [], 0
+    for body in bodies:
+        num_joints = bullet_client.getNumJoints(body)
+        layout.append((body, offset, num_joints))
+        offset += 7 + num_joints
+    return layout, offset
+
+
+def read_state(bullet_client, layout, out):
+    '''
+    各物体的基座位姿 (7) + 关节角，依次写进 out 这一行
+    '''
+    for body, offset, num_joints in layout:
+        pos, orn = bullet_client.getBasePositionAndOrientation(body)
+        out[offset:offset + 3] = pos
+        out[offset + 3:offset + 7] = orn
+        if num_joints:
+            out[offset + 7:offset + 7 + num_joints] = [s[0] for s in
+                                                       bullet_client.getJointStates(body, range(num_joints))]
+
+
+def apply_state(bullet_client, layout, row):
+    for body, offset, num_joints in layout:
+        bullet_client.resetBasePositionAndOrientation(body, row[offset:offset + 3], row[offset + 3:offset + 7])
+        for j in range(num_joints):
+            bullet_client.resetJointState(body, j, row[offset + 7 + j])
+
+
+# --------------------- 3. 后台编码 ---------------------
+def _encode_frames(frames, ready, free, writer, stats):
+    '''
+    线程模式：从 ready 取帧的槽位编码，编完把槽位还给 free；收到 None 结束
+    '''
+    while True:
+        slot = ready.get()
+        if slot is None:
+            break
+        tic = time.perf_counter()
+        writer.write(frames[slot])
+        stats["encode_s"] += time.perf_counter() - tic
+        stats["encoded"] += 1
+        free.put(slot)
+    writer.close()
+
+
+def _mirror_worker(spec, scene, shm_name, shape, ready, free, done, path, width, height, fps, view, proj):
+    '''
+    进程模式：加载镜像场景，按共享内存里的状态逐帧摆好、渲染、编码
+    :param spec: [(urdf_path, pos, orn, useFixedBase, 是否同步状态)]
+    '''
+    from multiprocessing import shared_memory
+
+    client = p.connect(p.DIRECT)
+    bc = BulletClient(client)
+    synced = []
+    for urdf_path, pos, orn, fixed, sync in spec:
+        body = scene.load_urdf(bc, urdf_path, pos, orn, useFixedBase=fixed)
+        if sync:
+            synced.append(body)
+    layout, _ = _state_layout(bc, synced)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    states = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    writer = open_writer(path, width, height, fps)
+    stats = {"encoded": 0, "render_s": 0.0, "encode_s": 0.0}
+    # 场景和编码器都已就绪，主进程收到后才开始抓帧
+    done.put("ready")
+    try:
+        while True:
+            slot = ready.get()
+            if slot is None:
+                break
+            tic = time.perf_counter()
+            apply_state(bc, layout, states[slot])
+            free.put(slot)
+            render_into(bc, frame, view, proj)
+            toc = time.perf_counter()
+            writer.write(frame)
+            stats["render_s"] += toc - tic
+            stats["encode_s"] += time.perf_counter() - toc
+            stats["encoded"] += 1
+    finally:
+        writer.close()
+        del states
+        shm.close()
+        p.disconnect(physicsClientId=client)
+        stats["path"] = writer.path
+        done.put(stats)
+
+
+# --------------------- 4. 录像器 ---------------------
+class VideoRecorder:
+    def __init__(self, path, physicsClientId=0, width=320, height=240, stride=33, fps=30, camera=None,
+                 buffer_size=32, drop_when_full=None, mirror=None, scene=None):
+        '''
+        :param path: 输出视频路径（.mp4；没有 ffmpeg / imageio 时改写同名 .rgb24）
+        :param physicsClientId: 被录制的仿真客户端
+        :param width, height: 画面分辨率
+        :param stride: 每多少个仿真步抓一帧（DofbotEnv 步长 1 ms，33 步 ≈ 30 帧/秒仿真时间）
+        :param fps: 视频帧率
+        :param camera: 相机参数，见 DEFAULT_CAMERA
+        :param buffer_size: 环形缓冲区槽位数
+        :param drop_when_full: 缓冲区满时丢帧（True）还是等编码腾出空位（False）；
+                               None 时 attach 到按实时节奏运行的 env（realtime_factor > 0）才丢帧，否则等待
+        :param mirror: None 时在本进程渲染（线程编码）；否则为 [(urdf_path, pos, orn, useFixedBase, body)]，
+                       body 为仿真里对应的 id（None 表示静态物体，不同步），由镜像进程渲染和编码
+        :param scene: 镜像进程加载 URDF 用的 SceneTemplate；None 时用默认模板
+        '''
+        self.path = path
+        self.width, self.height = width, height
+        self.stride = max(int(stride), 1)
+        self._drop_policy = drop_when_full
+        self.drop_when_full = bool(drop_when_full)
+        self._p = BulletClient(physicsClientId)
+        self._view, self._proj = camera_matrices(camera, width, height)
+        self._steps = 0
+        self._env = None
+        self.stats = {"captured": 0, "dropped": 0, "capture_s": 0.0}
+
+        if mirror is None:
+            self._frames = np.empty((buffer_size, height, width, 3), dtype=np.uint8)
+            self._ready, self._free = queue.Queue(), queue.Queue()
+            writer = open_writer(path, width, height, fps)
+            self._worker_stats = {"encoded": 0, "encode_s": 0.0, "path": writer.path}
+            self._worker = threading.Thread(target=_encode_frames, daemon=True,
+                                            args=(self._frames, self._ready, self._free, writer, self._worker_stats))
+            self._shm = None
+        else:
+            from multiprocessing import shared_memory
+
+            self._layout, row = _state_layout(self._p, [body for *_, body in mirror if body is not None])
+            self._shm = shared_memory.SharedMemory(create=True, size=buffer_size * row * 8)
+            self._frames = np.ndarray((buffer_size, row), dtype=np.float64, buffer=self._shm.buf)
+            ctx = mp.get_context("spawn")
+            self._ready, self._free, self._done = ctx.Queue(), ctx.Queue(), ctx.Queue()
+            spec = [(urdf_path, pos, orn, fixed, body is not None) for urdf_path, pos, orn, fixed, body in mirror]
+            self._worker = ctx.Process(
+                target=_mirror_worker, daemon=True,
+                args=(spec, scene if scene is not None else SceneTemplate(), self._shm.name, self._frames.shape,
+                      self._ready, self._free, self._done, path, width, height, fps, self._view, self._proj))
+        for slot in range(buffer_size):
+            self._free.put(slot)
+        if self._shm is None:
+            self._worker.start()
+        else:
+            try:
+                self._worker.start()
+                if self._receive() != "ready":
+                    raise RuntimeError("镜像渲染进程未能就绪")
+            except BaseException:
+                if self._worker.is_alive():
+                    self._worker.kill()
+                del self._frames
+                self._shm.close()
+                self._shm.unlink()
+                raise
+
+    @classmethod
+    def from_env(cls, env, path, process=True, **kwargs):
+        '''
+        录制 DofbotEnv：attach 到 env 的步进循环；process=True 时镜像场景里的地面、桌子、机器人和物块
+        '''
+        mirror = None
+        if process:
+            mirror = [("models/floor.urdf", [0, 0, -0.625], [0, 0, 0, 1], True, None),
+                      ("models/table_collision/table.urdf", [0.5, 0, -0.625], [0, 0, 0, 1], True, None),
+                      ("models/dofbot_urdf_with_gripper/dofbot_with_gripper.urdf", [0, 0, 0], [0, 0, 0, 1], True,
+                       env._dofbot.dofbotUid)]
+            mirror += [(obj.urdfPath, [0, 0, 0], [0, 0, 0, 1], False, obj.id) for obj in env._objects]
+            kwargs.setdefault("scene", env._scene)
+        recorder = cls(path, env.physicsClient, mirror=mirror, **kwargs)
+        recorder.attach(env)
+        return recorder
+
+    def attach(self, env):
+        '''
+        挂到 env 的步进循环上，并立即抓第一帧
+        '''
+        self._env = env
+        if self._drop_policy is None:
+            self.drop_when_full = bool(env.realtime_factor and env.realtime_factor > 0)
+        env.add_step_hook(self.on_step)
+        self.capture()
+
+    def on_step(self):
+        self._steps += 1
+        if self._steps % self.stride == 0:
+            self.capture()
+
+    def capture(self):
+        '''
+        抓一帧：线程模式渲染进帧缓冲区，进程模式只写状态；没有空槽位时按 drop_when_full 丢帧或等待
+        '''
+        tic = time.perf_counter()
+        try:
+            slot = self._free.get(block=not self.drop_when_full)
+        except queue.Empty:
+            self.stats["dropped"] += 1
+            return False
+        if self._shm is None:
+            render_into(self._p, self._frames[slot], self._view, self._proj)
+        else:
+            read_state(self._p, self._layout, self._frames[slot])
+        self._ready.put(slot)
+        self.stats["captured"] += 1
+        self.stats["capture_s"] += time.perf_counter() - tic
+        return True
+
+    def _receive(self):
+        '''
+        等镜像进程的下一条消息（"ready" 或结束时的统计）；进程已退出且没有消息时报错
+        '''
+        while True:
+            try:
+                return self._done.get(timeout=0.5)
+            except queue.Empty:
+                if self._worker.is_alive():
+                    continue
+            # 进程退出前放进队列的消息可能还在管道里，再等一次
+            try:
+                return self._done.get(timeout=1.0)
+            except queue.Empty:
+                raise RuntimeError(f"镜像渲染进程异常退出（exitcode={self._worker.exitcode}）") from None
+
+    def close(self):
+        '''
+        从 env 上摘下，等后台编码完剩余的帧；stats 里补上编码端的统计
+        '''
+        if self._worker is None:
+            return self.stats
+        if self._env is not None:
+            self._env.remove_step_hook(self.on_step)
+            self._env = None
+        self._ready.put(None)
+        if self._shm is None:
+            self._worker.join()
+            self.stats.update(self._worker_stats)
+        else:
+            # 先取走结束消息再 join：子进程要等队列里的数据送进管道才能退出
+            try:
+                self.stats.update(self._receive())
+                self._worker.join()
+            finally:
+                del self._frames
+                self._shm.close()
+                self._shm.unlink()
+                self._worker = None
+        self._worker = None
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
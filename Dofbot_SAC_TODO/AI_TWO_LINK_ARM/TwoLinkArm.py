@@ -32,29 +32,64 @@ class TwoLinkArm:
         # 启动可视化（在主线程中）
         self.visualize()
 
-    def forward_kinematics(self):
+    def forward_kinematics(self, q1=None, q2=None):
         """
-        正运动学计算
+        正运动学计算（q1 / q2 可传入整条关节轨迹数组）
         :return: 末端执行器的位置 (x, y)
         """
-        x = self.l1 * np.cos(self.q1) + self.l2 * np.cos(self.q1 + self.q2)
-        y = self.l1 * np.sin(self.q1) + self.l2 * np.sin(self.q1 + self.q2)
+        if q1 is None:
+            q1 = self.q1
+        if q2 is None:
+            q2 = self.q2
+        x = self.l1 * np.cos(q1) + self.l2 * np.cos(q1 + q2)
+        y = self.l1 * np.sin(q1) + self.l2 * np.sin(q1 + q2)
         return x, y
 
     def inverse_kinematics(self, x, y):
         """
-        逆运动学计算
+        逆运动学计算（取 q2 ≥ 0 的肘部分支，不可达时为 NaN）
         :param x: 目标位置 x
         :param y: 目标位置 y
         :return: 关节角度 q1, q2
         """
+        q, _ = self.inverse_kinematics_all(x, y)
+        return q[..., 0, 0][()], q[..., 0, 1][()]
+
+    def inverse_kinematics_all(self, x, y):
+        """
+        批量逆运动学，一次给出两个肘部分支
+        :param x: 目标位置 x，标量或数组
+        :param y: 目标位置 y，与 x 同形状
+        :return: q (..., 2, 2) 按 [分支, (q1, q2)] 排列，分支 0 为 q2 ≥ 0、分支 1 为 q2 ≤ 0；
+                 reachable (...) 是否可达，不可达处 q 为 NaN
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
         # 计算距离平方
         r = x**2 + y**2
-        # 计算 q2
-        q2 = np.arccos((r - self.l1**2 - self.l2**2) / (2 * self.l1 * self.l2))
+        reachable = (np.sqrt(r) <= self.l1 + self.l2) & (np.sqrt(r) >= abs(self.l1 - self.l2))
+        # 计算 q2（两个分支）
+        q2 = np.arccos(np.clip((r - self.l1**2 - self.l2**2) / (2 * self.l1 * self.l2), -1.0, 1.0))
+        q2 = np.stack([q2, -q2], axis=-1)
         # 计算 q1
-        q1 = np.arctan2(y, x) - np.arctan2(self.l2 * np.sin(q2), self.l1 + self.l2 * np.cos(q2))
-        return q1, q2
+        q1 = np.arctan2(y, x)[..., None] - np.arctan2(self.l2 * np.sin(q2), self.l1 + self.l2 * np.cos(q2))
+        q = np.stack([q1, q2], axis=-1)
+        q[~reachable] = np.nan
+        return q, reachable
+
+    def precompute_trajectory(self, t_values):
+        """
+        把轨迹函数一次性转换成关节角数组，更新线程 / 回放只需按下标取值
+        :param t_values: (N,) 时间序列
+        :return: target (N, 2) 目标位置，q (N, 2) 关节角（不可达处为 NaN）
+        """
+        t_values = np.asarray(t_values, dtype=np.float64)
+        try:
+            target = np.stack(np.broadcast_arrays(*self.trajectory(t_values)), axis=-1)
+        except (TypeError, ValueError):
+            target = np.array([self.trajectory(t) for t in t_values], dtype=np.float64)
+        q, _ = self.inverse_kinematics_all(target[:, 0], target[:, 1])
+        return target, q[:, 0]
 
     def get_link_positions(self):
         """
@@ -69,16 +104,20 @@ class TwoLinkArm:
 
     def update_loop(self):
         """
-        更新线程的主循环
+        更新线程的主循环（目标轨迹按块预先算好关节角，循环内只取值）
         """
+        block = 100
+        q_block = []
         while True:
             time.sleep(0.1)  # 模拟更新频率
             if self.trajectory:
-                # 获取当前目标位置
-                target_x, target_y = self.trajectory(self.t)
+                if len(q_block) == 0:
+                    t_values = self.t + 0.1 * np.arange(block)
+                    _, q_block = self.precompute_trajectory(t_values)
                 self.t += 0.1  # 更新时间变量
-                # 计算逆运动学
-                self.q1, self.q2 = self.inverse_kinematics(target_x, target_y)
+                # 取出预先算好的逆运动学结果
+                self.q1, self.q2 = q_block[0]
+                q_block = q_block[1:]
                 # 记录实际轨迹
                 actual_x, actual_y = self.forward_kinematics()
                 self.actual_trajectory.append((actual_x, actual_y))
@@ -132,8 +171,8 @@ class TwoLinkArm:
         # 绘制目标轨迹
         if self.trajectory:
             t_values = np.linspace(0, 2 * np.pi, self.trajectory_points)
-            target_x, target_y = zip(*[self.trajectory(t) for t in t_values])
-            self.target_trajectory, = self.ax.plot(target_x, target_y, 'g--', lw=1.5, label='Target Trajectory')
+            target, _ = self.precompute_trajectory(t_values)
+            self.target_trajectory, = self.ax.plot(target[:, 0], target[:, 1], 'g--', lw=1.5, label='Target Trajectory')
 
         # 绘制实际轨迹
         self.actual_trajectory_line, = self.ax.plot([], [], 'm-', lw=1.5, label='Actual Trajectory')
@@ -13,6 +13,7 @@ class TwoLinkArm:
         self.q2 = q2_start
 
     def forward_kinematics(self, q1=None, q2=None):
+        # q1 / q2 may be arrays of any (matching) shape, e.g. a whole joint trajectory
         if q1 is None:
             q1 = self.q1
         if q2 is None:
@@ -22,15 +23,32 @@ class TwoLinkArm:
         return x, y
 
     def inverse_kinematics(self, x, y):
-        r = np.sqrt(x ** 2 + y ** 2)
-        if r > self.l1 + self.l2:
+        q, reachable = self.inverse_kinematics_all(x, y)
+        if not np.all(reachable):
             raise ValueError("Target out of reach")
-        cos_q2 = (x ** 2 + y ** 2 - self.l1 ** 2 - self.l2 ** 2) / (2 * self.l1 * self.l2)
+        # branch 0 (q2 >= 0) matches the original single-solution IK
+        return q[..., 0, 0][()], q[..., 0, 1][()]
+
+    def inverse_kinematics_all(self, x, y):
+        """
+        Vectorized IK for whole trajectories.
+        :param x, y: scalars or arrays of the same shape (...)
+        :return: q (..., 2, 2) as [branch, (q1, q2)], branch 0 is q2 >= 0 and branch 1 is q2 <= 0;
+                 reachable (...) bool mask, unreachable points hold NaN in q
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        r2 = x ** 2 + y ** 2
+        reachable = (np.sqrt(r2) <= self.l1 + self.l2) & (np.sqrt(r2) >= abs(self.l1 - self.l2))
+        cos_q2 = (r2 - self.l1 ** 2 - self.l2 ** 2) / (2 * self.l1 * self.l2)
         q2 = np.arccos(np.clip(cos_q2, -1.0, 1.0))
+        q2 = np.stack([q2, -q2], axis=-1)
         k1 = self.l1 + self.l2 * np.cos(q2)
         k2 = self.l2 * np.sin(q2)
-        q1 = np.arctan2(y, x) - np.arctan2(k2, k1)
-        return q1, q2
+        q1 = np.arctan2(y, x)[..., None] - np.arctan2(k2, k1)
+        q = np.stack([q1, q2], axis=-1)
+        q[~reachable] = np.nan
+        return q, reachable
 
     def get_link_positions(self):
         x0, y0 = 0, 0
@@ -72,9 +90,8 @@ class ArmVisualizer:
 
         if self.target_trajectory_func:
             t_vals = np.linspace(0, 2*np.pi, 200)
-            traj_points = [self.target_trajectory_func(t) for t in t_vals]
-            traj_x, traj_y = zip(*traj_points)
-            self.ax.plot(traj_x, traj_y, 'g--', lw=1, label='Target Trajectory')
+            traj_points = eval_trajectory(self.target_trajectory_func, t_vals)
+            self.ax.plot(traj_points[:, 0], traj_points[:, 1], 'g--', lw=1, label='Target Trajectory')
 
         self.actual_traj_line, = self.ax.plot([], [], 'm-', lw=1, label='EE Trajectory')
 
@@ -117,24 +134,47 @@ class ArmVisualizer:
         plt.grid()
         plt.show()
 
-def run_tracking_control(arm, visualizer, target_trajectory, duration=20.0, dt=0.02):
-    t = 0.0
-    while t < duration:
-        target_pos = target_trajectory(t)
-        try:
-            q1_des, q2_des = arm.inverse_kinematics(*target_pos)
-        except ValueError:
-            t += dt
+def eval_trajectory(target_trajectory, t):
+    """Evaluate target_trajectory on a time array, returns (N, 2)."""
+    t = np.asarray(t, dtype=np.float64)
+    try:
+        x, y = target_trajectory(t)
+        pts = np.stack(np.broadcast_arrays(x, y), axis=-1)
+        if pts.shape == t.shape + (2,):
+            return pts
+    except (TypeError, ValueError):
+        pass
+    # trajectory function only accepts scalars
+    return np.array([target_trajectory(ti) for ti in t], dtype=np.float64)
+
+
+def precompute_trajectory(arm, target_trajectory, t, branch=0):
+    """
+    Turn a trajectory function into joint arrays once, so control / replay loops only index them.
+    :param t: (N,) time stamps
+    :param branch: elbow branch, 0 is q2 >= 0 (same as inverse_kinematics), 1 is q2 <= 0
+    :return: dict with t (N,), target (N, 2), q (N, 2) desired joints (NaN where unreachable),
+             reachable (N,) bool
+    """
+    target = eval_trajectory(target_trajectory, t)
+    q, reachable = arm.inverse_kinematics_all(target[:, 0], target[:, 1])
+    return {"t": np.asarray(t), "target": target, "q": q[:, branch], "reachable": reachable}
+
+
+def run_tracking_control(arm, visualizer, target_trajectory, duration=20.0, dt=0.02, realtime=True):
+    traj = precompute_trajectory(arm, target_trajectory, np.arange(0.0, duration, dt))
+    for target_pos, (q1_des, q2_des), ok in zip(traj["target"], traj["q"], traj["reachable"]):
+        if not ok:
             continue
         # simple PD control
         arm.q1 += 0.1 * (q1_des - arm.q1)
         arm.q2 += 0.1 * (q2_des - arm.q2)
 
         ee_pos = arm.forward_kinematics()
-        visualizer.append_trajectory(ee_pos, target_pos)
+        visualizer.append_trajectory(ee_pos, tuple(target_pos))
 
-        time.sleep(dt)
-        t += dt
+        if realtime:
+            time.sleep(dt)
 
     visualizer.plot_tracking_error()
 
@@ -147,24 +187,25 @@ if __name__ == "__main__":
     arm = TwoLinkArm(1.0, 1.0)
     visualizer = ArmVisualizer(arm, target_trajectory=circular_trajectory)
 
-    t = 0.0
     dt = 0.1
     Kp = 0.1
+    # one period of the circle, precomputed once and replayed cyclically
+    traj = precompute_trajectory(arm, circular_trajectory, np.linspace(0, 2 * np.pi, 63, endpoint=False))
 
+    i = 0
     while plt.fignum_exists(visualizer.fig.number):
-        target_pos = circular_trajectory(t)
-        try:
-            q1_des, q2_des = arm.inverse_kinematics(*target_pos)
+        k = i % len(traj["t"])
+        target_pos = tuple(traj["target"][k])
+        if traj["reachable"][k]:  # skip unreachable points
+            q1_des, q2_des = traj["q"][k]
             arm.q1 += Kp * (q1_des - arm.q1)
             arm.q2 += Kp * (q2_des - arm.q2)
-        except ValueError:
-            pass  # skip unreachable points
 
         ee_pos = arm.forward_kinematics()
         visualizer.append_trajectory(ee_pos, target_pos)
         visualizer.update_plot()
 
-        t += dt
+        i += 1
         time.sleep(dt)
 
     visualizer.plot_tracking_error()
\ No newline at end of file
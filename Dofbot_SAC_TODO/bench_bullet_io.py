@@ -0,0 +1,155 @@
+"""
+每个控制周期的 PyBullet 调用次数：逐关节接口（旧写法） vs dofbot 类现在的批量接口
+
+两个环境各按自己的 step 组合统计：
+    dofbot.py            : 读关节角 → joint_control（内部再读关节角和位姿）→ gripper_control → 读关节角和位姿
+    dofbotGymReachEnv.py : getObservation（关节角 + 位姿）→ get_qvel → joint_control（同上）→ gripper_control
+统计时把机器人的 self._p 临时换成 CountingBulletClient，stepSimulation 走另一个客户端，不计入。
+另外对比两个环境复位的耗时：逐个复位物块 / 机械臂 vs restoreState 快照恢复。
+
+用法（在 Dofbot_SAC_TODO 目录下）：python bench_bullet_io.py
+"""
+import time
+
+import numpy as np
+import pybullet as p
+from scipy.spatial.transform import Rotation as R
+
+from utils.bullet_client import BulletClient, CountingBulletClient
+
+
+# --------------------- 1. 旧的逐关节写法（仅作对照） ---------------------
+def per_joint_control(robot, jointPoses, gripperAngle):
+    for i in range(robot.numJoints):
+        robot._p.setJointMotorControl2(bodyUniqueId=robot.dofbotUid, jointIndex=i, controlMode=robot._p.POSITION_CONTROL,
+                                       targetPosition=jointPoses[i], targetVelocity=0, force=200,
+                                       maxVelocity=10.0, positionGain=0.3, velocityGain=1)
+    forces = [robot.fingerAForce, robot.fingerBForce, robot.fingerAForce,
+              robot.fingerBForce, robot.fingerAForce, robot.fingerAForce]
+    for jointIndex, force in zip(robot.gripper_joints, forces):
+        robot._p.setJointMotorControl2(robot.dofbotUid, jointIndex, robot._p.POSITION_CONTROL,
+                                       targetPosition=gripperAngle, force=force)
+
+
+def per_joint_states(robot, field):
+    """field=0 关节角，field=1 关节速度"""
+    states = [robot._p.getJointState(robot.dofbotUid, i) for i in range(robot.numJoints + 1)]
+    return [state[field] for state in states[:robot.numJoints]]
+
+
+def per_link_pose(robot, grip_offset=False):
+    link_states = [robot._p.getLinkState(robot.dofbotUid, idx) for idx in robot.ee_links]
+    # 位姿求均值与 dofbot.get_pose 相同，只有取数方式不同
+    pos = np.mean([state[0] for state in link_states], axis=0)
+    orn = R.from_quat([state[1] for state in link_states]).mean().as_quat()
+    if grip_offset:  # dofbotGymReachEnv 的末端点沿夹爪 z 轴前移 2 cm
+        pos = R.from_quat(orn).apply(np.array([0, 0, 0.02])) + pos
+    return pos, orn, robot._p.getEulerFromQuaternion(orn)
+
+
+def per_joint_cycle_sim(robot, jointPoses, gripperAngle):
+    per_joint_states(robot, 0)
+    per_joint_control(robot, jointPoses, gripperAngle)
+    # 旧 joint_control 末尾的读取
+    per_joint_states(robot, 0)
+    per_link_pose(robot)
+    return per_joint_states(robot, 0), per_link_pose(robot)
+
+
+def per_joint_cycle_gym(robot, jointPoses, gripperAngle):
+    obs = per_joint_states(robot, 0), per_link_pose(robot, True), per_joint_states(robot, 1)
+    per_joint_control(robot, jointPoses, gripperAngle)
+    per_joint_states(robot, 0)
+    per_link_pose(robot, True)
+    return obs
+
+
+# --------------------- 2. 现在的批量接口 ---------------------
+def bulk_cycle_sim(robot, jointPoses, gripperAngle):
+    robot.get_jointPoses()
+    robot.joint_control(jointPoses)
+    robot.gripper_control(gripperAngle)
+    return robot.get_jointPoses(), robot.get_pose()
+
+
+def bulk_cycle_gym(robot, jointPoses, gripperAngle):
+    obs = robot.getObservation(), robot.get_qvel()
+    robot.joint_control(jointPoses - robot.desire_qpos)  # 该环境的 joint_control 接收增量
+    robot.gripper_control(gripperAngle)
+    return obs
+
+
+# --------------------- 3. 计数 + 计时 ---------------------
+def measure(robot, cycle, steps=1000):
+    """
+    参数
+    ----
+    robot : dofbot 实例
+    cycle : cycle(robot, jointPoses, gripperAngle)
+    steps : 控制周期数
+    返回
+    ----
+    calls_per_step : 每周期 pybullet 调用次数
+    us_per_step : 每周期耗时（μs，不含 stepSimulation，含计数包装本身的开销）
+    calls : 按函数名的总调用次数
+    """
+    counter = CountingBulletClient(robot.physicsClient)
+    world = BulletClient(robot.physicsClient)
+    saved, robot._p = robot._p, counter
+    q0 = np.array(robot.jointStartPositions)
+    elapsed = 0.0
+    try:
+        for k in range(steps):
+            jointPoses = q0 + 0.2 * np.sin(0.01 * k)
+            start = time.perf_counter()
+            cycle(robot, jointPoses, 0.3 * np.sin(0.02 * k))
+            elapsed += time.perf_counter() - start
+            world.stepSimulation()
+            robot.invalidate_pose()
+    finally:
+        robot._p = saved
+    return sum(counter.calls.values()) / steps, elapsed / steps * 1e6, dict(counter.calls)
+
+
+def measure_reset(env, episodes=200):
+    """
+    返回
+    ----
+    full_us : 逐个复位物块和机械臂并步进一次的平均耗时（μs）
+    snapshot_us : restoreState 快照复位的平均耗时（μs，不含 gym reset 里取观测的部分）
+    """
+    env._reset_snapshot()  # 第一次调用生成快照
+    start = time.perf_counter()
+    for _ in range(episodes):
+        env._reset_full()
+    full_us = (time.perf_counter() - start) / episodes * 1e6
+    start = time.perf_counter()
+    for _ in range(episodes):
+        env._reset_snapshot()
+    snapshot_us = (time.perf_counter() - start) / episodes * 1e6
+    return full_us, snapshot_us
+
+
+def report(title, env, per_joint_cycle, bulk_cycle):
+    print(title)
+    robot = env._dofbot
+    for name, cycle in (("逐关节", per_joint_cycle), ("批量", bulk_cycle)):
+        robot.reset()
+        calls, us, detail = measure(robot, cycle)
+        print(f"  {name}：每周期 {calls:.0f} 次调用，{us:.1f} μs；{detail}")
+    full_us, snapshot_us = measure_reset(env)
+    print(f"  复位：逐个复位 {full_us:.1f} μs，快照恢复 {snapshot_us:.1f} μs")
+
+
+if __name__ == "__main__":
+    import dofbot
+
+    env = dofbot.DofbotEnv(p.connect(p.DIRECT))
+    report("dofbot.DofbotEnv", env, per_joint_cycle_sim, bulk_cycle_sim)
+    p.disconnect(env.physicsClient)
+
+    import dofbotGymReachEnv  # 需要 gymnasium
+
+    env = dofbotGymReachEnv.DofbotEnv(render_mode="rgb_array")
+    report("dofbotGymReachEnv.DofbotEnv", env, per_joint_cycle_gym, bulk_cycle_gym)
+    env.close()
@@ -1,6 +1,10 @@
+import itertools
 import pybullet as p
 import numpy as np
-from scipy.spatial.transform import Rotation as R
+
+from utils.bullet_client import BulletClient
+from utils.ik_cache import IKCache
+from utils.pose import mean_link_pose
 
 class Observation:
     def __init__(self, pos=None, orn = None, euler=None):
@@ -10,7 +14,9 @@ class Observation:
 
 
 class dofbot:
-    def __init__(self, urdfPath):
+    def __init__(self, urdfPath, physicsClientId=0):
+        self.physicsClient = physicsClientId
+        self._p = BulletClient(physicsClientId)
         # # upper limits for null space
         self.ll = [-np.pi, 0, 0, 0, -np.pi]
         # upper limits for null space
@@ -20,16 +26,21 @@ class dofbot:
         self.jr = [np.pi * 2.0, np.pi, np.pi, np.pi, 2.0 * np.pi]
         # rest poses for null space
         self.rp = [np.pi / 2.0, np.pi / 2.0, np.pi / 2.0, np.pi / 2.0, np.pi / 2.0]
+        # 同一目标位姿只求一次逆解；修改 ll/ul/jr/rp 后需调用 self.ik_cache.invalidate()
+        self.ik_cache = IKCache(self._calculateInverseKine)
 
         self.maxForce = 200.
         self.fingerAForce = 2.5
         self.fingerBForce = 2.5
         self.fingerTipForce = 2
 
-        self.dofbotUid = p.loadURDF(urdfPath,baseOrientation =p.getQuaternionFromEuler([0, 0, 0]), useFixedBase=True)
+        self.dofbotUid = self._p.loadURDF(urdfPath,baseOrientation =self._p.getQuaternionFromEuler([0, 0, 0]), useFixedBase=True)
         # self.numJoints = p.getNumJoints(self.dofbotUid)
         self.numJoints = 5
         self.gripper_joints = [5, 6, 7, 8, 9, 10]
+        self.arm_joints = list(range(self.numJoints))
+        # 两个指尖 link，末端位姿取二者均值
+        self.ee_links = [6, 8]
 
         self.jointStartPositions = [1.57,  1, 1.57, 1.57, 1.57]
         # self.jointStartPositions = [1.57, 1.57, 1.57, 1.57, 1.57]
@@ -37,8 +48,8 @@ class dofbot:
 
         self.motorIndices = []
         for jointIndex in range(self.numJoints):
-            p.resetJointState(self.dofbotUid, jointIndex, self.jointStartPositions[jointIndex])
-            qIndex = p.getJointInfo(self.dofbotUid, jointIndex)[3]
+            self._p.resetJointState(self.dofbotUid, jointIndex, self.jointStartPositions[jointIndex])
+            qIndex = self._p.getJointInfo(self.dofbotUid, jointIndex)[3]
             if qIndex > -1:
                 self.motorIndices.append(jointIndex)
 
@@ -46,20 +57,26 @@ class dofbot:
 
         self.gripperStartAngle = 0.0
         for i, jointIndex in enumerate(self.gripper_joints):
-            p.resetJointState(self.dofbotUid, jointIndex, self.gripperStartAngle)
+            self._p.resetJointState(self.dofbotUid, jointIndex, self.gripperStartAngle)
 
 
+        # get_pose 的单步缓存：stepSimulation / 复位关节后须调用 invalidate_pose
+        self._pose = None
         self.endEffectorPos = []
         self.endEffectorOrn = []
         self.endEffectorEuler = []
         self.endEffectorPos, self.endEffectorOrn, self.endEffectorEuler = self.get_pose()
 
-    def reset(self):
+    def reset(self, reset_joints=True):
+        '''
+        :param reset_joints: False 时只同步 Python 侧状态（env 已用 restoreState 整体恢复了关节）
+        '''
         self.gripperAngle = 0.0
-        for jointIndex in range(self.numJoints):
-            p.resetJointState(self.dofbotUid, jointIndex, self.jointStartPositions[jointIndex])
-        for i, jointIndex in enumerate(self.gripper_joints):
-            p.resetJointState(self.dofbotUid, jointIndex, self.gripperAngle)
+        if reset_joints:
+            # 臂 + 夹爪共 11 个关节一次复位（速度同时清零）
+            targetValues = [[q] for q in self.jointStartPositions] + [[self.gripperAngle]] * len(self.gripper_joints)
+            self._p.resetJointStatesMultiDof(self.dofbotUid, self.arm_joints + self.gripper_joints, targetValues)
+        self.invalidate_pose()
         self.jointPositions = self.get_jointPoses()
         self.endEffectorPos, self.endEffectorOrn, self.endEffectorEuler = self.get_pose()
 
@@ -71,8 +88,10 @@ class dofbot:
 
 
     def joint_control(self,jointPoses):
-        for i in range(self.numJoints):
-            p.setJointMotorControl2(bodyUniqueId=self.dofbotUid, jointIndex=i, controlMode=p.POSITION_CONTROL,
+        # 臂关节逐个下发：只有 setJointMotorControl2 的 maxVelocity 真正生效，
+        # Array / MultiDofArray 版本都会忽略速度上限
+        for i in self.arm_joints:
+            self._p.setJointMotorControl2(bodyUniqueId=self.dofbotUid, jointIndex=i, controlMode=self._p.POSITION_CONTROL,
                                     targetPosition=jointPoses[i], targetVelocity=0, force=200,
                                     maxVelocity=10.0, positionGain=0.3, velocityGain=1)
         self.jointPositions, self.gripperAngle = self.get_jointPoses()
@@ -80,89 +99,71 @@ class dofbot:
         return self.endEffectorPos, self.endEffectorOrn, self.endEffectorEuler
 
     def setInverseKine(self, pos, orn):
-        if orn == None:
-            jointPoses = p.calculateInverseKinematics(self.dofbotUid, 4, pos,
+        return self.ik_cache(pos, orn), self.gripperAngle
+
+    def _calculateInverseKine(self, pos, orn):
+        if orn is None:
+            jointPoses = self._p.calculateInverseKinematics(self.dofbotUid, 4, pos,
                                                       self.ll, self.ul, self.jr, self.rp)
         else:
-            jointPoses = p.calculateInverseKinematics(self.dofbotUid, 4, pos, orn,
+            jointPoses = self._p.calculateInverseKinematics(self.dofbotUid, 4, pos, orn,
                                                       self.ll, self.ul, self.jr, self.rp)
-        return jointPoses[:self.numJoints], self.gripperAngle
+        return jointPoses[:self.numJoints]
 
     def get_jointPoses(self):
-        jointPoses= []
-        for i in range(self.numJoints+1):
-            state = p.getJointState(self.dofbotUid, i)
-            jointPoses.append(state[0])
-        return jointPoses[:self.numJoints], self.gripperAngle
+        '''
+        :return: (5,) np.ndarray 关节角，夹爪角度
+        '''
+        states = self._p.getJointStates(self.dofbotUid, self.arm_joints)
+        return np.array([state[0] for state in states]), self.gripperAngle
+
+    def get_qvel(self):
+        '''
+        :return: (5,) np.ndarray 关节速度
+        '''
+        states = self._p.getJointStates(self.dofbotUid, self.arm_joints)
+        return np.array([state[1] for state in states])
 
     def get_pose(self):
-        # 1. 收集 6 个 link 的位姿
-        indices = [6, 8]
-        positions = []
-        quaternions = []
-
-        for idx in indices:
-            link_state = p.getLinkState(self.dofbotUid, idx)
-            positions.append(np.array(link_state[0]))
-            quaternions.append(np.array(link_state[1]))
-
-        # 2. 平均位置
-        avg_pos = np.mean(positions, axis=0)
-
-        # 3. 平均朝向（四元数）
-        rotations = R.from_quat(quaternions)  # scipy 自动归一化
-        avg_rot = rotations.mean()
-        avg_orn = avg_rot.as_quat()  # [x,y,z,w] 格式
-
-        # 现在 avg_pos 和 avg_orn 就是“夹爪”整体的均值位姿
-        pos = avg_pos
-        orn = avg_orn
-        euler = p.getEulerFromQuaternion(orn)
-        return pos, orn, euler
+        '''
+        两个指尖 link 的均值位姿，即“夹爪”整体位姿；同一仿真步内重复调用直接返回缓存
+        :return: pos (3,)，orn (4,) [x,y,z,w]，euler；pos / orn 为只读数组，每步一份新缓冲
+        '''
+        if self._pose is None:
+            (pos_a, orn_a, *_), (pos_b, orn_b, *_) = self._p.getLinkStates(self.dofbotUid, self.ee_links)
+            # 缓冲不跨步复用：调用方可能持有上一步的 pos
+            buf = mean_link_pose(pos_a, orn_a, pos_b, orn_b, np.empty(7))
+            buf.flags.writeable = False
+            self._pose = buf[:3], buf[3:], self._p.getEulerFromQuaternion(buf[3:])
+        return self._pose
+
+    def invalidate_pose(self):
+        '''
+        仿真步进或直接改写关节状态后调用，下一次 get_pose 重新读取
+        '''
+        self._pose = None
 
     def getObservation(self):
         pos, orn, euler = self.get_pose()
         return Observation(pos, orn, euler)
 
     def gripper_control(self, gripperAngle):
-
-        p.setJointMotorControl2(self.dofbotUid,
-                                5,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerAForce)
-        p.setJointMotorControl2(self.dofbotUid,
-                                6,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerBForce)
-        p.setJointMotorControl2(self.dofbotUid,
-                                7,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerAForce)
-        p.setJointMotorControl2(self.dofbotUid,
-                                8,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerBForce)
-        p.setJointMotorControl2(self.dofbotUid,
-                                9,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerAForce)
-        p.setJointMotorControl2(self.dofbotUid,
-                                10,
-                                p.POSITION_CONTROL,
-                                targetPosition=gripperAngle,
-                                force=self.fingerAForce)
+        # 关节 5~10 依次为 A、B、A、B、A、A 指，一次下发
+        self._p.setJointMotorControlArray(self.dofbotUid,
+                                          self.gripper_joints,
+                                          self._p.POSITION_CONTROL,
+                                          targetPositions=[gripperAngle] * len(self.gripper_joints),
+                                          forces=[self.fingerAForce, self.fingerBForce, self.fingerAForce,
+                                                  self.fingerBForce, self.fingerAForce, self.fingerAForce])
 
         self.gripperAngle = gripperAngle
 
 
 class Object:
-    def __init__(self, urdfPath, block,num):
-        self.id = p.loadURDF(urdfPath)
+    def __init__(self, urdfPath, block,num, physicsClientId=0):
+        self.physicsClient = physicsClientId
+        self._p = BulletClient(physicsClientId)
+        self.id = self._p.loadURDF(urdfPath)
         self.half_height = 0.015 if block else 0.0745
         self.num = num
 
@@ -170,33 +171,32 @@ class Object:
     def reset(self):
 
         if self.num==1:
-            p.resetBasePositionAndOrientation(self.id,
+            self._p.resetBasePositionAndOrientation(self.id,
                                          np.array([ 0.20, 0.1,
                                                    self.half_height]),
-                                        p.getQuaternionFromEuler([0, 0,np.pi/6]))
+                                        self._p.getQuaternionFromEuler([0, 0,np.pi/6]))
         else:
-            p.resetBasePositionAndOrientation(self.id,
+            self._p.resetBasePositionAndOrientation(self.id,
                                          np.array([ 0.2, -0.1,
                                                    0.005]),
-                                        p.getQuaternionFromEuler([0, 0,0]))
+                                        self._p.getQuaternionFromEuler([0, 0,0]))
 
     def getObservation(self):
-        pos, orn = p.getBasePositionAndOrientation(self.id)
-        euler = p.getEulerFromQuaternion(orn)
+        pos, orn = self._p.getBasePositionAndOrientation(self.id)
+        euler = self._p.getEulerFromQuaternion(orn)
         return Observation(pos, orn, euler)
 
     def pos_and_orn(self):
-        pos, orn = p.getBasePositionAndOrientation(self.id)
-        euler = p.getEulerFromQuaternion(orn)
+        pos, orn = self._p.getBasePositionAndOrientation(self.id)
+        euler = self._p.getEulerFromQuaternion(orn)
         return pos, orn, euler
 
 
-def check_pairwise_collisions(bodies):
-    for body1 in bodies:
-        for body2 in bodies:
-            if body1 != body2 and \
-                    len(p.getClosestPoints(bodyA=body1, bodyB=body2, distance=0., physicsClientId=0)) != 0:
-                return True
+def check_pairwise_collisions(bodies, physicsClientId=0):
+    # 每个无序物体对只查一次，发现碰撞即返回
+    for body1, body2 in itertools.combinations(bodies, 2):
+        if p.getClosestPoints(bodyA=body1, bodyB=body2, distance=0., physicsClientId=physicsClientId):
+            return True
     return False
 
 
@@ -208,18 +208,24 @@ class DofbotEnv:
             self.physicsClient = p.connect(p.GUI)
         else:
             self.physicsClient = physicsClientId
-        p.resetDebugVisualizerCamera(1.0, 120, -20, [0.2, 0, 0.2])
-        p.setPhysicsEngineParameter(numSolverIterations=150)
-        p.setTimeStep(self._timeStep)
-        p.setGravity(0, 0, -9.81)
+        # 之后所有 pybullet 调用都经 self._p 发往本环境自己的客户端，同一进程可并存多个环境
+        self._p = BulletClient(self.physicsClient)
+        self._p.resetDebugVisualizerCamera(1.0, 120, -20, [0.2, 0, 0.2])
+        self._p.setPhysicsEngineParameter(numSolverIterations=150)
+        self._p.setTimeStep(self._timeStep)
+        self._p.setGravity(0, 0, -9.81)
 
 
-        p.loadURDF("models/floor.urdf", [0, 0, -0.625], useFixedBase=True)
-        p.loadURDF("models/table_collision/table.urdf", [0.5, 0, -0.625],p.getQuaternionFromEuler([0, 0, 0]),
+        self._p.loadURDF("models/floor.urdf", [0, 0, -0.625], useFixedBase=True)
+        self._p.loadURDF("models/table_collision/table.urdf", [0.5, 0, -0.625],self._p.getQuaternionFromEuler([0, 0, 0]),
                    useFixedBase=True)
-        self._dofbot = dofbot("models/dofbot_urdf_with_gripper/dofbot_with_gripper.urdf")
-        self._object1 = Object("models/box_green.urdf", block=True,num=1)
+        self._dofbot = dofbot("models/dofbot_urdf_with_gripper/dofbot_with_gripper.urdf", self.physicsClient)
+        self._object1 = Object("models/box_green.urdf", block=True,num=1, physicsClientId=self.physicsClient)
         # self._object2 = Object("models/box_red.urdf", block=True,num=2)
+        self._objects = [self._object1]
+        # 初始状态快照：第一次 reset 时 saveState，之后一次 restoreState 恢复
+        self._reset_state = None
+        self._reset_object_poses = None
 
 
         self.target_pos = np.array([0.2, -0.15, 0.15])
@@ -258,15 +264,15 @@ class DofbotEnv:
         self.sliders = []
         joint_names = ["Joint1", "Joint2", "Joint3", "Joint4", "Joint5"]
         for i in range(5):
-            slider = p.addUserDebugParameter(joint_names[i],
+            slider = self._p.addUserDebugParameter(joint_names[i],
                                              self._dofbot.ll[i],
                                              self._dofbot.ul[i],
                                              self._dofbot.rp[i])
             self.sliders.append(slider)
-        self.gripper_slider = p.addUserDebugParameter("Gripper", -1.0, 1.0, 0.0)
+        self.gripper_slider = self._p.addUserDebugParameter("Gripper", -1.0, 1.0, 0.0)
 
         # 添加控制模式滑动条：0 = Joint Control, 1 = EE Pose Control
-        self.control_mode_slider = p.addUserDebugParameter("Control_Mode(0=Joint,1=EE)", 0, 1, 0)
+        self.control_mode_slider = self._p.addUserDebugParameter("Control_Mode(0=Joint,1=EE)", 0, 1, 0)
 
         self.ee_text_ids = []  # 每帧用来更新文字的句柄
         text_pos = [0.5, 0.05, 0.6]  # 左上角，按自己视角调
@@ -292,29 +298,29 @@ class DofbotEnv:
         arrow_length = 0.05
 
         # 分别旋转单位向量 [1,0,0], [0,1,0], [0,0,1]（分别对应 X, Y, Z）
-        x_dir = p.multiplyTransforms([0, 0, 0], orn, [arrow_length, 0, 0], [0, 0, 0, 1])[0]
-        y_dir = p.multiplyTransforms([0, 0, 0], orn, [0, arrow_length, 0], [0, 0, 0, 1])[0]
-        z_dir = p.multiplyTransforms([0, 0, 0], orn, [0, 0, arrow_length], [0, 0, 0, 1])[0]
+        x_dir = self._p.multiplyTransforms([0, 0, 0], orn, [arrow_length, 0, 0], [0, 0, 0, 1])[0]
+        y_dir = self._p.multiplyTransforms([0, 0, 0], orn, [0, arrow_length, 0], [0, 0, 0, 1])[0]
+        z_dir = self._p.multiplyTransforms([0, 0, 0], orn, [0, 0, arrow_length], [0, 0, 0, 1])[0]
 
         arrow_end_x = [arrow_start[i] + x_dir[i] for i in range(3)]
         arrow_end_y = [arrow_start[i] + y_dir[i] for i in range(3)]
         arrow_end_z = [arrow_start[i] + z_dir[i] for i in range(3)]
 
         arrow_items = []
-        arrow_items.append(p.addUserDebugLine(
+        arrow_items.append(self._p.addUserDebugLine(
             arrow_start, arrow_end_x, [1, 0, 0], lineWidth=3, lifeTime=0
         ))
-        arrow_items.append(p.addUserDebugLine(
+        arrow_items.append(self._p.addUserDebugLine(
             arrow_start, arrow_end_y, [0, 1, 0], lineWidth=3, lifeTime=0
         ))
-        arrow_items.append(p.addUserDebugLine(
+        arrow_items.append(self._p.addUserDebugLine(
             arrow_start, arrow_end_z, [0, 0, 1], lineWidth=3, lifeTime=0
         ))
 
         return arrow_items
 
     def _make_item(self, text, text_pos, rgb):
-        return p.addUserDebugText(text, text_pos,
+        return self._p.addUserDebugText(text, text_pos,
                                   textColorRGB=rgb,
                                   textSize=0.5,
                                   lifeTime=self._timeStep)  # 0.1 s 后自动消失，下一帧再写
@@ -331,18 +337,93 @@ class DofbotEnv:
 
         # 删掉旧文字，写新文字
         for i in range(3):
-            p.removeUserDebugItem(self.ee_text_ids[i])
-            self.ee_text_ids[i] = p.addUserDebugText(
+            self._p.removeUserDebugItem(self.ee_text_ids[i])
+            self.ee_text_ids[i] = self._p.addUserDebugText(
                 new_txt[i],
                 [-0.50, 0.30, 0.7 - i * 0.05],
                 textColorRGB=rgb[i],
                 textSize=1.2,
                 lifeTime=0.1)
 
-    def reset(self):
+    def reset(self, object_poses=None):
+        '''
+        第一次调用逐个复位物块和机械臂、步进一次后用 saveState 存下快照，之后一次 restoreState 恢复
+        :param object_poses: 可选，与 self._objects 对应的 [(pos, orn), ...]，恢复快照后再摆放物块；
+                             随机摆放可用 sample_object_poses 生成
+        '''
+        self._reset_snapshot()
+        if object_poses is not None:
+            self._place_objects(object_poses)
+
+    def _reset_full(self):
+        '''
+        逐个复位物块和机械臂并步进一次（生成快照时使用）
+        '''
         self._object1.reset()
         self._dofbot.reset()
-        p.stepSimulation()
+        self._step_simulation()
+
+    def _reset_snapshot(self):
+        '''
+        第一次调用走 _reset_full 并用 saveState 存下快照，之后一次 restoreState 恢复
+        '''
+        if self._reset_state is None:
+            self._reset_full()
+            self._reset_state = self._p.saveState()
+            self._reset_object_poses = [self._p.getBasePositionAndOrientation(obj.id) for obj in self._objects]
+        else:
+            self._p.restoreState(self._reset_state)
+            self._dofbot.reset(reset_joints=False)
+
+    def _place_objects(self, object_poses):
+        '''
+        object_poses 为与 self._objects 对应的 [(pos, orn), ...]，某项为 None 则保持当前位姿
+        '''
+        for obj, pose in zip(self._objects, object_poses):
+            if pose is not None:
+                self._p.resetBasePositionAndOrientation(obj.id, pose[0], pose[1])
+
+    def clear_reset_state(self):
+        '''
+        场景中增删物体后调用（restoreState 要求物体与快照一致），下一次 reset 重新生成快照
+        '''
+        if self._reset_state is not None:
+            self._p.removeState(self._reset_state)
+            self._reset_state = None
+
+    def sample_object_poses(self, rng, xy_range=0.02, yaw_range=np.pi / 12):
+        '''
+        在初始位姿附近随机摆放物块：平移 ±xy_range（m），绕 z 轴转 ±yaw_range（rad）
+        :param rng: np.random.Generator
+        :return: 与 self._objects 对应的 [(pos, orn), ...]
+        '''
+        if self._reset_object_poses is None:
+            raise RuntimeError("sample_object_poses 需要先调用一次 reset() 生成初始快照")
+        poses = []
+        for pos, orn in self._reset_object_poses:
+            dx, dy = rng.uniform(-xy_range, xy_range, size=2)
+            yaw = self._p.getQuaternionFromEuler([0, 0, rng.uniform(-yaw_range, yaw_range)])
+            _, orn = self._p.multiplyTransforms([0, 0, 0], yaw, [0, 0, 0], orn)
+            poses.append(([pos[0] + dx, pos[1] + dy, pos[2]], orn))
+        return poses
+
+    def _step_simulation(self):
+        self._p.stepSimulation()
+        self._dofbot.invalidate_pose()  # 位姿缓存按仿真步失效
+
+    def enable_profiler(self, profiler):
+        '''
+        给热路径插桩（见 utils/profiler.py）：env / 机器人 / 物体的 pybullet 调用按函数归类计时，
+        关键方法按阶段计时；不调用本方法时没有任何额外开销，profiler.detach() 撤销
+        '''
+        for owner in [self, self._dofbot] + self._objects:
+            profiler.instrument_client(owner)
+        profiler.instrument(self, {"step": "env.step", "step_with_sliders": "env.step", "dofbot_control": "env.control",
+                                   "reset": "env.reset", "update_arrow_display": "env.debug",
+                                   "_update_ee_text_window": "env.debug"})
+        profiler.instrument(self._dofbot, {"setInverseKine": "ik", "get_pose": "pose", "get_jointPoses": "pose",
+                                           "joint_control": "motor", "gripper_control": "motor"})
+        return profiler
 
     def step(self, action):
         """
@@ -355,7 +436,7 @@ class DofbotEnv:
         print("desire_jointPoses:", desire_jointPoses)
         self._dofbot.joint_control(desire_jointPoses)
         self._dofbot.gripper_control(gripperAngle)
-        p.stepSimulation()
+        self._step_simulation()
         jointPoses, gripperAngle = self.get_dofbot_jointPoses()
         print("qpos:", jointPoses)
         pos, orn, euler = self._dofbot.get_pose()
@@ -363,11 +444,11 @@ class DofbotEnv:
         
         if self.end_effector_arrow_id is not None:
             for item in self.end_effector_arrow_id:
-                p.removeUserDebugItem(item)
+                self._p.removeUserDebugItem(item)
 
         if self.object_arrow_id is not None:
             for item in self.object_arrow_id:
-                p.removeUserDebugItem(item)
+                self._p.removeUserDebugItem(item)
 
         object_pos, object_orn, object_euler = self._object1.pos_and_orn()
 
@@ -381,19 +462,19 @@ class DofbotEnv:
         0 - 关节角度控制
         1 - 末端位姿控制
         """
-        mode = p.readUserDebugParameter(self.control_mode_slider)
+        mode = self._p.readUserDebugParameter(self.control_mode_slider)
 
         if mode < 0.5:
             # === Joint Control Mode ===
-            jointPoses = [p.readUserDebugParameter(slider) for slider in self.sliders]
-            gripperAngle = p.readUserDebugParameter(self.gripper_slider)
+            jointPoses = [self._p.readUserDebugParameter(slider) for slider in self.sliders]
+            gripperAngle = self._p.readUserDebugParameter(self.gripper_slider)
             self._dofbot.joint_control(jointPoses)
             self._dofbot.gripper_control(gripperAngle)
             pos, orn, euler = self._dofbot.get_pose()
             print("pos: ", pos)
             jointPoses, gripperAngle = self.get_dofbot_jointPoses()
             print("qpos:", jointPoses)
-            p.stepSimulation()
+            self._step_simulation()
         else:
             mode = mode
 
@@ -403,11 +484,11 @@ class DofbotEnv:
         # 删除上次显示
         if self.end_effector_arrow_id is not None:
             for item in self.end_effector_arrow_id:
-                p.removeUserDebugItem(item)
+                self._p.removeUserDebugItem(item)
 
         if self.object_arrow_id is not None:
             for item in self.object_arrow_id:
-                p.removeUserDebugItem(item)
+                self._p.removeUserDebugItem(item)
 
         object_pos, object_orn, object_euler = self._object1.pos_and_orn()
 
@@ -424,7 +505,7 @@ class DofbotEnv:
         '''
         self._dofbot.joint_control(jointPoses)
         self._dofbot.gripper_control(gripperAngle)
-        p.stepSimulation()
+        self._step_simulation()
         # time.sleep(self._timeStep)
 
     def dofbot_setInverseKine(self,pos,orn = None):
@@ -0,0 +1,44 @@
+"""
+绑定到单个仿真客户端的 pybullet 包装
+
+用法同 pybullet_utils.bullet_client：self._p = BulletClient(client_id); self._p.stepSimulation()，
+每个 pybullet 函数自动带上 physicsClientId，同一进程可以并存多个 DIRECT 环境。
+与 pybullet_utils 版本不同，这里只包装已有连接，不负责连接 / 断开。
+"""
+import collections
+import functools
+import inspect
+
+import pybullet as p
+
+
+class BulletClient:
+    def __init__(self, physicsClientId=0):
+        self._client = physicsClientId
+
+    def __getattr__(self, name):
+        attribute = getattr(p, name)
+        if inspect.isbuiltin(attribute):
+            attribute = functools.partial(attribute, physicsClientId=self._client)
+        setattr(self, name, attribute)  # 之后直接命中实例属性，不再经过 __getattr__
+        return attribute
+
+
+class CountingBulletClient(BulletClient):
+    """统计经由本客户端发出的 pybullet 调用次数（self.calls 按函数名计数），用于对比接口开销"""
+
+    def __init__(self, physicsClientId=0):
+        super().__init__(physicsClientId)
+        self.calls = collections.Counter()
+
+    def __getattr__(self, name):
+        attribute = super().__getattr__(name)
+        if callable(attribute):
+            function = attribute
+
+            def attribute(*args, **kwargs):
+                self.calls[name] += 1
+                return function(*args, **kwargs)
+
+            setattr(self, name, attribute)
+        return attribute
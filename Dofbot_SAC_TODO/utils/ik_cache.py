@@ -0,0 +1,81 @@
+"""
+按目标位姿缓存逆运动学结果（LRU）
+
+状态机每个仿真步都会对同一个目标调用 dofbot.setInverseKine，
+而每次调用要跑三遍 p.calculateInverseKinematics。这里把位置 / 四元数量化后作为键，
+同一目标只求解一次，之后直接返回缓存的关节角。
+机器人模型（URDF、关节限位、零空间参数）变化时调用 invalidate() 清空。
+
+求解结果还依赖位姿以外的状态时（如夹爪角度决定的工具偏置），把它作为 context 传入，
+context 不同的同一位姿分开缓存。
+求解器若按当前关节角挑选最近的一组解，只有未命中时才会挑选；命中时返回的是
+第一次求解那一刻的构型附近的解，与调用时的关节角无关。
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+
+class IKCache:
+    """
+    参数
+    ----
+    solve : 实际求解函数 solve(pos, orn) -> 关节角序列
+    maxsize : 最多缓存的目标数，超出时淘汰最久未用的；0 表示不缓存
+    pos_res : 位置量化步长（m）
+    orn_res : 四元数分量量化步长
+    """
+
+    def __init__(self, solve, maxsize=256, pos_res=1e-4, orn_res=1e-3):
+        self.solve = solve
+        self.maxsize = maxsize
+        self.pos_res = pos_res
+        self.orn_res = orn_res
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, pos, orn=None, context=None):
+        """量化后的缓存键；q 与 -q 是同一姿态，统一成 w ≥ 0；context 原样并入键"""
+        k = tuple(np.round(np.asarray(pos, dtype=np.float64) / self.pos_res).astype(np.int64).tolist())
+        if orn is None:
+            return k, None, context
+        orn = np.asarray(orn, dtype=np.float64)
+        if orn[3] < 0:
+            orn = -orn
+        return k, tuple(np.round(orn / self.orn_res).astype(np.int64).tolist()), context
+
+    def __call__(self, pos, orn=None, context=None):
+        """
+        context : 影响求解结果的其他状态（需可哈希），不传给 solve
+        """
+        if self.maxsize <= 0:
+            self.misses += 1
+            return tuple(self.solve(pos, orn))
+
+        k = self.key(pos, orn, context)
+        result = self._cache.get(k)
+        if result is not None:
+            self._cache.move_to_end(k)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = tuple(self.solve(pos, orn))
+        self._cache[k] = result
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return result
+
+    def invalidate(self):
+        """清空缓存（模型参数改变后调用），命中统计保留"""
+        self._cache.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,39 @@
+"""
+夹爪末端位姿：两个指尖 link 位姿求均值（dofbot.get_pose 的热路径，纯标量运算，不经 scipy）
+
+两个单位四元数的均值（即 scipy Rotation.mean 的结果）有闭式解：
+先把 qb 翻到与 qa 同一半球，再对二者之和归一化。
+"""
+import math
+
+
+def mean_link_pose(pa, qa, pb, qb, out, z_offset=0.0):
+    """
+    两个 link 位姿的均值，写入调用方给的缓冲区
+
+    参数
+    ----
+    pa, pb : 两个 link 的位置 (3,)
+    qa, qb : 两个 link 的朝向四元数 [x,y,z,w]
+    out : (7,) 输出缓冲，写入 [x,y,z, qx,qy,qz,qw]
+    z_offset : 沿均值姿态的 z 轴前移的距离（m），用于把参考点移到指尖之间
+    返回
+    ----
+    out
+    """
+    s = 1.0 if qa[0] * qb[0] + qa[1] * qb[1] + qa[2] * qb[2] + qa[3] * qb[3] >= 0.0 else -1.0
+    x, y, z, w = qa[0] + s * qb[0], qa[1] + s * qb[1], qa[2] + s * qb[2], qa[3] + s * qb[3]
+    inv = 1.0 / math.sqrt(x * x + y * y + z * z + w * w)
+    x, y, z, w = x * inv, y * inv, z * inv, w * inv
+
+    px, py, pz = 0.5 * (pa[0] + pb[0]), 0.5 * (pa[1] + pb[1]), 0.5 * (pa[2] + pb[2])
+    if z_offset:
+        # 旋转矩阵第三列 × z_offset
+        px += z_offset * 2.0 * (x * z + w * y)
+        py += z_offset * 2.0 * (y * z - w * x)
+        pz += z_offset * (1.0 - 2.0 * (x * x + y * y))
+
+    out[0], out[1], out[2] = px, py, pz
+    out[3], out[4], out[5], out[6] = x, y, z, w
+    return out
+
@@ -5,7 +5,8 @@ import os
 
 
 class Panda:
-    def __init__(self, urdfRootPath=pybullet_data.getDataPath(), initial_pos=[0, 0, 0]):
+    def __init__(self, bullet_client, urdfRootPath=pybullet_data.getDataPath(), initial_pos=[0, 0, 0]):
+        self._p = bullet_client  # 所属仿真客户端，所有 pybullet 调用都经它发出
         self.urdfRootPath = urdfRootPath
         self.pandaEndEffectorIndex = 11
         # # upper limits for null space
@@ -21,7 +22,7 @@ class Panda:
         self.fingerForce = 10
         self.initial_pos = initial_pos
         orn = [0, 0, 0, 1]
-        self.pandaUid = p.loadURDF(os.path.join(self.urdfRootPath, "franka_panda/panda.urdf"), self.initial_pos, orn, useFixedBase=True)
+        self.pandaUid = self._p.loadURDF(os.path.join(self.urdfRootPath, "franka_panda/panda.urdf"), self.initial_pos, orn, useFixedBase=True)
         self.numJoints = 9
         self.reset_jointPositions = [0.0,
                     np.pi / 8,
@@ -34,53 +35,42 @@ class Panda:
                     0.04,]
         self.motorIndices = []  # [0, 1, 2, 3, 4, 5, 6]
         index = 0
-        for j in range(p.getNumJoints(self.pandaUid)):
-            p.changeDynamics(self.pandaUid, j, linearDamping=0, angularDamping=0)
-            info = p.getJointInfo(self.pandaUid, j)
+        for j in range(self._p.getNumJoints(self.pandaUid)):
+            self._p.changeDynamics(self.pandaUid, j, linearDamping=0, angularDamping=0)
+            info = self._p.getJointInfo(self.pandaUid, j)
             jointIndex = info[0]
             jointType = info[2]
-            if (jointType == p.JOINT_PRISMATIC):
-                p.resetJointState(self.pandaUid, j, self.reset_jointPositions[index]) 
+            if (jointType == self._p.JOINT_PRISMATIC):
+                self._p.resetJointState(self.pandaUid, j, self.reset_jointPositions[index]) 
                 self.motorIndices.append(jointIndex)
                 index += 1
-            if (jointType == p.JOINT_REVOLUTE):
-                p.resetJointState(self.pandaUid, j, self.reset_jointPositions[index]) 
+            if (jointType == self._p.JOINT_REVOLUTE):
+                self._p.resetJointState(self.pandaUid, j, self.reset_jointPositions[index]) 
                 self.motorIndices.append(jointIndex)
                 index += 1
-        state = p.getLinkState(self.pandaUid, self.pandaEndEffectorIndex)
+        state = self._p.getLinkState(self.pandaUid, self.pandaEndEffectorIndex)
         self.inital_eepose = [state[0], state[1]]
 
-    def reset(self):        
-        index = 0
-        for j in range(self.numJoints):
-            p.changeDynamics(self.pandaUid, j, linearDamping=0, angularDamping=0)
-            info = p.getJointInfo(self.pandaUid, j)
-        
-            jointName = info[1]
-            jointType = info[2]
-            if (jointType == p.JOINT_PRISMATIC):
-                p.resetJointState(self.pandaUid, j, self.reset_jointPositions[index]) 
-                index=index+1
-            if (jointType == p.JOINT_REVOLUTE):
-                p.resetJointState(self.pandaUid, j, self.reset_jointPositions[index]) 
-                index=index+1
-        state = p.getLinkState(self.pandaUid, self.pandaEndEffectorIndex)
+    def reset(self):
+        # 阻尼已在 __init__ 里设置；motorIndices 与 reset_jointPositions 一一对应（含两个手指）
+        self._p.resetJointStatesMultiDof(self.pandaUid, self.motorIndices,
+                                         [[q] for q in self.reset_jointPositions])
 
 
     def joint_control(self,jointPoses):          
         for i in range(self.numJoints - 2):
-            p.setJointMotorControl2(bodyUniqueId=self.pandaUid, jointIndex=self.motorIndices[i], controlMode=p.POSITION_CONTROL,
+            self._p.setJointMotorControl2(bodyUniqueId=self.pandaUid, jointIndex=self.motorIndices[i], controlMode=self._p.POSITION_CONTROL,
                                 targetPosition=jointPoses[i], targetVelocity=0, force=200,
                                 maxVelocity=1.0, positionGain=0.3, velocityGain=1)
         self.gripper_control(jointPoses[-2:])
 
     def setInverseKine(self, pos, orn=None):
         if orn == None:
-            jointPoses = p.calculateInverseKinematics(self.pandaUid, self.pandaEndEffectorIndex, pos,
+            jointPoses = self._p.calculateInverseKinematics(self.pandaUid, self.pandaEndEffectorIndex, pos,
                                                       self.ll, self.ul, self.jr, self.rp)
         else:
             orn_new = [orn[0], orn[1], orn[3], orn[2]]
-            jointPoses = p.calculateInverseKinematics(self.pandaUid, self.pandaEndEffectorIndex, pos, orn_new,
+            jointPoses = self._p.calculateInverseKinematics(self.pandaUid, self.pandaEndEffectorIndex, pos, orn_new,
                                                       self.ll, self.ul, self.jr, self.rp)
         return jointPoses[:7]
 
@@ -88,19 +78,19 @@ class Panda:
     def get_jointPoses(self):
         jointPoses= []
         for i in range(self.numJoints):
-            state = p.getJointState(self.pandaUid, self.motorIndices[i])
+            state = self._p.getJointState(self.pandaUid, self.motorIndices[i])
             jointPoses.append(state[0])
         return np.array(jointPoses)
 
     def get_qvel(self):
         qvel= []
         for i in range(self.numJoints):
-            state = p.getJointState(self.pandaUid, self.motorIndices[i])
+            state = self._p.getJointState(self.pandaUid, self.motorIndices[i])
             qvel.append(state[1])
         return np.array(qvel)
     
     def get_gripper_pose(self):
-        state = p.getLinkState(self.pandaUid, self.pandaEndEffectorIndex)
+        state = self._p.getLinkState(self.pandaUid, self.pandaEndEffectorIndex)
         pos = state[0]
         orn = state[1]
         return pos,orn
@@ -118,20 +108,20 @@ class Panda:
         return observation
 
     def gripper_control(self,gripperAngle):
-        p.setJointMotorControl2(self.pandaUid,
+        self._p.setJointMotorControl2(self.pandaUid,
                                 9,
-                                p.POSITION_CONTROL,
+                                self._p.POSITION_CONTROL,
                                 targetPosition=gripperAngle[0],
                                 force=self.fingerForce)
-        p.setJointMotorControl2(self.pandaUid,
+        self._p.setJointMotorControl2(self.pandaUid,
                                 10,
-                                p.POSITION_CONTROL,
+                                self._p.POSITION_CONTROL,
                                 targetPosition=gripperAngle[1],
                                 force=self.fingerForce)
         
     ## 输入ee delta pos(3维)， orn不变
     def applyAction(self, actions):
-        state = p.getLinkState(self.pandaUid, self.pandaEndEffectorIndex)
+        state = self._p.getLinkState(self.pandaUid, self.pandaEndEffectorIndex)
         curr_eepos = np.array(state[0])
         desire_eepos = curr_eepos + np.array(actions[:3])
         desire_qpos = list(self.setInverseKine(desire_eepos, self.inital_eepose[1]))
@@ -1,5 +1,6 @@
 import pybullet as p
 import numpy as np
+from pybullet_utils import bullet_client
 import time
 from panda import Panda
 
@@ -19,8 +20,9 @@ register(
 )
 ## place is_grasped判断方式改了
 class ObjectPanda:
-    def __init__(self, urdfPath, block,num):
-        self.id = p.loadURDF(urdfPath)
+    def __init__(self, bullet_client, urdfPath, block,num):
+        self._p = bullet_client
+        self.id = self._p.loadURDF(urdfPath)
         self.half_height = 0.025 if block else 0.0745
         self.num = num
 
@@ -28,18 +30,18 @@ class ObjectPanda:
     def reset(self):
 
         if self.num==1:
-            p.resetBasePositionAndOrientation(self.id,
+            self._p.resetBasePositionAndOrientation(self.id,
                                          np.array([ 0.615, 0.1,
                                                    self.half_height]),
-                                        p.getQuaternionFromEuler([0, 0,0]))
+                                        self._p.getQuaternionFromEuler([0, 0,0]))
         else:
-            p.resetBasePositionAndOrientation(self.id,
+            self._p.resetBasePositionAndOrientation(self.id,
                                          np.array([ 0.615, -0.1,
                                                    0.005]),
-                                        p.getQuaternionFromEuler([0, 0,0]))
+                                        self._p.getQuaternionFromEuler([0, 0,0]))
 
     def pos_and_orn(self):
-        pos, orn = p.getBasePositionAndOrientation(self.id)
+        pos, orn = self._p.getBasePositionAndOrientation(self.id)
         # euler = p.getEulerFromQuaternion(quat)
         return pos, orn
     
@@ -57,21 +59,22 @@ class PandaEnv(gym.Env):
         self.obs_mode = obs_mode
         self.render_mode = render_mode
         
-        self._p = p
+        # 每个环境持有自己的客户端，同一进程可并存多个 DIRECT 环境
         if render_mode == "human" or render_mode == "human_image":
-            cid = p.connect(p.SHARED_MEMORY)
-            if (cid < 0):
-                cid = p.connect(p.GUI)
+            self._p = bullet_client.BulletClient(p.SHARED_MEMORY)
+            if (self._p._client < 0):
+                self._p = bullet_client.BulletClient(p.GUI)
                 # p.resetDebugVisualizerCamera(1.3, 180, -41, [0.52, -0.2, -0.33])
         else:
-            p.connect(p.DIRECT)
+            self._p = bullet_client.BulletClient(p.DIRECT)
+        self.physicsClient = self._p._client
         # p.connect(p.GUI)
         # p.setRealTimeSimulation(1)
         # p.resetDebugVisualizerCamera(2.0, 90, -40, [0, 0, 0])
-        p.resetDebugVisualizerCamera(1.8, 90, -10, [0.615, 0, 0.2])
-        p.setPhysicsEngineParameter(numSolverIterations=150)
-        p.setTimeStep(self._timeStep)
-        p.setGravity(0, 0, -9.8)
+        self._p.resetDebugVisualizerCamera(1.8, 90, -10, [0.615, 0, 0.2])
+        self._p.setPhysicsEngineParameter(numSolverIterations=150)
+        self._p.setTimeStep(self._timeStep)
+        self._p.setGravity(0, 0, -9.8)
 
         # TODO: observation space
         # if obs_mode == "state": ## 训练模式下使用
@@ -82,29 +85,33 @@ class PandaEnv(gym.Env):
         # TODO: action space
         # self.action_space =
     
-        p.loadURDF("models/floor.urdf", [0, 0, -0.625], useFixedBase=True)
-        p.loadURDF("models/table_collision/table.urdf", [0.5, 0, -0.625],p.getQuaternionFromEuler([0, 0, 0]),
+        self._p.loadURDF("models/floor.urdf", [0, 0, -0.625], useFixedBase=True)
+        self._p.loadURDF("models/table_collision/table.urdf", [0.5, 0, -0.625],self._p.getQuaternionFromEuler([0, 0, 0]),
                    useFixedBase=True)
-        self._panda = Panda()
-        self._object1 = ObjectPanda("models/box_green.urdf", block=True,num=1)
-        # self._object2 = ObjectPanda("models/box_purple.urdf", block=True,num=2)
+        self._panda = Panda(self._p)
+        self._object1 = ObjectPanda(self._p, "models/box_green.urdf", block=True,num=1)
+        # self._object2 = ObjectPanda(self._p, "models/box_purple.urdf", block=True,num=2)
         self.object =  self._object1.id
+        self._objects = [self._object1]
+        # 初始状态快照：第一次 reset 时 saveState，之后一次 restoreState 恢复
+        self._reset_state = None
+        self._reset_object_poses = None
         self.target_pos = np.array([0.615, 0, 0.1])
 
     def create_box(self, half_size, color, pos, orn, collision=True, mass=0):
         if collision:
-            collision = p.createCollisionShape(
-                shapeType=p.GEOM_BOX,
+            collision = self._p.createCollisionShape(
+                shapeType=self._p.GEOM_BOX,
                 halfExtents=[half_size, half_size, half_size]
             )
         else:
             collision = -1
-            visual = p.createVisualShape(
-                            shapeType=p.GEOM_BOX,
+            visual = self._p.createVisualShape(
+                            shapeType=self._p.GEOM_BOX,
                             halfExtents=[half_size, half_size, half_size],
                             rgbaColor=color
                             )
-            box_id = p.createMultiBody(
+            box_id = self._p.createMultiBody(
                             baseMass=mass,
                             baseCollisionShapeIndex=collision,
                             # baseVisualShapeIndex=visual,
@@ -114,22 +121,73 @@ class PandaEnv(gym.Env):
         return box_id
 
     def reset(self, seed: Optional[int] = None, options: Optional[dict] = None):
+        """
+        第一次调用逐个复位物块和机械臂、步进一次后用 saveState 存下快照，之后一次 restoreState 恢复
+        options 可选：
+            "object_poses": 与 self._objects 对应的 [(pos, orn), ...]，恢复快照后再摆放物块
+            "randomize_objects": True 时用 self.np_random 在初始位姿附近随机摆放物块
+        """
         self.terminated = 0
         super().reset(seed=seed)
+        options = options or {}
         # p.resetBasePositionAndOrientation(self.goal, self._panda.inital_eepose[0], self._panda.inital_eepose[1])
-        self._object1.reset()
-        self._panda.reset()
+        self._reset_snapshot()
+        if options.get("object_poses") is not None:
+            self._place_objects(options["object_poses"])
+        elif options.get("randomize_objects"):
+            self._place_objects(self.sample_object_poses(self.np_random))
         self.realAction = np.array([0, 0, 0, 0.04])
-        p.stepSimulation()
         Observation = self._get_obs()
         info = self._get_info()
         return Observation, info
 
+    def _reset_full(self):
+        """逐个复位物块和机械臂并步进一次（生成快照时使用）"""
+        self._object1.reset()
+        self._panda.reset()
+        self._p.stepSimulation()
+
+    def _reset_snapshot(self):
+        """第一次调用走 _reset_full 并用 saveState 存下快照，之后一次 restoreState 恢复"""
+        if self._reset_state is None:
+            self._reset_full()
+            self._reset_state = self._p.saveState()
+            self._reset_object_poses = [self._p.getBasePositionAndOrientation(obj.id) for obj in self._objects]
+        else:
+            self._p.restoreState(self._reset_state)
+
+    def _place_objects(self, object_poses):
+        """object_poses 为与 self._objects 对应的 [(pos, orn), ...]，某项为 None 则保持当前位姿"""
+        for obj, pose in zip(self._objects, object_poses):
+            if pose is not None:
+                self._p.resetBasePositionAndOrientation(obj.id, pose[0], pose[1])
+
+    def clear_reset_state(self):
+        """场景中增删物体后调用（restoreState 要求物体与快照一致），下一次 reset 重新生成快照"""
+        if self._reset_state is not None:
+            self._p.removeState(self._reset_state)
+            self._reset_state = None
+
+    def sample_object_poses(self, rng, xy_range=0.02, yaw_range=np.pi / 12):
+        """
+        在初始位姿附近随机摆放物块：平移 ±xy_range（m），绕 z 轴转 ±yaw_range（rad）
+        rng 为 np.random.Generator，返回与 self._objects 对应的 [(pos, orn), ...]
+        """
+        if self._reset_object_poses is None:
+            raise RuntimeError("sample_object_poses 需要先调用一次 reset() 生成初始快照")
+        poses = []
+        for pos, orn in self._reset_object_poses:
+            dx, dy = rng.uniform(-xy_range, xy_range, size=2)
+            yaw = self._p.getQuaternionFromEuler([0, 0, rng.uniform(-yaw_range, yaw_range)])
+            _, orn = self._p.multiplyTransforms([0, 0, 0], yaw, [0, 0, 0], orn)
+            poses.append(([pos[0] + dx, pos[1] + dy, pos[2]], orn))
+        return poses
+
 
     def is_grasped(self):
         min_force = 0.5
-        contact_finger1 = p.getContactPoints(bodyA=self._panda.pandaUid, bodyB=self.object, linkIndexA=9)
-        contact_finger2 = p.getContactPoints(bodyA=self._panda.pandaUid, bodyB=self.object, linkIndexA=10)
+        contact_finger1 = self._p.getContactPoints(bodyA=self._panda.pandaUid, bodyB=self.object, linkIndexA=9)
+        contact_finger2 = self._p.getContactPoints(bodyA=self._panda.pandaUid, bodyB=self.object, linkIndexA=10)
         if bool(contact_finger1):
             # print("contact_finger1", contact_finger1)
             # print("contact_finger1[7]", contact_finger1[0][7])
@@ -167,6 +225,19 @@ class PandaEnv(gym.Env):
 
         return Observation
     
+    def enable_profiler(self, profiler):
+        '''
+        给热路径插桩（见 utils/profiler.py）：env / Panda / 物体的 pybullet 调用按函数归类计时，
+        step 拆成动作 / 判定 / 观测 / 奖励 / 渲染等阶段；不调用本方法时没有任何额外开销，profiler.detach() 撤销
+        '''
+        for owner in [self, self._panda] + self._objects:
+            profiler.instrument_client(owner)
+        profiler.instrument(self, {"step": "env.step", "reset": "env.reset", "_termination": "env.termination",
+                                   "_get_obs": "env.obs", "_get_reward": "env.reward", "render": "env.render"})
+        profiler.instrument(self._panda, {"applyAction": "action", "setInverseKine": "ik", "joint_control": "motor",
+                                          "get_jointPoses": "pose", "get_gripper_pose": "pose"})
+        return profiler
+
     ## discrete action: -dx, dx, -dy, dy, -dz, dz, static
     def step(self, action):
 
@@ -177,7 +248,7 @@ class PandaEnv(gym.Env):
         if self.terminated:
             self.realAction = np.array([0, 0, 0, 0])
         self._panda.applyAction(self.realAction)
-        p.stepSimulation()
+        self._p.stepSimulation()
         if self.render_mode == "human":
             time.sleep(self._timeStep)
         
@@ -207,7 +278,7 @@ class PandaEnv(gym.Env):
     
     def _termination(self):
         #print (self._kuka.endEffectorPos[2])
-        state = p.getLinkState(self._panda.pandaUid, self._panda.pandaEndEffectorIndex)
+        state = self._p.getLinkState(self._panda.pandaUid, self._panda.pandaEndEffectorIndex)
         actualEndEffectorPos = state[0]
 
         #print("self._envStepCounter")
@@ -228,7 +299,7 @@ class PandaEnv(gym.Env):
             for i in range(100):
                 graspAction = [0, 0, 0, 0]
                 self._panda.applyAction(graspAction)
-                p.stepSimulation()
+                self._p.stepSimulation()
                 if self.render_mode == "human":
                     time.sleep(self._timeStep)
                 fingerAngle = fingerAngle - (0.3 / 100.)
@@ -236,15 +307,15 @@ class PandaEnv(gym.Env):
             for i in range(1000):
                 graspAction = [0, 0, 0.005, 0]
                 self._panda.applyAction(graspAction)
-                p.stepSimulation()
+                self._p.stepSimulation()
                 if self.render_mode == "human":
                     time.sleep(self._timeStep)
-                object_pos, object_orn = p.getBasePositionAndOrientation(self.object)
+                object_pos, object_orn = self._p.getBasePositionAndOrientation(self.object)
                 if (object_pos[2] > 0.23):
                     #print("BLOCKPOS!")
                     #print(blockPos[2])
                     break
-                state = p.getLinkState(self._panda.pandaUid, self._panda.pandaEndEffectorIndex)
+                state = self._p.getLinkState(self._panda.pandaUid, self._panda.pandaEndEffectorIndex)
                 actualEndEffectorPos = state[0]
                 if (actualEndEffectorPos[2] > 0.5):
                     break                
@@ -292,4 +363,8 @@ class PandaEnv(gym.Env):
         return rgb_array
     
     def get_init_eepose(self,):
-        return self._panda.inital_eepose
\ No newline at end of file
+        return self._panda.inital_eepose
+
+    def close(self):
+        if self._p._client >= 0:
+            self._p.disconnect()
\ No newline at end of file